@@ -0,0 +1,80 @@
+# bench/__main__.py
+
+"""
+Runs the benchmark suite offline against a generated corpus.
+
+    python -m bench                                  # readers + end-to-end, table on stdout
+    python -m bench --output base.json               # save machine-readable results
+    python -m bench --baseline base.json             # compare; exit code 1 on regressions
+    python -m bench --suite readers --kinds txt,csv --size-kb 4096 --repeat 3
+    python -m bench --suite startup                  # worker import time, first load of each reader
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+
+from .corpus import KINDS, generate_corpus
+from .runner import (
+    compare, format_comparison, format_results, load_results, run_benchmarks, save_results
+)
+
+SUITES = ("readers", "e2e")
+# "all" চালালেও startup আলাদা করে চাইতে হয় (প্রতিটি মাপ নতুন প্রসেসে, তাই ধীর)
+EXTRA_SUITES = ("startup",)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Reader and end-to-end benchmarks.")
+    parser.add_argument("--suite", choices=SUITES + EXTRA_SUITES + ("all",), default="all")
+    parser.add_argument("--kinds", default=",".join(KINDS), help="comma-separated corpus kinds")
+    parser.add_argument("--size-kb", type=int, default=256, help="approximate text per corpus file")
+    parser.add_argument("--density", type=float, default=0.01, help="share of lines/rows with a match")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--corpus-dir", help="keep the generated corpus here (default: a temp dir)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON instead of a table")
+    parser.add_argument("--baseline", help="compare against a saved result file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown (0.2 = 20%%)")
+    parser.add_argument("--min-delta", type=float, default=0.002, help="ignore slowdowns below this many seconds")
+    parser.add_argument("--metric", choices=("median", "min", "mean"), default="median")
+    args = parser.parse_args(argv)
+
+    # রিপোজিটরির রুট থেকে globals/services ইম্পোর্ট করা যায় যেন
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    logging.disable(logging.WARNING)
+
+    kinds = [kind for kind in args.kinds.split(",") if kind]
+    suites = SUITES if args.suite == "all" else (args.suite,)
+    corpus_params = {"kinds": kinds, "size_kb": args.size_kb, "density": args.density, "seed": args.seed}
+
+    baseline = load_results(args.baseline) if args.baseline else None
+
+    with tempfile.TemporaryDirectory(prefix="bench-corpus-") as temp_dir:
+        files = generate_corpus(args.corpus_dir or temp_dir, args.size_kb, args.density, args.seed, kinds)
+        document = run_benchmarks(files, corpus_params, args.repeat, suites)
+
+    if args.output:
+        save_results(document, args.output)
+    if args.json:
+        json.dump(document, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        format_results(document)
+
+    if baseline is None:
+        return 0
+    rows, problems = compare(baseline, document, args.threshold, args.metric, args.min_delta)
+    print()
+    format_comparison(rows)
+    for problem in problems:
+        print(f"REGRESSION {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
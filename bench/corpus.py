@@ -0,0 +1,271 @@
+# bench/corpus.py
+
+"""
+Deterministic synthetic corpus for the benchmarks: the same seed, size and density always
+give the same files (byte for byte), so runs on different commits search the same data.
+
+    python -m bench.corpus OUT_DIR [--size-kb 256] [--density 0.01] [--seed 1234]
+"""
+
+import argparse
+import csv
+import io
+import random
+import re
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from .xls_writer import write_xls, MAX_ROWS_PER_SHEET
+
+# সার্চ করা টার্ম দুটি শব্দভান্ডারে নেই, তাই শুধু density অনুযায়ী বসানো লাইনেই থাকে
+NEEDLE = "zephyrine"
+SECOND_TERM = "quillwort"
+MISSING_TERM = "xylophagous"
+
+VOCABULARY = (
+    "the of and to in is for on that with as by at from this be are or an it was which "
+    "report invoice customer payment order shipment warehouse account balance ledger "
+    "server request response latency error timeout retry cache index query result "
+    "north south east west river mountain harbour village market station bridge "
+    "alpha beta gamma delta sigma omega vector matrix tensor scalar "
+    "café naïve résumé জমা হিসাব রিপোর্ট"
+).split()
+# PDF এর বিল্ট-ইন ফন্টে বাংলা নেই
+ASCII_VOCABULARY = tuple(word for word in VOCABULARY if word.isascii())
+
+KINDS = ("pdf", "docx", "xlsx", "xls", "csv", "txt")
+CSV_COLUMNS = ("id", "customer", "city", "note", "amount", "date")
+PDF_LINES_PER_PAGE = 60
+DOCX_TABLE_EVERY = 50
+
+# zip পার্টের টাইমস্ট্যাম্প স্থির রাখা হয়, যাতে একই ইনপুটে একই বাইট আসে
+FIXED_ZIP_TIME = (2000, 1, 1, 0, 0, 0)
+FIXED_DATETIME = datetime(2000, 1, 1)
+
+
+def _sentence(rng, density, vocabulary=VOCABULARY, min_words=6, max_words=14):
+    words = [rng.choice(vocabulary) for _ in range(rng.randint(min_words, max_words))]
+    if rng.random() < density:
+        words[rng.randrange(len(words))] = NEEDLE
+    if rng.random() < density:
+        words[rng.randrange(len(words))] = SECOND_TERM
+    return " ".join(words)
+
+
+def _sentences(rng, target_bytes, density, vocabulary=VOCABULARY):
+    size = 0
+    while size < target_bytes:
+        line = _sentence(rng, density, vocabulary)
+        size += len(line.encode("utf-8")) + 1
+        yield line
+
+
+def _rows(rng, target_bytes, density):
+    size = 0
+    index = 0
+    while size < target_bytes:
+        index += 1
+        row = [
+            str(index),
+            f"{rng.choice(VOCABULARY).title()} {rng.choice(VOCABULARY).title()}",
+            rng.choice(VOCABULARY),
+            _sentence(rng, density, min_words=3, max_words=8),
+            f"{rng.randint(0, 999999) / 100:.2f}",
+            f"20{rng.randint(10, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        ]
+        size += sum(len(cell.encode("utf-8")) + 1 for cell in row)
+        yield row
+
+
+def _normalized_zip(parts):
+    """Zip bytes of [(name, bytes)] with fixed timestamps."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in parts:
+            archive.writestr(zipfile.ZipInfo(name, FIXED_ZIP_TIME), data, zipfile.ZIP_DEFLATED)
+    return buffer.getvalue()
+
+
+def make_txt(rng, target_bytes, density):
+    return ("\n".join(_sentences(rng, target_bytes, density)) + "\n").encode("utf-8")
+
+
+def make_csv(rng, target_bytes, density):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(CSV_COLUMNS)
+    writer.writerows(_rows(rng, target_bytes, density))
+    return buffer.getvalue().encode("utf-8")
+
+
+def make_xlsx(rng, target_bytes, density):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    workbook.properties.creator = "bench"
+    workbook.properties.created = FIXED_DATETIME
+    rows = list(_rows(rng, target_bytes, density))
+    half = (len(rows) + 1) // 2
+    for name, sheet_rows in (("Orders", rows[:half]), ("Archive", rows[half:])):
+        sheet = workbook.create_sheet(name)
+        sheet.append(CSV_COLUMNS)
+        for row in sheet_rows:
+            sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    # openpyxl সেভ করার সময় modified ও zip টাইমস্ট্যাম্পে বর্তমান সময় বসায়
+    with zipfile.ZipFile(buffer) as archive:
+        parts = []
+        for name in archive.namelist():
+            data = archive.read(name)
+            if name == "docProps/core.xml":
+                data = _fixed_core_properties(data)
+            parts.append((name, data))
+    return _normalized_zip(parts)
+
+
+def _fixed_core_properties(data):
+    stamp = FIXED_DATETIME.strftime("%Y-%m-%dT%H:%M:%SZ").encode()
+    return re.sub(rb"(<dcterms:modified[^>]*>)[^<]*", lambda m: m.group(1) + stamp, data)
+
+
+def make_xls(rng, target_bytes, density):
+    rows = list(_rows(rng, target_bytes, density))
+    sheets = []
+    per_sheet = MAX_ROWS_PER_SHEET - 1
+    for number, start in enumerate(range(0, max(len(rows), 1), per_sheet), 1):
+        sheets.append((f"Sheet{number}", [list(CSV_COLUMNS)] + rows[start:start + per_sheet]))
+    return write_xls(sheets)
+
+
+_W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+_R = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+_DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '<Override PartName="/word/header1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.header+xml"/>'
+    '</Types>'
+)
+_DOCX_PACKAGE_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/></Relationships>'
+)
+_DOCX_DOCUMENT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/header" '
+    'Target="header1.xml"/></Relationships>'
+)
+
+
+def _docx_paragraph(rng, text):
+    # Word এর মতো একটি প্যারাগ্রাফকে কয়েকটি run এ ভাঙা হয়
+    words = text.split(" ")
+    runs = []
+    start = 0
+    while start < len(words):
+        end = start + rng.randint(1, 5)
+        piece = " ".join(words[start:end]) + (" " if end < len(words) else "")
+        runs.append(f'<w:r><w:t xml:space="preserve">{escape(piece)}</w:t></w:r>')
+        start = end
+    return "<w:p>" + "".join(runs) + "</w:p>"
+
+
+def make_docx(rng, target_bytes, density):
+    body = []
+    for number, sentence in enumerate(_sentences(rng, target_bytes, density), 1):
+        if number % DOCX_TABLE_EVERY == 0:
+            cells = "".join(f"<w:tc>{_docx_paragraph(rng, _sentence(rng, density, min_words=2, max_words=4))}</w:tc>"
+                            for _ in range(3))
+            body.append(f"<w:tbl><w:tr>{cells}</w:tr></w:tbl>")
+        body.append(_docx_paragraph(rng, sentence))
+    document = (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:document {_W} {_R}><w:body>'
+        + "".join(body)
+        + '<w:sectPr><w:headerReference w:type="default" r:id="rId1"/></w:sectPr></w:body></w:document>'
+    )
+    header = (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:hdr {_W}>'
+        + _docx_paragraph(rng, _sentence(rng, density)) + "</w:hdr>"
+    )
+    return _normalized_zip([
+        ("[Content_Types].xml", _DOCX_CONTENT_TYPES.encode()),
+        ("_rels/.rels", _DOCX_PACKAGE_RELS.encode()),
+        ("word/_rels/document.xml.rels", _DOCX_DOCUMENT_RELS.encode()),
+        ("word/document.xml", document.encode("utf-8")),
+        ("word/header1.xml", header.encode("utf-8")),
+    ])
+
+
+def make_pdf(rng, target_bytes, density):
+    import fitz
+
+    lines = list(_sentences(rng, target_bytes, density, ASCII_VOCABULARY))
+    document = fitz.open()
+    for start in range(0, max(len(lines), 1), PDF_LINES_PER_PAGE):
+        page = document.new_page()
+        page.insert_text((36, 40), "\n".join(lines[start:start + PDF_LINES_PER_PAGE]), fontsize=8)
+    document.set_metadata({})
+    data = document.tobytes(garbage=3, deflate=True, no_new_id=True)
+    document.close()
+    return data
+
+
+MAKERS = {
+    "pdf": make_pdf,
+    "docx": make_docx,
+    "xlsx": make_xlsx,
+    "xls": make_xls,
+    "csv": make_csv,
+    "txt": make_txt,
+}
+
+
+def corpus_file_name(kind):
+    return f"bench.{kind}"
+
+
+def generate_corpus(out_dir, size_kb=256, density=0.01, seed=1234, kinds=KINDS):
+    """
+    Writes one file per kind into `out_dir` and returns {kind: Path}.
+    `size_kb` is the approximate amount of text per file (PDF/DOCX/XLSX compress it) and
+    `density` the probability that a line/row contains NEEDLE (and, independently, SECOND_TERM).
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    files = {}
+    for kind in kinds:
+        if kind not in MAKERS:
+            raise ValueError(f"Unknown corpus kind: {kind}")
+        # প্রতিটি ধরনের নিজস্ব RNG, তাই কোনো kind বাদ দিলেও বাকিগুলোর কন্টেন্ট বদলায় না
+        rng = random.Random(f"{seed}:{kind}")
+        path = out_dir / corpus_file_name(kind)
+        path.write_bytes(MAKERS[kind](rng, size_kb * 1024, density))
+        files[kind] = path
+    return files
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the synthetic benchmark corpus.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--size-kb", type=int, default=256)
+    parser.add_argument("--density", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--kinds", default=",".join(KINDS))
+    args = parser.parse_args(argv)
+    files = generate_corpus(args.out_dir, args.size_kb, args.density, args.seed, args.kinds.split(","))
+    for kind, path in files.items():
+        print(f"{kind:5} {path.stat().st_size:>10} {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+# bench/runner.py
+
+"""
+Reader microbenchmarks and the end-to-end /search_upload benchmark.
+
+Every benchmark is timed `repeat` times after one warm-up call; a result records the
+min/median/mean in seconds and the number of matches, so a baseline comparison can tell a
+slowdown from a change in behaviour.
+"""
+
+import io
+import json
+import mmap
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+from .corpus import NEEDLE, SECOND_TERM, MISSING_TERM, corpus_file_name
+
+RESULT_SCHEMA = 1
+
+# কুয়েরির নাম -> কুয়েরি টেক্সট (প্রতিটি রিডার ও এন্ড-টু-এন্ড বেঞ্চমার্কে একই কুয়েরি)
+QUERIES = {
+    "simple": NEEDLE,
+    "boolean": f'"{NEEDLE}" OR "{SECOND_TERM}"',
+    "miss": MISSING_TERM,
+}
+
+# শব্দভান্ডারের non-ASCII শব্দ: latin-1 টেক্সটে এটি খুঁজতে ফাইলটি ডিকোড করতেই হয়
+ACCENTED_TERM = "café"
+# latin-1 কপির শুরুতে এতটুকু ASCII থাকে, তাই UTF-8 নয় এমন প্রথম বাইট sniff নমুনার অনেক পরে আসে
+LATIN1_ASCII_PREFIX = b"plain ascii header line\n" * 2048
+
+
+def _timing_summary(timings):
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "runs": len(timings),
+    }
+
+
+def time_call(function, repeat=5, warmup=1):
+    """Runs `function` `warmup` + `repeat` times; returns (timing dict, last return value)."""
+    value = None
+    for _ in range(warmup):
+        value = function()
+    timings = []
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        value = function()
+        timings.append(time.perf_counter() - start)
+    return _timing_summary(timings), value
+
+
+def _match_count(outcome):
+    # search_raw_text ফাইলটি ডিকোড করতে হবে বললে None দেয়
+    if outcome is None:
+        return None
+    result, status_code = outcome
+    if status_code != 200:
+        return None
+    return result.get("count", len(result.get("matches", ())))
+
+
+def run_reader_benchmarks(files, repeat=5):
+    """
+    Extraction and search per reader: "extract:<kind>" runs extract_content, and
+    "search:<kind>:<query>" searches the already-extracted content (no cache), so the two
+    costs are measured separately. Text and CSV files also get their raw-bytes and
+    streaming paths ("bytes:txt:..", "stream:txt:..", "stream:csv:..") plus a latin-1 copy
+    searched for ACCENTED_TERM by full decode and window by window ("search:txt-latin1:accent",
+    "stream:txt-latin1:accent", which must find the same matches). "archive:<query>"
+    searches all of them inside one stored .zip memory-mapped from disk, the way a large
+    uploaded, scanned or spilled archive arrives.
+    """
+    from services.file_reader import extract_content, search_extracted_content, search_file_content, search_raw_text
+    from services.query_parser import parse_query
+    from services.readers.excel_reader import search_csv_stream
+    from services.readers.text_reader import search_text_windows
+
+    queries = {name: parse_query(text, syntax="boolean") for name, text in QUERIES.items()}
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench-uploads-") as temp_uploads_dir:
+        for kind, path in files.items():
+            data = path.read_bytes()
+            file_name = path.name
+            item = {"file_name": file_name, "file_path": file_name}
+
+            timing, content = time_call(lambda: extract_content(data, file_name, temp_uploads_dir), repeat)
+            results[f"extract:{kind}"] = dict(timing, bytes=len(data))
+
+            for query_name, query in queries.items():
+                timing, outcome = time_call(
+                    lambda: search_extracted_content(content, item, query, use_cache=False), repeat
+                )
+                results[f"search:{kind}:{query_name}"] = dict(timing, matches=_match_count(outcome))
+
+                if kind == "txt":
+                    timing, outcome = time_call(lambda: search_raw_text(data, item, query), repeat)
+                    results[f"bytes:txt:{query_name}"] = dict(timing, matches=_match_count(outcome))
+                    timing, outcome = time_call(
+                        lambda: search_text_windows(data, file_name, file_name, query), repeat
+                    )
+                    results[f"stream:txt:{query_name}"] = dict(timing, matches=_match_count(outcome))
+                elif kind == "csv":
+                    timing, outcome = time_call(
+                        lambda: search_csv_stream(io.BytesIO(data), file_name, file_name, query), repeat
+                    )
+                    results[f"stream:csv:{query_name}"] = dict(timing, matches=_match_count(outcome))
+
+            if kind == "txt":
+                latin1 = LATIN1_ASCII_PREFIX + data.decode("utf-8").encode("latin-1", "replace")
+                accent = parse_query(ACCENTED_TERM)
+                latin1_content = extract_content(latin1, file_name, temp_uploads_dir)
+                timing, outcome = time_call(
+                    lambda: search_extracted_content(latin1_content, item, accent, use_cache=False), repeat
+                )
+                results["search:txt-latin1:accent"] = dict(timing, matches=_match_count(outcome))
+                timing, outcome = time_call(
+                    lambda: search_text_windows(latin1, file_name, file_name, accent, window_bytes=64 * 1024), repeat
+                )
+                results["stream:txt-latin1:accent"] = dict(timing, matches=_match_count(outcome))
+
+        archive_path = Path(temp_uploads_dir) / "bench.zip"
+        with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_STORED) as archive:
+            for path in files.values():
+                archive.write(path, path.name)
+        with open(archive_path, "rb") as f:
+            archive_data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            archive_item = {"file_name": archive_path.name, "file_path": archive_path.name, "data": archive_data}
+            for query_name, query in queries.items():
+                timing, outcome = time_call(
+                    lambda: search_file_content(dict(archive_item), query, temp_uploads_dir), repeat
+                )
+                results[f"archive:{query_name}"] = dict(timing, bytes=len(archive_data), matches=_match_count(outcome))
+        finally:
+            # কোনো memoryview খোলা থাকলে এখানে BufferError হতো
+            archive_data.close()
+    return results
+
+
+def run_end_to_end(files, repeat=5):
+    """
+    POSTs the whole corpus to /search_upload through the Flask test client.
+    "e2e:cold:<query>" empties the extraction cache before every request, "e2e:warm:<query>"
+    keeps it (with the process executor the workers never cache, so both are cold).
+    """
+    import server
+    from globals import SEARCH_MAX_LIMIT
+    from services.extraction_cache import EXTRACTION_CACHE
+
+    client = server.app.test_client()
+    corpus = [(path.name, path.read_bytes()) for path in files.values()]
+    paths = json.dumps({name: f"corpus/{name}" for name, _ in corpus})
+
+    def post(query_text):
+        response = client.post(
+            "/search_upload",
+            data={
+                "q": query_text,
+                "syntax": "boolean",
+                "paths": paths,
+                "limit": str(SEARCH_MAX_LIMIT),
+                "files": [(io.BytesIO(data), name) for name, data in corpus],
+            },
+            content_type="multipart/form-data",
+        )
+        body = response.get_json()
+        if response.status_code != 200:
+            raise RuntimeError(f"/search_upload failed with {response.status_code}: {body}")
+        return body["count"]
+
+    def cold(query_text):
+        EXTRACTION_CACHE.clear()
+        return post(query_text)
+
+    results = {}
+    total_bytes = sum(len(data) for _, data in corpus)
+    for query_name, query_text in QUERIES.items():
+        timing, count = time_call(lambda: cold(query_text), repeat)
+        results[f"e2e:cold:{query_name}"] = dict(timing, bytes=total_bytes, matches=count)
+        timing, count = time_call(lambda: post(query_text), repeat)
+        results[f"e2e:warm:{query_name}"] = dict(timing, bytes=total_bytes, matches=count)
+    return results
+
+
+# সাবপ্রসেসে চালানো কোড: ইম্পোর্টের সময় (সেকেন্ড) প্রিন্ট করে
+_STARTUP_SNIPPETS = {
+    "startup:server": "import time; s = time.perf_counter(); import server; print(time.perf_counter() - s)",
+}
+_READER_SNIPPET = (
+    "import time; from services.readers.registry import all_readers; "
+    "reader = [r for r in all_readers() if r.name == {name!r}][0]; "
+    "s = time.perf_counter(); reader.module; print(time.perf_counter() - s)"
+)
+
+
+def run_startup_benchmarks(repeat=5):
+    """
+    Cold-start costs, each measured in a fresh interpreter: "startup:server" imports the
+    app as a worker boot does, "startup:reader:<name>" is the first use of one reader
+    (its libraries are imported lazily, see services/readers/registry.py).
+    """
+    from services.readers.registry import all_readers
+
+    snippets = dict(_STARTUP_SNIPPETS)
+    for reader in all_readers():
+        snippets[f"startup:reader:{reader.name}"] = _READER_SNIPPET.format(name=reader.name)
+
+    root = Path(__file__).resolve().parent.parent
+    results = {}
+    for name, code in snippets.items():
+        timings = []
+        for _ in range(max(1, repeat)):
+            completed = subprocess.run(
+                [sys.executable, "-c", code], capture_output=True, text=True, cwd=root, timeout=300,
+            )
+            if completed.returncode != 0:
+                raise RuntimeError(f"{name} failed: {completed.stderr.strip()[-500:]}")
+            timings.append(float(completed.stdout.strip().splitlines()[-1]))
+        results[name] = _timing_summary(timings)
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment_info():
+    from globals import SEARCH_EXECUTOR
+    from services.search_executor import worker_count
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "executor": SEARCH_EXECUTOR,
+        "workers": worker_count(),
+        "git_revision": _git_revision(),
+    }
+
+
+def run_benchmarks(files, corpus_params, repeat=5, suites=("readers", "e2e")):
+    results = {}
+    if "startup" in suites:
+        results.update(run_startup_benchmarks(repeat))
+    if "readers" in suites:
+        results.update(run_reader_benchmarks(files, repeat))
+    if "e2e" in suites:
+        results.update(run_end_to_end(files, repeat))
+    return {
+        "schema": RESULT_SCHEMA,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment_info(),
+        "corpus": corpus_params,
+        "queries": QUERIES,
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=0.2, metric="median", min_delta=0.002):
+    """
+    Compares two result documents. Returns (rows, problems): one row per benchmark in both
+    documents and a list of human-readable regressions (slower by more than `threshold`
+    and by more than `min_delta` seconds, so sub-millisecond jitter is ignored) and
+    match-count changes.
+    """
+    rows = []
+    problems = []
+    # kinds এর উপসেট চালানো যায়; বাকি প্যারামিটার আলাদা হলে ফাইলগুলোই আলাদা
+    before_corpus = {k: v for k, v in baseline.get("corpus", {}).items() if k != "kinds"}
+    now_corpus = {k: v for k, v in current.get("corpus", {}).items() if k != "kinds"}
+    if before_corpus != now_corpus:
+        problems.append(f"corpus differs: {before_corpus} vs {now_corpus}")
+
+    for name, now in sorted(current["results"].items()):
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        ratio = now[metric] / before[metric] if before[metric] else float("inf")
+        delta = now[metric] - before[metric]
+        status = "ok"
+        if ratio > 1 + threshold and delta > min_delta:
+            status = "slower"
+            problems.append(f"{name}: {before[metric]:.4f}s -> {now[metric]:.4f}s ({ratio:.2f}x)")
+        elif ratio < 1 - threshold and -delta > min_delta:
+            status = "faster"
+        if before.get("matches") != now.get("matches"):
+            status = "matches"
+            problems.append(f"{name}: match count {before.get('matches')} -> {now.get('matches')}")
+        rows.append((name, before[metric], now[metric], ratio, status))
+    return rows, problems
+
+
+def format_results(document, file=sys.stdout):
+    print(f"{'benchmark':32} {'median s':>10} {'min s':>10} {'matches':>8}", file=file)
+    for name, result in document["results"].items():
+        matches = "" if result.get("matches") is None else result["matches"]
+        print(f"{name:32} {result['median']:>10.4f} {result['min']:>10.4f} {matches:>8}", file=file)
+
+
+def format_comparison(rows, file=sys.stdout):
+    print(f"{'benchmark':32} {'baseline s':>10} {'current s':>10} {'ratio':>7}  status", file=file)
+    for name, before, now, ratio, status in rows:
+        print(f"{name:32} {before:>10.4f} {now:>10.4f} {ratio:>7.2f}  {status}", file=file)
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        document = json.load(f)
+    if document.get("schema") != RESULT_SCHEMA:
+        raise ValueError(f"{path}: unsupported benchmark result schema {document.get('schema')!r}")
+    return document
+
+
+def save_results(document, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def corpus_files(corpus_dir, kinds):
+    return {kind: Path(corpus_dir) / corpus_file_name(kind) for kind in kinds}
@@ -0,0 +1,139 @@
+# bench/xls_writer.py
+
+"""
+Minimal Excel 97-2003 (.xls) writer for the benchmark corpus: text cells only, several
+sheets, no formatting. Enough for xlrd (and therefore pandas/excel_reader) to read; it
+exists because no maintained library can write BIFF8 any more.
+"""
+
+import struct
+
+SECTOR_SIZE = 512
+# CFB: এর চেয়ে ছোট স্ট্রিম mini-stream এ রাখতে হয়; প্যাড করে সবসময় সাধারণ সেক্টরে রাখা হলো
+MINI_STREAM_CUTOFF = 4096
+# হেডারের DIFAT এ সর্বোচ্চ এতগুলো FAT সেক্টর (≈ 7 MB ফাইল) ধরে; বেঞ্চমার্কের জন্য যথেষ্ট
+MAX_HEADER_FAT_SECTORS = 109
+MAX_ROWS_PER_SHEET = 65536
+MAX_COLUMNS = 256
+
+FREE_SECTOR = 0xFFFFFFFF
+END_OF_CHAIN = 0xFFFFFFFE
+FAT_SECTOR = 0xFFFFFFFD
+NO_STREAM = 0xFFFFFFFF
+
+
+def _record(record_type, payload=b""):
+    return struct.pack("<HH", record_type, len(payload)) + payload
+
+
+def _bof(substream_type):
+    # BIFF8, build/year যেকোনো মান হতে পারে
+    return _record(0x0809, struct.pack("<HHHHII", 0x0600, substream_type, 0x0DBB, 0x07CC, 0, 0x06))
+
+
+def _unicode_string(text, length_format):
+    try:
+        encoded, flags = text.encode("latin-1"), 0
+    except UnicodeEncodeError:
+        encoded, flags = text.encode("utf-16-le"), 1
+    return struct.pack(length_format, len(text)) + bytes([flags]) + encoded
+
+
+def _sheet_stream(rows):
+    column_count = max((len(row) for row in rows), default=0)
+    parts = [
+        _bof(0x0010),
+        _record(0x0200, struct.pack("<IIHHH", 0, len(rows), 0, column_count, 0)),
+    ]
+    for row_index, row in enumerate(rows):
+        for column_index, value in enumerate(row):
+            if value is None or value == "":
+                continue
+            # LABEL রেকর্ড (SST ছাড়া), টেক্সট সেল
+            payload = struct.pack("<HHH", row_index, column_index, 0) + _unicode_string(str(value), "<H")
+            parts.append(_record(0x0204, payload))
+    parts.append(_record(0x000A))
+    return b"".join(parts)
+
+
+def _workbook_stream(sheets):
+    sheet_streams = [_sheet_stream(rows) for _, rows in sheets]
+
+    def globals_stream(offsets):
+        parts = [_bof(0x0005), _record(0x0042, struct.pack("<H", 1200))]
+        for (name, _), offset in zip(sheets, offsets):
+            parts.append(_record(0x0085, struct.pack("<IBB", offset, 0, 0) + _unicode_string(name, "<B")))
+        parts.append(_record(0x000A))
+        return b"".join(parts)
+
+    # BOUNDSHEET এ শিটের অফসেট লাগে, যা globals এর দৈর্ঘ্যের উপর নির্ভর করে (দৈর্ঘ্য অফসেটের উপর নয়)
+    globals_length = len(globals_stream([0] * len(sheets)))
+    offsets = []
+    position = globals_length
+    for stream in sheet_streams:
+        offsets.append(position)
+        position += len(stream)
+    return globals_stream(offsets) + b"".join(sheet_streams)
+
+
+def _directory_entry(name, entry_type, child, start_sector, size):
+    encoded = (name + "\0").encode("utf-16-le") if name else b""
+    return (
+        encoded.ljust(64, b"\0")
+        + struct.pack("<HBB", len(encoded), entry_type, 1)
+        + struct.pack("<III", NO_STREAM, NO_STREAM, child)
+        + b"\0" * 16 + b"\0" * 4 + b"\0" * 16
+        + struct.pack("<IQ", start_sector, size)
+    )
+
+
+def _compound_file(workbook):
+    """Wraps the Workbook stream in a version 3 Compound File (stream, directory, FAT)."""
+    if len(workbook) < MINI_STREAM_CUTOFF:
+        workbook = workbook.ljust(MINI_STREAM_CUTOFF, b"\0")
+    stream_size = len(workbook)
+    stream_sectors = -(-stream_size // SECTOR_SIZE)
+    directory_sector = stream_sectors
+
+    entries_per_fat_sector = SECTOR_SIZE // 4
+    fat_sectors = 1
+    while (stream_sectors + 1 + fat_sectors) > fat_sectors * entries_per_fat_sector:
+        fat_sectors += 1
+    if fat_sectors > MAX_HEADER_FAT_SECTORS:
+        raise ValueError("Workbook too large for the benchmark .xls writer.")
+
+    fat = list(range(1, stream_sectors)) + [END_OF_CHAIN, END_OF_CHAIN] + [FAT_SECTOR] * fat_sectors
+    fat += [FREE_SECTOR] * (fat_sectors * entries_per_fat_sector - len(fat))
+
+    difat = list(range(directory_sector + 1, directory_sector + 1 + fat_sectors))
+    difat += [FREE_SECTOR] * (MAX_HEADER_FAT_SECTORS - len(difat))
+    header = (
+        bytes.fromhex("D0CF11E0A1B11AE1") + b"\0" * 16
+        + struct.pack("<HHHHH", 0x003E, 0x0003, 0xFFFE, 9, 6) + b"\0" * 6
+        + struct.pack("<IIII", 0, fat_sectors, directory_sector, 0)
+        + struct.pack("<IIIII", MINI_STREAM_CUTOFF, END_OF_CHAIN, 0, END_OF_CHAIN, 0)
+        + struct.pack(f"<{MAX_HEADER_FAT_SECTORS}I", *difat)
+    )
+
+    directory = (
+        _directory_entry("Root Entry", 5, 1, END_OF_CHAIN, 0)
+        + _directory_entry("Workbook", 2, NO_STREAM, 0, stream_size)
+        + _directory_entry("", 0, NO_STREAM, 0, 0) * 2
+    )
+    return (
+        header
+        + workbook.ljust(stream_sectors * SECTOR_SIZE, b"\0")
+        + directory
+        + struct.pack(f"<{len(fat)}I", *fat)
+    )
+
+
+def write_xls(sheets):
+    """
+    Returns the bytes of an .xls workbook. `sheets` is [(name, rows)], rows being lists of
+    strings (at most 65536 rows and 256 columns per sheet).
+    """
+    for name, rows in sheets:
+        if len(rows) > MAX_ROWS_PER_SHEET or any(len(row) > MAX_COLUMNS for row in rows):
+            raise ValueError(f"Sheet {name!r} exceeds the .xls row/column limits.")
+    return _compound_file(_workbook_stream(sheets))
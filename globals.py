@@ -4,13 +4,7 @@ import os
 import tempfile
 from pathlib import Path
 import threading
-
-# 🌟 ইন-মেমরি স্টোরেজ ডিকশনারি (ফাইল ডেটা এবং মেটাডেটা রাখার জন্য) 🌟
-# এটি একটি সাধারণ Python ডিকশনারি।
-FILE_STORAGE_DICT = {}
-
-# 🌟 লক তৈরি করা হলো থ্রেড-সেফটির জন্য (একাধিক রিকোয়েস্ট একই সময়ে অ্যাক্সেস করতে পারে) 🌟
-FILE_STORAGE_LOCK = threading.Lock()
+from services.file_storage import BoundedFileStorage
 
 # 🚀 অন-ডিস্ক টেম্পোরারি ফাইল স্টোরেজ পাথের জন্য (যদি ভবিষ্যতে লাগে) 🚀
 # ক্লাউড এনভায়রনমেন্টে (Render) /tmp ফোল্ডার ব্যবহার করা হলো
@@ -29,4 +23,166 @@ try:
     TEMP_DIR_PATH.mkdir(parents=True, exist_ok=True)
 except Exception as e:
     # লগিং বা এরর হ্যান্ডলিং যোগ করা যেতে পারে
-    print(f"Error ensuring TEMP_DIR_PATH exists: {e}")
\ No newline at end of file
+    print(f"Error ensuring TEMP_DIR_PATH exists: {e}")
+
+# 🌟 এক্সট্র্যাকশন ক্যাশ কনফিগারেশন 🌟
+# ফাইলের কন্টেন্ট হ্যাশ অনুযায়ী এক্সট্র্যাক্ট করা টেক্সট মেমরিতে রাখা হয়,
+# যাতে নতুন কুয়েরি বা ভিউয়ার লোডে আবার PDF/DOCX/Excel পার্স করতে না হয়।
+EXTRACTION_CACHE_MAX_BYTES = int(os.environ.get("EXTRACTION_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+# ক্যাশের কোনো এন্ট্রি এতক্ষণ ব্যবহার না হলে বাদ দেওয়া হবে (সেকেন্ড)
+EXTRACTION_CACHE_TTL_SECONDS = FILE_CLEANUP_HOURS * 3600
+
+
+# 🚀 প্যারালাল সার্চ কনফিগারেশন 🚀
+# "process" = CPU-bound এক্সট্র্যাকশনের জন্য প্রসেস পুল, "thread" = থ্রেড পুল, "serial" = আগের মতো একটির পর একটি
+SEARCH_EXECUTOR = os.environ.get("SEARCH_EXECUTOR", "process").lower()
+
+# সর্বোচ্চ ওয়ার্কার সংখ্যা; সবসময় CPU কোর সংখ্যা দিয়ে সীমিত করা হয়
+SEARCH_MAX_WORKERS = int(os.environ.get("SEARCH_MAX_WORKERS", str(os.cpu_count() or 1)))
+
+# .doc ফাইলগুলো আলাদা থ্রেড পুলে চলে; থ্রেডগুলো শুধু LibreOffice পুলের রেজাল্টের জন্য অপেক্ষা করে,
+# তাই সংখ্যা বেশি হলে একসাথে বেশি ফাইল কিউতে পড়ে এবং বড় ব্যাচে কনভার্ট হয়
+DOC_THREAD_WORKERS = int(os.environ.get("DOC_THREAD_WORKERS", "16"))
+
+
+# 🌟 .doc কনভার্সন (LibreOffice) পুল 🌟
+# একসাথে কতগুলো soffice প্রসেস চলবে (প্রতিটির নিজস্ব প্রোফাইল থাকে)
+LIBREOFFICE_WORKERS = int(os.environ.get("LIBREOFFICE_WORKERS", "2"))
+
+# একটি soffice কলে সর্বোচ্চ কতগুলো .doc ফাইল কনভার্ট করা হবে
+LIBREOFFICE_BATCH_SIZE = int(os.environ.get("LIBREOFFICE_BATCH_SIZE", "8"))
+
+# একটি ফাইল কনভার্ট করার সর্বোচ্চ সময় (সেকেন্ড); এর পর প্রসেসটি বন্ধ করা হয়
+LIBREOFFICE_TIMEOUT_SECONDS = int(os.environ.get("LIBREOFFICE_TIMEOUT_SECONDS", "60"))
+
+# কিউতে অপেক্ষাসহ একটি ফাইলের রেজাল্টের জন্য সর্বোচ্চ অপেক্ষা (সেকেন্ড)
+LIBREOFFICE_JOB_TIMEOUT_SECONDS = int(os.environ.get("LIBREOFFICE_JOB_TIMEOUT_SECONDS", "300"))
+
+# কিউতে সর্বোচ্চ কতগুলো কাজ থাকতে পারবে
+LIBREOFFICE_QUEUE_SIZE = int(os.environ.get("LIBREOFFICE_QUEUE_SIZE", "256"))
+
+# 🌟 বড় টেক্সট/লগ ফাইল 🌟
+# এর চেয়ে বড় টেক্সট ফাইল পুরোটা ডিকোড না করে বাইট/উইন্ডো ধরে সার্চ করা হয় (এবং ক্যাশে রাখা হয় না)
+TEXT_STREAM_THRESHOLD_BYTES = int(os.environ.get("TEXT_STREAM_THRESHOLD_MB", "64")) * 1024 * 1024
+
+# 🌟 CSV স্ট্রিমিং 🌟
+# এর চেয়ে বড় CSV ফাইল পুরোটা DataFrame এ না পড়ে খণ্ডে খণ্ডে সার্চ করা হয় (এবং ক্যাশে রাখা হয় না)
+CSV_STREAM_THRESHOLD_BYTES = int(os.environ.get("CSV_STREAM_THRESHOLD_MB", "32")) * 1024 * 1024
+
+# স্ট্রিমিং এর সময় প্রতিটি খণ্ডে কতগুলো সারি পড়া হবে
+CSV_CHUNK_ROWS = int(os.environ.get("CSV_CHUNK_ROWS", "100000"))
+
+# ডিলিমিটার বের করতে ফাইলের শুরুর এতটুকু অংশ দেখা হয়
+CSV_SNIFF_BYTES = 64 * 1024
+
+# 🌟 রেজাল্টের সীমা 🌟
+# একটি রিকোয়েস্টে ডিফল্টভাবে সর্বোচ্চ কতগুলো ম্যাচ ফেরত দেওয়া হবে (বাকিগুলো cursor দিয়ে পরের পেজে)
+SEARCH_DEFAULT_LIMIT = int(os.environ.get("SEARCH_DEFAULT_LIMIT", "1000"))
+
+# ক্লায়েন্ট 'limit' এর চেয়ে বেশি চাইলেও এর বেশি দেওয়া হবে না
+SEARCH_MAX_LIMIT = int(os.environ.get("SEARCH_MAX_LIMIT", "10000"))
+
+
+# 🌟 ইনজেশন জব (/jobs) 🌟
+# একসাথে কতগুলো জব চলবে; প্রতিটি জব তার ফাইলগুলো সার্চ পুলে (প্রসেস/থ্রেড) এক্সট্র্যাক্ট করায়
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", "2"))
+
+# চলমান + অপেক্ষমাণ জবের সর্বোচ্চ সংখ্যা; এর বেশি হলে নতুন জব 503 পায় (পরে আবার চেষ্টা করতে হয়)
+INGEST_MAX_JOBS = int(os.environ.get("INGEST_MAX_JOBS", "16"))
+
+# একটি জবের ফাইলগুলো এতগুলো করে পুলে পাঠানো হয় (মেমরিতে একসাথে এর বেশি কপি থাকে না)
+INGEST_BATCH_FILES = int(os.environ.get("INGEST_BATCH_FILES", "32"))
+
+# 🌟 সার্ভার-সাইড ফোল্ডার স্ক্যান (/search_scan) 🌟
+# সার্ভার ও ডেটা একই মেশিন/শেয়ারে থাকলে ব্রাউজার থেকে আপলোড না করে সার্ভার নিজেই ফোল্ডার পড়ে।
+# শুধু এই রুটগুলোর (os.pathsep দিয়ে আলাদা করা অ্যাবসোলিউট পাথ) ভেতরের ফোল্ডার স্ক্যান করা যায়; খালি = বন্ধ
+SCAN_ROOTS = [
+    os.path.realpath(root) for root in os.environ.get("SCAN_ROOTS", "").split(os.pathsep) if os.path.isabs(root)
+]
+
+# একসাথে কতগুলো ডিরেক্টরি os.scandir দিয়ে পড়া হবে (নেটওয়ার্ক শেয়ারে বেশি থ্রেড সাহায্য করে)
+SCAN_WORKERS = int(os.environ.get("SCAN_WORKERS", "8"))
+
+# একটি সার্চে সর্বোচ্চ কতগুলো ফাইল; এর বেশি হলে ছোট ফোল্ডার বেছে নিতে বলা হয়
+SCAN_MAX_FILES = int(os.environ.get("SCAN_MAX_FILES", "200000"))
+
+# ক্লায়েন্টের মতোই এর চেয়ে বড় ফাইল বাদ; তবে বড় CSV/টেক্সট (স্ট্রিম করে সার্চ হয়) কখনো বাদ পড়ে না
+SCAN_MAX_FILE_BYTES = int(os.environ.get("SCAN_MAX_FILE_MB", "64")) * 1024 * 1024
+
+# এর চেয়ে বড় ফাইল read() না করে mmap দিয়ে পড়া হয়
+SCAN_MMAP_THRESHOLD_BYTES = int(os.environ.get("SCAN_MMAP_THRESHOLD_MB", "1")) * 1024 * 1024
+
+# ডিস্ক থেকে পড়া ফাইলগুলো এতগুলো করে সার্চ পুলে যায়, যাতে পুরো ট্রি একসাথে মেমরিতে না আসে
+SCAN_BATCH_FILES = int(os.environ.get("SCAN_BATCH_FILES", "256"))
+
+# 🌟 .zip আর্কাইভ 🌟
+# আর্কাইভের মেম্বারগুলো ডিস্কে না লিখে মেমরিতেই পড়ে সার্চ করা হয়; zip bomb ঠেকাতে একটি আর্কাইভে
+# (ভেতরের আর্কাইভসহ) সর্বোচ্চ এত বাইট আনকম্প্রেস করা হবে
+ARCHIVE_MAX_TOTAL_BYTES = int(os.environ.get("ARCHIVE_MAX_TOTAL_MB", "1024")) * 1024 * 1024
+
+# একটি আর্কাইভে (ভেতরের আর্কাইভসহ) সর্বোচ্চ এতগুলো মেম্বার সার্চ করা হবে
+ARCHIVE_MAX_MEMBERS = int(os.environ.get("ARCHIVE_MAX_MEMBERS", "10000"))
+
+# আর্কাইভের ভেতরে আর্কাইভ কত স্তর পর্যন্ত খোলা হবে (1 = শুধু বাইরের আর্কাইভ)
+ARCHIVE_MAX_DEPTH = int(os.environ.get("ARCHIVE_MAX_DEPTH", "2"))
+
+# 🌟 রিডার লোডিং 🌟
+# রিডারগুলো (fitz, pandas, openpyxl...) প্রথম ব্যবহারে লোড হয়, তাই ওয়ার্কার দ্রুত চালু হয়।
+# কমা দিয়ে রিডারের নাম (pdf, docx, doc, excel, csv, zip, text) বা "all" দিলে সার্ভার চালু হওয়ার পর
+# ব্যাকগ্রাউন্ডে সেগুলো আগেই লোড করা হয়, যাতে প্রথম রিকোয়েস্টকে অপেক্ষা করতে না হয়
+PRELOAD_READERS = [name.strip().lower() for name in os.environ.get("PRELOAD_READERS", "").split(",") if name.strip()]
+
+# 🌟 অন-ডিমান্ড প্রোফাইলিং 🌟
+# সেট করা থাকলে X-Profile হেডারে (বা ?profile=) এই টোকেন পাঠানো রিকোয়েস্ট cProfile দিয়ে প্রোফাইল করা হয়;
+# খালি থাকলে প্রোফাইলিং পুরোপুরি বন্ধ (রুটগুলো কোনো র‍্যাপার ছাড়াই চলে)
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+
+# প্রোফাইলগুলো এখানে রাখা হয় (/profiles থেকে ডাউনলোড করা যায়)
+PROFILE_DIR_PATH = TEMP_DIR_PATH / "profiles"
+
+# সর্বোচ্চ এতগুলো প্রোফাইল রাখা হয়; নতুনটি এলে সবচেয়ে পুরনোটি মুছে যায়
+PROFILE_MAX_COUNT = int(os.environ.get("PROFILE_MAX_COUNT", "50"))
+
+# প্রোফাইল রিপোর্টে সবচেয়ে ধীর এতগুলো ফাইল দেখানো হয়
+PROFILE_SLOWEST_FILES = 10
+
+
+# 🌟 ফাইল স্টোরেজ বাজেট 🌟
+# মেমরিতে সর্বোচ্চ কত বাইট রাখা হবে; এর বেশি হলে পুরনো (LRU) ফাইলগুলো ডিস্কে সরানো হয়
+FILE_STORAGE_MEMORY_BYTES = int(os.environ.get("FILE_STORAGE_MEMORY_MB", "256")) * 1024 * 1024
+
+# এর চেয়ে বড় ফাইল সরাসরি ডিস্কে রাখা হয় এবং mmap দিয়ে পড়া হয়
+FILE_STORAGE_SPILL_BYTES = int(os.environ.get("FILE_STORAGE_SPILL_MB", "16")) * 1024 * 1024
+
+# মেমরি + ডিস্ক মিলিয়ে সর্বোচ্চ সাইজ; এর বেশি হলে LRU ফাইল বাদ দেওয়া হয়
+FILE_STORAGE_TOTAL_BYTES = int(os.environ.get("FILE_STORAGE_TOTAL_MB", "4096")) * 1024 * 1024
+
+# ব্যাকগ্রাউন্ড sweeper কত সেকেন্ড পর পর মেয়াদোত্তীর্ণ ফাইল মুছবে
+FILE_STORAGE_SWEEP_SECONDS = 60
+
+# 🌟 আপলোড করা ফাইলের স্টোরেজ (file_id -> ডেটা এবং মেটাডেটা) 🌟
+# ডিকশনারির মতোই ব্যবহার করা যায় (get, [], in), কিন্তু মেমরি বাজেট ও TTL মেনে চলে।
+FILE_STORAGE_DICT = BoundedFileStorage(
+    "file-storage",
+    memory_budget=FILE_STORAGE_MEMORY_BYTES,
+    spill_threshold=FILE_STORAGE_SPILL_BYTES,
+    total_budget=FILE_STORAGE_TOTAL_BYTES,
+    ttl_seconds=FILE_CLEANUP_HOURS * 3600,
+    spill_dir=TEMP_DIR_PATH / f"file-storage-{os.getpid()}",
+)
+
+# 🌟 লক তৈরি করা হলো থ্রেড-সেফটির জন্য (একাধিক রিকোয়েস্ট একই সময়ে অ্যাক্সেস করতে পারে) 🌟
+FILE_STORAGE_LOCK = threading.Lock()
+
+# 🌟 কন্টেন্ট-অ্যাড্রেসড স্টোরেজ (SHA-256 হ্যাশ -> ফাইলের বাইট) 🌟
+# হ্যাশ-ম্যানিফেস্ট সার্চে ক্লায়েন্ট শুধু সেই ফাইলগুলো আপলোড করে যেগুলো সার্ভারে নেই।
+CONTENT_STORE_DICT = BoundedFileStorage(
+    "content-store",
+    memory_budget=FILE_STORAGE_MEMORY_BYTES,
+    spill_threshold=FILE_STORAGE_SPILL_BYTES,
+    total_budget=FILE_STORAGE_TOTAL_BYTES,
+    ttl_seconds=FILE_CLEANUP_HOURS * 3600,
+    spill_dir=TEMP_DIR_PATH / f"content-store-{os.getpid()}",
+)
+CONTENT_STORE_LOCK = threading.Lock()
@@ -0,0 +1,77 @@
+# routes/file_response.py
+
+import io
+
+from flask import request, send_file
+
+from services.extraction_cache import content_hash
+
+
+class MemoryViewReader(io.RawIOBase):
+    """
+    Seekable, read-only file object over a memoryview of stored bytes or an mmap.
+    Reads copy one chunk at a time into the caller's buffer; the blob itself is never copied.
+    """
+
+    def __init__(self, data):
+        super().__init__()
+        self._view = memoryview(data)
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        end = min(self._position + len(buffer), len(self._view))
+        count = end - self._position
+        if count <= 0:
+            return 0
+        buffer[:count] = self._view[self._position:end]
+        self._position = end
+        return count
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = len(self._view) + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        self._position = max(0, position)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+def send_stored_file(file_info, mimetype, as_attachment, download_name):
+    """
+    Streams a FILE_STORAGE_DICT entry in chunks without copying the whole blob.
+
+    The ETag is the content hash, so a repeat request with If-None-Match gets a 304, and
+    Range/If-Range requests get 206 partial responses (e.g. the browser PDF viewer fetching pages lazily).
+    """
+    data = file_info['data']
+    size = len(data)
+    etag = file_info.get('hash') or content_hash(data)
+
+    response = send_file(
+        MemoryViewReader(data),
+        mimetype=mimetype,
+        as_attachment=as_attachment,
+        download_name=download_name,
+        conditional=False,
+        etag=etag,
+    )
+    response.content_length = size
+    return response.make_conditional(request.environ, accept_ranges=True, complete_length=size)
@@ -1,15 +1,16 @@
 # routes/open_routes.py (চূড়ান্ত আপডেট)
 
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify
 import logging
 import secrets 
-import io 
 import os
 
 # 🚀 globals থেকে কেন্দ্রীয় FILE_STORAGE_DICT এবং Lock ইম্পোর্ট করা হলো
 from globals import FILE_STORAGE_DICT, FILE_STORAGE_LOCK
 # 🚀 file_reader থেকে নতুন ফাংশন Import করা হলো
 from services.file_reader import get_original_folder_path, open_folder_in_os 
+from services.extraction_cache import content_hash
+from routes.file_response import send_stored_file
 
 open_bp = Blueprint("open", __name__)
 logger = logging.getLogger("open_routes")
@@ -27,11 +28,9 @@ def open_browser():
     if not file_info:
         return jsonify({"status": "error", "message": "File not found or has expired."}), 404
 
-    # We use io.BytesIO to treat the byte data as a file
-    file_stream = io.BytesIO(file_info['data'])
-    
-    return send_file(
-        file_stream,
+    # 🚀 পুরো ফাইল কপি না করে chunk আকারে পাঠানো হয় (Range/ETag সাপোর্টসহ)
+    return send_stored_file(
+        file_info,
         mimetype='application/pdf',
         as_attachment=False,
         download_name=file_info['filename']
@@ -55,7 +54,8 @@ def store_file_temp():
             # ⚠️ এখন কেন্দ্রীয় FILE_STORAGE_DICT ব্যবহার করা হলো
             FILE_STORAGE_DICT[file_id] = { 
                 'data': file_content_bytes,
-                'filename': uploaded_file.filename
+                'filename': uploaded_file.filename,
+                'hash': content_hash(file_content_bytes)
                 # 'original_path' এখানে প্রয়োজন নেই (যদিও view_routes এ যোগ করা হয়েছে)
             }
         
@@ -0,0 +1,188 @@
+# routes/request_profiler.py
+
+import cProfile
+import functools
+import hmac
+import io
+import json
+import logging
+import pstats
+import re
+import threading
+import time
+import uuid
+
+from flask import Blueprint, request, g, jsonify, make_response, send_from_directory, url_for
+from globals import (
+    PROFILE_TOKEN, PROFILE_DIR_PATH, PROFILE_MAX_COUNT, PROFILE_SLOWEST_FILES, FILE_STORAGE_DICT, FILE_STORAGE_LOCK
+)
+
+profile_bp = Blueprint('profile', __name__)
+logger = logging.getLogger("request_profiler")
+
+PROFILE_HEADER = "X-Profile"
+
+# টেক্সট রিপোর্টে cumulative সময় অনুযায়ী এতগুলো ফাংশন
+REPORT_FUNCTIONS = 40
+
+PROFILE_KINDS = {"prof": "application/octet-stream", "txt": "text/plain", "json": "application/json"}
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+# cProfile একসাথে একটিই চলতে পারে; ব্যস্ত থাকলে রিকোয়েস্টটি প্রোফাইল ছাড়াই চলে
+_profile_lock = threading.Lock()
+
+
+def _authorized(value):
+    if not PROFILE_TOKEN or not value:
+        return False
+    return hmac.compare_digest(value.encode("utf-8"), PROFILE_TOKEN.encode("utf-8"))
+
+
+def _profile_requested():
+    return _authorized(request.headers.get(PROFILE_HEADER) or request.args.get("profile"))
+
+
+def _viewed_file(kwargs, duration):
+    """For viewer routes (no RequestTimer) the only file touched is the one in the URL."""
+    file_id = kwargs.get("file_id")
+    if file_id is None:
+        return []
+    with FILE_STORAGE_LOCK:
+        file_info = FILE_STORAGE_DICT.get(file_id)
+    path = file_info['filename'] if file_info else file_id
+    return [{"path": path, "total_ms": round(duration * 1000, 2)}]
+
+
+def _prune_profiles():
+    reports = sorted(PROFILE_DIR_PATH.glob("*.json"), key=lambda path: path.stat().st_mtime, reverse=True)
+    for report in reports[PROFILE_MAX_COUNT:]:
+        for kind in PROFILE_KINDS:
+            report.with_suffix(f".{kind}").unlink(missing_ok=True)
+
+
+def _save_profile(profile_id, profiler, report):
+    PROFILE_DIR_PATH.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(PROFILE_DIR_PATH / f"{profile_id}.prof")
+
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(REPORT_FUNCTIONS)
+    (PROFILE_DIR_PATH / f"{profile_id}.txt").write_text(text.getvalue(), encoding="utf-8")
+    # .json সবার শেষে, কারণ তালিকা ও prune .json দেখেই প্রোফাইল চেনে
+    (PROFILE_DIR_PATH / f"{profile_id}.json").write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    _prune_profiles()
+
+
+def _profiled_stream(body, profiler, finish):
+    """Keeps profiling a streamed response while its chunks are produced."""
+    iterator = iter(body)
+    try:
+        while True:
+            profiler.enable()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                profiler.disable()
+            yield chunk
+    finally:
+        if hasattr(body, "close"):
+            body.close()
+        finish()
+
+
+def profiled(view):
+    """
+    Profiles a request with cProfile when it carries PROFILE_TOKEN in the X-Profile header
+    (or ?profile=). The profile (.prof for pstats/snakeviz, a .txt summary and a .json report
+    with the slowest files) is stored under PROFILE_DIR_PATH and the response gets
+    X-Profile-Id / X-Profile-Url headers. Streamed responses are profiled until the last chunk.
+
+    Only this thread is profiled: files searched in worker processes show up as waiting.
+    Without PROFILE_TOKEN the view is returned unchanged.
+    """
+    if not PROFILE_TOKEN:
+        return view
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not _profile_requested() or not _profile_lock.acquire(blocking=False):
+            return view(*args, **kwargs)
+
+        profile_id = uuid.uuid4().hex
+        profiler = cProfile.Profile()
+        started_at = time.time()
+        started = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                response = make_response(view(*args, **kwargs))
+            finally:
+                profiler.disable()
+        except BaseException:
+            _profile_lock.release()
+            raise
+
+        report = {
+            "id": profile_id,
+            "endpoint": request.endpoint,
+            "method": request.method,
+            "path": request.path,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started_at)),
+            "status": response.status_code,
+        }
+        # স্ট্রিমিং এ রেসপন্স পাঠানোর সময় request context থাকে না, তাই যা লাগবে এখনই নেওয়া হলো
+        timer = g.get("request_timer")
+
+        def finish():
+            try:
+                duration = time.perf_counter() - started
+                report["duration_ms"] = round(duration * 1000, 2)
+                report["slowest_files"] = (
+                    timer.slowest_files(PROFILE_SLOWEST_FILES) if timer is not None else _viewed_file(kwargs, duration)
+                )
+                _save_profile(profile_id, profiler, report)
+                slowest = ", ".join(f"{f['path']} ({f['total_ms']} ms)" for f in report["slowest_files"][:3])
+                logger.info(f"Profiled {report['path']} in {report['duration_ms']} ms as {profile_id}; slowest: {slowest}")
+            except Exception:
+                logger.exception(f"Could not save profile {profile_id}")
+            finally:
+                _profile_lock.release()
+
+        response.headers["X-Profile-Id"] = profile_id
+        response.headers["X-Profile-Url"] = url_for("profile.get_profile", profile_id=profile_id, kind="json")
+        if response.is_streamed:
+            response.response = _profiled_stream(response.response, profiler, finish)
+        else:
+            finish()
+        return response
+
+    return wrapper
+
+
+# ------------------ প্রোফাইল ডাউনলোড ------------------
+def _admin_request():
+    return _authorized(request.headers.get(PROFILE_HEADER) or request.args.get("token"))
+
+
+@profile_bp.route("/profiles")
+def list_profiles():
+    if not _admin_request():
+        return jsonify({"status": "error", "message": "Not found."}), 404
+    reports = []
+    for path in sorted(PROFILE_DIR_PATH.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True):
+        try:
+            report = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        reports.append({key: report.get(key) for key in ("id", "endpoint", "path", "started", "duration_ms", "status")})
+    return jsonify({"status": "ok", "profiles": reports})
+
+
+@profile_bp.route("/profiles/<profile_id>.<kind>")
+def get_profile(profile_id, kind):
+    if not _admin_request() or not _PROFILE_ID.match(profile_id) or kind not in PROFILE_KINDS:
+        return jsonify({"status": "error", "message": "Not found."}), 404
+    return send_from_directory(
+        PROFILE_DIR_PATH, f"{profile_id}.{kind}", mimetype=PROFILE_KINDS[kind], as_attachment=(kind == "prof")
+    )
@@ -0,0 +1,186 @@
+# routes/search_pagination.py
+
+import base64
+import binascii
+import hashlib
+import json
+
+from globals import SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def _positive_int(value, name):
+    if value is None or value == "":
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise PaginationError(f"'{name}' must be a positive integer.")
+    if number < 1:
+        raise PaginationError(f"'{name}' must be a positive integer.")
+    return number
+
+
+def _query_text(query):
+    # ফাজি দূরত্ব বা সিনট্যাক্স বদলালেও এটি আলাদা সার্চ
+    text = f"{query.text}\0~{query.max_distance}" if query.max_distance else query.text
+    return text if query.syntax == "literal" else f"{text}\0{query.syntax}"
+
+
+def _fingerprint(query, total=None):
+    # কুয়েরি বা ফাইলের সংখ্যা বদলালে পুরনো cursor আর ব্যবহার করা যাবে না
+    text = f"{query.scope}\0{_query_text(query)}"
+    if total is not None:
+        text = f"{text}\0{total}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(query, total, start, skips):
+    payload = {
+        "v": _fingerprint(query, total), "q": _fingerprint(query),
+        "f": start, "s": {str(k): v for k, v in skips.items()},
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, query, total=None):
+    """
+    Returns (start_position, {position: matches_already_sent or -1}) or raises PaginationError.
+    Without `total` only the query is checked (before the files to search are known).
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        start = int(payload["f"])
+        skips = {int(k): int(v) for k, v in payload["s"].items()}
+    except (binascii.Error, ValueError, KeyError, TypeError, AttributeError):
+        raise PaginationError("Invalid cursor.")
+    if payload.get("q") != _fingerprint(query) or (total is not None and payload.get("v") != _fingerprint(query, total)):
+        raise PaginationError("Cursor does not belong to this search.")
+    return start, skips
+
+
+def _cursor_param(params):
+    cursor = params.get("cursor") or None
+    if cursor is not None and not isinstance(cursor, str):
+        raise PaginationError("Invalid cursor.")
+    return cursor
+
+
+class ResultPager:
+    """
+    Applies `limit` (matches per response), `per_file_limit` and a resume cursor to per-file results.
+
+    Files are identified by their position in the request (upload or manifest order). The cursor
+    records the first position not fully sent and, for later positions, how many matches were
+    already sent (-1 = the whole file), so a resumed search skips finished files and continues a
+    partially sent one. `per_file_limit` is a cap, not a page size: the rest of such a file is
+    never sent, the file is only reported as truncated.
+    """
+
+    def __init__(self, query, total, limit=None, per_file_limit=None, cursor=None):
+        self.query = query
+        self.total = total
+        self.limit = min(limit or SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT)
+        self.per_file_limit = per_file_limit
+        self.start, self.skips = decode_cursor(cursor, query, total) if cursor else (0, {})
+        self.remaining = self.limit
+        self.truncated = False   # কোনো সীমা (গ্লোবাল বা ফাইল-প্রতি) পূর্ণ হয়েছে
+        self.exhausted = False   # গ্লোবাল সীমা পূর্ণ এবং আরও ম্যাচ বাকি আছে
+        self._sent = dict(self.skips)
+        self._caps = {}
+
+    @staticmethod
+    def validate_params(query, params):
+        """
+        Checks 'limit', 'per_file_limit' and 'cursor' before the files are known (e.g. before a
+        folder walk), so bad parameters fail fast; from_params still checks the file count.
+        """
+        _positive_int(params.get("limit"), "limit")
+        _positive_int(params.get("per_file_limit"), "per_file_limit")
+        cursor = _cursor_param(params)
+        if cursor is not None:
+            decode_cursor(cursor, query)
+
+    @classmethod
+    def from_params(cls, query, total, params):
+        """Builds a pager from request parameters ('limit', 'per_file_limit', 'cursor')."""
+        cursor = _cursor_param(params)
+        return cls(
+            query, total,
+            limit=_positive_int(params.get("limit"), "limit"),
+            per_file_limit=_positive_int(params.get("per_file_limit"), "per_file_limit"),
+            cursor=cursor,
+        )
+
+    def prepare(self, items):
+        """
+        Returns the items (each with a 'position') that still need searching, with 'max_matches'
+        set so the readers stop as soon as this page can't use more matches.
+        """
+        pending = []
+        for item in items:
+            position = item['position']
+            skip = self.skips.get(position, 0)
+            if position < self.start or skip == -1:
+                continue
+            cap = skip + self.limit
+            if self.per_file_limit is not None:
+                cap = min(cap, self.per_file_limit)
+            if skip >= cap:
+                self._sent[position] = -1
+                continue
+            self._caps[position] = cap
+            pending.append(dict(item, max_matches=cap))
+        return pending
+
+    def take(self, position, result):
+        """
+        Takes one file's successful search result. Returns (matches_to_send, file_truncated).
+        After the limit is reached nothing more is sent, but the cursor still records the file.
+        """
+        skip = self.skips.get(position, 0)
+        matches = result['matches'][skip:]
+        reader_truncated = bool(result.get('truncated'))
+        capped = reader_truncated and self.per_file_limit is not None and self._caps.get(position) == self.per_file_limit
+
+        if self.remaining == 0:
+            if matches:
+                self.exhausted = self.truncated = True
+            elif not reader_truncated:
+                self._sent[position] = -1
+            return [], False
+
+        if len(matches) > self.remaining or (reader_truncated and not capped and len(matches) == self.remaining):
+            sent = matches[:self.remaining]
+            self._sent[position] = skip + len(sent)
+            self.remaining = 0
+            self.exhausted = self.truncated = True
+            return sent, False
+
+        self.remaining -= len(matches)
+        self._sent[position] = -1
+        if capped:
+            self.truncated = True
+        return matches, capped
+
+    def skip(self, position):
+        """Marks a file that won't produce matches (failed or missing) as done."""
+        self._sent[position] = -1
+
+    def next_cursor(self):
+        """Cursor for the next page, or None if everything was sent."""
+        if not self.exhausted:
+            return None
+        start = self.start
+        while start < self.total and self._sent.get(start) == -1:
+            start += 1
+        skips = {p: v for p, v in self._sent.items() if p > start or (p == start and v != -1)}
+        return encode_cursor(self.query, self.total, start, skips)
+
+    def summary(self):
+        return {"truncated": self.truncated, "next_cursor": self.next_cursor(), "limit": self.limit}
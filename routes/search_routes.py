@@ -2,58 +2,693 @@
 
 import os
 import json
-from flask import Blueprint, request, jsonify
-from services.file_reader import search_file_content
+import time
+import uuid
+from flask import Blueprint, request, jsonify, Response, stream_with_context, g, url_for
+from globals import CONTENT_STORE_DICT, CONTENT_STORE_LOCK, FILE_STORAGE_DICT, FILE_STORAGE_LOCK, SCAN_ROOTS
+from services.file_reader import index_content, read_upload
+from services.search_executor import iter_search, rank_matches
+from services.extraction_cache import content_hash_stream
+from services.trigram_index import CORPUS_INDEX
+from services.query_parser import parse_query, QuerySyntaxError
+from services.metrics import RequestTimer
+from services.ingest_jobs import INGEST_JOBS, JobQueueFull
+from services.directory_scan import ScanError, resolve_scan_root, scan_directory, stat_key
+from routes.request_profiler import profiled
+from routes.search_pagination import ResultPager, PaginationError
 import logging
 
 search_bp = Blueprint('search', __name__)
 logger = logging.getLogger("search_routes")
 
+# ইনডেক্সে কন্টেন্ট স্টোরের ডকুমেন্টগুলোর মালিক; ইনজেশন জবগুলো নিজের job id দিয়ে মালিক হয়
+CONTENT_STORE_OWNER = "content_store"
+
+# স্টোর থেকে কন্টেন্ট বাদ পড়লে (LRU/TTL) ইনডেক্সে স্টোরের মালিকানা ছেড়ে দেওয়া হয়;
+# অন্য কোনো জবও একই ডকুমেন্ট ব্যবহার করলে সেটি ইনডেক্সে থেকে যায়
+CONTENT_STORE_DICT.add_eviction_listener(
+    lambda file_hash: CORPUS_INDEX.release_hash(file_hash, CONTENT_STORE_OWNER)
+)
+
 UPLOAD_FOLDER = 'temp_uploads'
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 
+
+def _run_search(items, query, pager, timer):
+    """
+    Searches every item (in parallel, see iter_search) and merges the results in input order,
+    stopping the search as soon as `pager`'s limit is reached.
+    """
+    all_matches = []
+    pending = pager.prepare(items)
+    completed = {}
+    next_index = 0
+
+    search = iter_search(pending, query, UPLOAD_FOLDER, timer)
+    try:
+        for index, outcome in search:
+            completed[index] = outcome
+            # ফাইলগুলো যে ক্রমেই শেষ হোক, রেজাল্ট ইনপুটের ক্রমে নেওয়া হয় (cursor এর জন্য জরুরি)
+            while next_index in completed and not pager.exhausted:
+                item = pending[next_index]
+                result, status_code = completed.pop(next_index)
+                next_index += 1
+                if status_code == 200:
+                    matches, _ = pager.take(item['position'], result)
+                    all_matches.extend(matches)
+                else:
+                    # If a file fails to process, log it but continue with other files
+                    logger.error(f"Failed to process file {item['file_name']}: {result['message']}")
+                    pager.skip(item['position'])
+            if pager.exhausted:
+                break
+    finally:
+        search.close()
+
+    if query.max_distance:
+        # ফাজি সার্চে পুরো পেজের রেজাল্ট দূরত্ব অনুযায়ী (সমান হলে ফাইলের ক্রমে)
+        rank_matches(all_matches)
+    timer.lap("search")
+    return all_matches, len(all_matches)
+
+
+def _start_timer(route):
+    # প্রোফাইলার (routes/request_profiler.py) এখান থেকে সবচেয়ে ধীর ফাইলগুলো নেয়
+    g.request_timer = RequestTimer(route)
+    return g.request_timer
+
+
+def _timed_response(response, timer):
+    """jsonify()s a search response with its "timings"; serialization time goes in the Server-Timing header."""
+    response["timings"] = timer.summary()
+    body = jsonify(response)
+    timer.lap("serialize")
+    body.headers['Server-Timing'] = timer.server_timing()
+    timer.finish()
+    return body, 200
+
+
+STREAM_MIMETYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+def _stream_search(items, query, pager, stream_format, timer, extra_done=None):
+    """
+    Streams each file's matches as soon as that file is processed.
+    Events are {"type": "file", ...} per file and a final {"type": "done", ...};
+    `stream_format` is "ndjson" (one JSON object per line) or "sse" (Server-Sent Events).
+    The search stops once `pager`'s limit is reached; "done" then carries "next_cursor"
+    and the request's "timings".
+    """
+    def encode(event):
+        line = json.dumps(event, ensure_ascii=False)
+        if stream_format == "sse":
+            return f"event: {event['type']}\ndata: {line}\n\n"
+        return line + "\n"
+
+    def generate():
+        pending = pager.prepare(items)
+        total = len(pending)
+        processed = 0
+        total_count = 0
+        search = iter_search(pending, query, UPLOAD_FOLDER, timer)
+        try:
+            for index, (result, status_code) in search:
+                processed += 1
+                item = pending[index]
+                event = {
+                    "type": "file",
+                    "index": item['position'],
+                    "file": item['file_name'],
+                    "path": item['file_path'],
+                    "processed": processed,
+                    "total": total,
+                }
+                if status_code == 200:
+                    matches, file_truncated = pager.take(item['position'], result)
+                    total_count += len(matches)
+                    event.update(status="ok", matches=matches, count=len(matches), truncated=file_truncated)
+                else:
+                    logger.error(f"Failed to process file {item['file_name']}: {result['message']}")
+                    pager.skip(item['position'])
+                    event.update(status="error", message=result['message'], matches=[], count=0)
+                event["total_count"] = total_count
+                yield encode(event)
+                if pager.exhausted:
+                    break
+        except Exception:
+            logger.exception("An error occurred during streaming search.")
+            yield encode({"type": "error", "message": "An internal server error occurred."})
+            return
+        finally:
+            search.close()
+
+        done = {
+            "type": "done", "status": "ok", "count": total_count, "processed": processed, "total": total,
+            "terms": list(query.terms),
+        }
+        done.update(pager.summary())
+        done.update(extra_done or {})
+        # স্ট্রিমিং এ "search" = প্রথম থেকে শেষ ফাইল পর্যন্ত (ক্লায়েন্টের পড়ার গতিও এতে আছে)
+        timer.lap("search")
+        done["timings"] = timer.summary()
+        timer.finish()
+        yield encode(done)
+
+    response = Response(stream_with_context(generate()), mimetype=STREAM_MIMETYPES[stream_format])
+    # প্রক্সি যেন রেসপন্স বাফার না করে (যেমন nginx)
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _stream_format(value):
+    value = (value or "").strip().lower()
+    if value in ("1", "true"):
+        return "ndjson"
+    return value if value in STREAM_MIMETYPES else None
+
+
+def _parse_manifest(payload):
+    """
+    Validates a manifest of [{"name", "path", "size", "hash"}, ...] entries.
+    Returns (entries, error_message).
+    """
+    entries = payload.get("files") if isinstance(payload, dict) else None
+    if not isinstance(entries, list) or not entries:
+        return None, "Missing 'files' manifest."
+
+    for entry in entries:
+        if not isinstance(entry, dict) or not entry.get("name") or not isinstance(entry.get("hash"), str):
+            return None, "Each manifest entry needs 'name' and 'hash'."
+        entry["hash"] = entry["hash"].lower()
+        entry.setdefault("path", entry["name"])
+    return entries, None
+
+
+def _apply_candidates(items, query):
+    """
+    Narrows indexed items to the units CORPUS_INDEX says may match (posting-list intersection).
+    Boolean queries only need a unit with at least one non-negated term (fuzzy queries one
+    of the pieces every approximate match contains, see Query.prefilter_terms).
+    """
+    if query.is_simple:
+        candidates = CORPUS_INDEX.candidates(query.simple_text)
+    else:
+        candidates = CORPUS_INDEX.candidates_any(query.prefilter_terms())
+    if candidates is None:
+        return
+
+    for item in items:
+        # ইনডেক্সে নেই (কখনো হয়নি বা এর মধ্যে সরানো হয়েছে) এমন ফাইল পুরোটা সার্চ হয়
+        if item['doc_id'] is None or item['doc_id'] not in CORPUS_INDEX:
+            item['candidate_units'] = None
+            continue
+        units = candidates.get(item['doc_id'], set())
+        # "file" স্কোপে negated টার্ম অন্য পেজে থাকতে পারে, তাই candidate ফাইলের সব পেজ দেখা হয়
+        if units and query.scope == "file" and not query.is_simple:
+            units = None
+        item['candidate_units'] = units
+
+
+def _index_stored(data, file_name, file_hash, extract=True):
+    """index_content for a file in CONTENT_STORE_DICT; released again if it was evicted meanwhile."""
+    doc_id = index_content(data, file_name, UPLOAD_FOLDER, file_hash, CONTENT_STORE_OWNER, extract)
+    with CONTENT_STORE_LOCK:
+        evicted = file_hash not in CONTENT_STORE_DICT
+    if evicted:
+        CORPUS_INDEX.release_hash(file_hash, CONTENT_STORE_OWNER)
+    return doc_id
+
+
+def _index_searched(item):
+    """'on_extracted' hook (see iter_search): indexes a stored file once its search has extracted it."""
+    _index_stored(item['data'], item['file_name'], item['hash'])
+
+
+def _missing_hashes(hashes):
+    with CONTENT_STORE_LOCK:
+        return sorted({h for h in hashes if h not in CONTENT_STORE_DICT})
+
+
 @search_bp.route("/search_upload", methods=["POST"])
+@profiled
 def search_upload():
+    timer = _start_timer("search_upload")
     try:
-        query = request.form.get("q", "").strip()
-        if not query:
+        query_text = request.form.get("q", "").strip()
+        if not query_text:
             return jsonify({"status": "error", "message": "Missing 'q' parameter."}), 400
-
         uploaded_files = request.files.getlist("files")
         if not uploaded_files:
             return jsonify({"status": "error", "message": "No files uploaded."}), 400
 
+        try:
+            query = parse_query(query_text, request.form.get("scope"), request.form.get("fuzzy"),
+                                request.form.get("syntax"))
+            pager = ResultPager.from_params(query, len(uploaded_files), request.form)
+        except (QuerySyntaxError, PaginationError) as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+
         file_paths_json = request.form.get("paths", "{}")
         file_paths = json.loads(file_paths_json)
-        
-        all_matches = []
-        total_count = 0
-        
-        for file in uploaded_files:
+
+        items = []
+        for position, file in enumerate(uploaded_files):
             file_name = file.filename
             file_path = file_paths.get(file_name, file_name)
-            
+
             # Reset file pointer to the beginning before processing
             file.seek(0)
-            
-            item = {
+
+            # 🚀 আপলোড স্ট্রিমটাই দেওয়া হলো: সার্চের সময় বড় ফাইল mmap হয়, ছোটগুলো ব্যাচ ধরে পড়া হয় (read_upload)
+            items.append({
                 'file_obj': file,
                 'file_name': file_name,
                 'file_path': file_path,
-            }
-            
-            result, status_code = search_file_content(item, query, UPLOAD_FOLDER)
-            
-            if status_code == 200:
-                all_matches.extend(result['matches'])
-                total_count += result['count']
-            else:
-                # If a file fails to process, log it but continue with other files
-                logger.error(f"Failed to process file {file_name}: {result['message']}")
-        
-        return jsonify({"status": "ok", "matches": all_matches, "count": total_count}), 200
+                'position': position,
+            })
+
+        timer.lap("parse")
+
+        stream_format = _stream_format(request.form.get("stream"))
+        if stream_format:
+            # স্ট্রিমিং রেসপন্সের সময় আপলোড স্ট্রিম বন্ধ হয়ে যায়, তাই এখনই নেওয়া হলো (mmap বন্ধ হওয়ার পরেও বৈধ থাকে)
+            for item in items:
+                item['data'] = read_upload(item.pop('file_obj'), item['file_name'])
+            return _stream_search(items, query, pager, stream_format, timer)
+
+        all_matches, total_count = _run_search(items, query, pager, timer)
+
+        response = {"status": "ok", "matches": all_matches, "count": total_count, "terms": list(query.terms)}
+        response.update(pager.summary())
+        return _timed_response(response, timer)
 
     except Exception as e:
         logger.exception("An error occurred during file upload search.")
-        return jsonify({"status": "error", "message": "An internal server error occurred."}), 500
\ No newline at end of file
+        return jsonify({"status": "error", "message": "An internal server error occurred."}), 500
+
+
+# ------------------ 🚀 Hash-Manifest Protocol ------------------
+# ১) ক্লায়েন্ট /search_manifest এ (path, size, hash) তালিকা পাঠায়, সার্ভার যে হ্যাশগুলো নেই তা ফেরত দেয়
+# ২) ক্লায়েন্ট শুধু অনুপস্থিত ফাইলগুলো /upload_content এ পাঠায়
+# ৩) /search_hashes সার্ভারে রাখা কন্টেন্টের উপর হ্যাশ দিয়ে সার্চ চালায়
+
+@search_bp.route("/search_manifest", methods=["POST"])
+def search_manifest():
+    payload = request.get_json(silent=True)
+    entries, error = _parse_manifest(payload)
+    if error:
+        return jsonify({"status": "error", "message": error}), 400
+
+    missing = _missing_hashes(entry["hash"] for entry in entries)
+    return jsonify({"status": "ok", "missing": missing}), 200
+
+
+@search_bp.route("/upload_content", methods=["POST"])
+def upload_content():
+    """
+    Stores uploaded files by content hash. Each part's filename must be the SHA-256 of its bytes,
+    optionally followed by the file extension (e.g. "<hash>.pdf") so the content can be indexed right away.
+    """
+    uploaded_files = request.files.getlist("files")
+    if not uploaded_files:
+        return jsonify({"status": "error", "message": "No files uploaded."}), 400
+
+    stored = []
+    rejected = []
+    for file in uploaded_files:
+        claimed_hash, extension = os.path.splitext((file.filename or "").lower())
+        # হ্যাশ টুকরো টুকরো পড়ে করা হয়; প্রত্যাখ্যাত ফাইল কখনো পুরোটা মেমরিতে আসে না
+        actual_hash = content_hash_stream(file)
+
+        # ক্লায়েন্টের পাঠানো হ্যাশ বিশ্বাস না করে যাচাই করা হলো
+        if actual_hash != claimed_hash:
+            logger.warning(f"Rejected content upload: claimed {claimed_hash}, actual {actual_hash}")
+            rejected.append(claimed_hash)
+            continue
+
+        file_content_bytes = read_upload(file, f"content{extension}")
+        with CONTENT_STORE_LOCK:
+            CONTENT_STORE_DICT[actual_hash] = {
+                'data': file_content_bytes,
+                'size': len(file_content_bytes),
+                'timestamp': time.time(),
+            }
+        stored.append(actual_hash)
+
+        # 🚀 ইনজেশনের সময়েই ট্রাইগ্রাম ইনডেক্স তৈরি, যাতে পরের প্রতিটি কুয়েরি শুধু candidate ফাইল দেখে
+        if extension:
+            _index_stored(file_content_bytes, f"content{extension}", actual_hash)
+
+    return jsonify({"status": "ok", "stored": stored, "rejected": rejected}), 200
+
+
+@search_bp.route("/search_hashes", methods=["POST"])
+def search_hashes():
+    timer = _start_timer("search_hashes")
+    try:
+        payload = request.get_json(silent=True) or {}
+        query_text = str(payload.get("q", "")).strip()
+        if not query_text:
+            return jsonify({"status": "error", "message": "Missing 'q' parameter."}), 400
+        entries, error = _parse_manifest(payload)
+        if error:
+            return jsonify({"status": "error", "message": error}), 400
+
+        try:
+            query = parse_query(query_text, str(payload.get("scope") or "line"), payload.get("fuzzy"),
+                                str(payload.get("syntax") or "literal"))
+            pager = ResultPager.from_params(query, len(entries), payload)
+        except (QuerySyntaxError, PaginationError) as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+
+        items = []
+        missing = set()
+        with CONTENT_STORE_LOCK:
+            for position, entry in enumerate(entries):
+                stored = CONTENT_STORE_DICT.get(entry["hash"])
+                if stored is None:
+                    missing.add(entry["hash"])
+                    pager.skip(position)
+                    continue
+                items.append({
+                    'data': stored['data'],
+                    'hash': entry["hash"],
+                    'file_name': entry["name"],
+                    'file_path': entry["path"],
+                    'position': position,
+                })
+
+        timer.lap("parse")
+
+        # আগে ইনডেক্স না হওয়া কন্টেন্ট (যেমন এক্সটেনশন ছাড়া আপলোড) পুরোটা সার্চ হয়; সার্চ ওয়ার্কার
+        # এক্সট্র্যাক্ট করার পরেই সেটি ইনডেক্স করে, তাই এখানে একটার পর একটা এক্সট্র্যাকশন হয় না
+        for item in items:
+            item['doc_id'] = _index_stored(item['data'], item['file_name'], item['hash'], extract=False)
+            if item['doc_id'] is None:
+                item['on_extracted'] = _index_searched
+
+        # Posting-list intersection দিয়ে candidate ফাইল/পেজ বের করা, শুধু সেগুলোতে সার্চ চালানো হবে
+        _apply_candidates(items, query)
+        timer.lap("index")
+
+        stream_format = _stream_format(str(payload.get("stream", "")))
+        if stream_format:
+            return _stream_search(items, query, pager, stream_format, timer, {"missing": sorted(missing)})
+
+        all_matches, total_count = _run_search(items, query, pager, timer)
+
+        # কন্টেন্ট ইতিমধ্যে মুছে গেলে ক্লায়েন্ট "missing" দেখে আবার আপলোড করতে পারবে
+        response = {
+            "status": "ok",
+            "matches": all_matches,
+            "count": total_count,
+            "terms": list(query.terms),
+            "missing": sorted(missing),
+        }
+        response.update(pager.summary())
+        return _timed_response(response, timer)
+
+    except Exception as e:
+        logger.exception("An error occurred during hash search.")
+        return jsonify({"status": "error", "message": "An internal server error occurred."}), 500
+
+
+# ------------------ 🚀 Ingestion Jobs ------------------
+# ১) POST /jobs: ফাইলগুলো সার্ভারে রাখা হয় এবং সাথে সাথে job_id ফেরত আসে (202)
+# ২) ব্যাকগ্রাউন্ডে ফাইলগুলো এক্সট্র্যাক্ট ও ইনডেক্স হয়; GET /jobs/<id> (পোল) বা /jobs/<id>/events (SSE) এ অগ্রগতি
+# ৩) POST /jobs/<id>/search: তৈরি করা কর্পাসে যত খুশি কুয়েরি (শুধু "ready" ফাইলগুলোতে)
+
+# কোনো পরিবর্তন না হলেও এত সেকেন্ড পর পর SSE keep-alive পাঠানো হয় (প্রক্সি যেন কানেকশন বন্ধ না করে)
+JOB_EVENTS_KEEPALIVE_SECONDS = 15
+
+# জবের সারি পূর্ণ (503) হলে ক্লায়েন্ট এত সেকেন্ড পর আবার চেষ্টা করবে
+JOB_RETRY_AFTER_SECONDS = 30
+
+
+def _job_not_found():
+    return jsonify({"status": "error", "message": "Job not found or expired."}), 404
+
+
+@search_bp.route("/jobs", methods=["POST"])
+def create_job():
+    uploaded_files = request.files.getlist("files")
+    if not uploaded_files:
+        return jsonify({"status": "error", "message": "No files uploaded."}), 400
+    file_paths = json.loads(request.form.get("paths", "{}"))
+
+    files = []
+    for file in uploaded_files:
+        file_id = str(uuid.uuid4())
+        file_hash = content_hash_stream(file)
+        file_content_bytes = read_upload(file, file.filename)
+        # ভিউয়ারের মতোই FILE_STORAGE_DICT এ রাখা হলো, তাই রেজাল্ট থেকে file_id দিয়ে ফাইলটি খোলা যায়
+        with FILE_STORAGE_LOCK:
+            FILE_STORAGE_DICT[file_id] = {
+                'data': file_content_bytes,
+                'filename': file.filename,
+                'original_path': file_paths.get(file.filename, file.filename),
+                'timestamp': time.time(),
+                'size': len(file_content_bytes),
+                'hash': file_hash,
+            }
+        files.append({
+            'file_id': file_id,
+            'name': file.filename,
+            'path': file_paths.get(file.filename, file.filename),
+            'size': len(file_content_bytes),
+            'hash': file_hash,
+        })
+
+    try:
+        job = INGEST_JOBS.submit(files)
+    except JobQueueFull as e:
+        with FILE_STORAGE_LOCK:
+            for entry in files:
+                FILE_STORAGE_DICT.pop(entry['file_id'], None)
+        response = jsonify({"status": "error", "message": str(e)})
+        response.headers['Retry-After'] = str(JOB_RETRY_AFTER_SECONDS)
+        return response, 503
+
+    response = jsonify({
+        "status": "ok",
+        "job_id": job.id,
+        "total": len(files),
+        "status_url": url_for("search.get_job", job_id=job.id),
+        "events_url": url_for("search.job_events", job_id=job.id),
+        "search_url": url_for("search.search_job", job_id=job.id),
+    })
+    response.headers['Location'] = url_for("search.get_job", job_id=job.id)
+    return response, 202
+
+
+@search_bp.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = INGEST_JOBS.get(job_id)
+    if job is None:
+        return _job_not_found()
+    include_files = request.args.get("files", "").lower() in ("1", "true")
+    return jsonify(dict(job.snapshot(include_files), status="ok")), 200
+
+
+@search_bp.route("/jobs/<job_id>", methods=["DELETE"])
+def delete_job(job_id):
+    if not INGEST_JOBS.delete(job_id):
+        return _job_not_found()
+    return jsonify({"status": "ok", "job_id": job_id}), 200
+
+
+@search_bp.route("/jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id):
+    """
+    Server-Sent Events: a "progress" event (the job's snapshot) on every change, ": keepalive"
+    comments while nothing changes, and a final "done" event once the job has finished.
+    """
+    job = INGEST_JOBS.get(job_id)
+    if job is None:
+        return _job_not_found()
+
+    def encode(event_type, snapshot):
+        return f"event: {event_type}\ndata: {json.dumps(snapshot, ensure_ascii=False)}\n\n"
+
+    def generate():
+        version = None
+        while True:
+            current = job.wait_for_change(version, JOB_EVENTS_KEEPALIVE_SECONDS) if version is not None else job.version
+            if current == version:
+                yield ": keepalive\n\n"
+                continue
+            version = current
+            if job.finished_state:
+                yield encode("done", dict(job.snapshot(include_files=True), status="ok"))
+                return
+            yield encode("progress", job.snapshot())
+
+    response = Response(generate(), mimetype=STREAM_MIMETYPES["sse"])
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@search_bp.route("/jobs/<job_id>/search", methods=["POST"])
+@profiled
+def search_job(job_id):
+    timer = _start_timer("search_job")
+    try:
+        job = INGEST_JOBS.get(job_id)
+        if job is None:
+            return _job_not_found()
+        payload = request.get_json(silent=True) or {}
+        query_text = str(payload.get("q", "")).strip()
+        if not query_text:
+            return jsonify({"status": "error", "message": "Missing 'q' parameter."}), 400
+
+        try:
+            query = parse_query(query_text, str(payload.get("scope") or "line"), payload.get("fuzzy"),
+                                str(payload.get("syntax") or "literal"))
+            pager = ResultPager.from_params(query, len(job.files), payload)
+        except (QuerySyntaxError, PaginationError) as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+
+        # এখনো ইনজেস্ট না হওয়া (pending), অসমর্থিত বা ব্যর্থ ফাইলগুলো বাদ; জব চলাকালীনও সার্চ করা যায়
+        items = []
+        pending = 0
+        expired = []
+        for position, entry in enumerate(job.snapshot(include_files=True)["files"]):
+            if entry['status'] != "ready":
+                pending += entry['status'] == "pending"
+                pager.skip(position)
+                continue
+            with FILE_STORAGE_LOCK:
+                stored = FILE_STORAGE_DICT.get(entry['file_id'])
+            if stored is None:
+                expired.append(entry['path'])
+                pager.skip(position)
+                continue
+            items.append({
+                'data': stored['data'],
+                'hash': stored['hash'],
+                'file_name': entry['name'],
+                'file_path': entry['path'],
+                'position': position,
+                'doc_id': job.files[position].get('doc_id'),
+            })
+        timer.lap("parse")
+
+        _apply_candidates(items, query)
+        timer.lap("index")
+
+        extra = {"job_state": job.state, "pending": pending, "expired": expired}
+        stream_format = _stream_format(str(payload.get("stream", "")))
+        if stream_format:
+            return _stream_search(items, query, pager, stream_format, timer, extra)
+
+        all_matches, total_count = _run_search(items, query, pager, timer)
+
+        response = {"status": "ok", "matches": all_matches, "count": total_count, "terms": list(query.terms)}
+        response.update(extra)
+        response.update(pager.summary())
+        return _timed_response(response, timer)
+
+    except Exception as e:
+        logger.exception("An error occurred during job search.")
+        return jsonify({"status": "error", "message": "An internal server error occurred."}), 500
+
+
+# ------------------ 🚀 Server-Side Folder Scan ------------------
+# সার্ভার ও ডেটা একই মেশিনে থাকলে ক্লায়েন্ট শুধু ফোল্ডারের অ্যাবসোলিউট পাথ পাঠায়;
+# সার্ভার SCAN_ROOTS এর ভেতরে ফোল্ডারটি স্ক্যান করে সরাসরি ডিস্ক থেকে পড়ে (কোনো আপলোড নেই)
+
+@search_bp.route("/scan_roots", methods=["GET"])
+def scan_roots():
+    """Folders the server may scan; an empty list means the client has to upload."""
+    return jsonify({"status": "ok", "roots": SCAN_ROOTS}), 200
+
+
+def _parse_scan_folders(payload):
+    """
+    Validates 'folders': [{"path": absolute path, "name": label}] (or plain path strings).
+    Returns ([(real path, label)], error_message).
+    """
+    folders = payload.get("folders")
+    if not isinstance(folders, list) or not folders:
+        return None, "Missing 'folders'."
+    resolved = []
+    for folder in folders:
+        path, name = (folder.get("path"), folder.get("name")) if isinstance(folder, dict) else (folder, None)
+        try:
+            real_path = resolve_scan_root(path)
+        except ScanError as e:
+            return None, str(e)
+        # রেজাল্টের পাথ ক্লায়েন্টের মতোই "<ফোল্ডারের নাম>/<ভেতরের পাথ>"
+        resolved.append((real_path, str(name or os.path.basename(real_path) or real_path)))
+    return resolved, None
+
+
+@search_bp.route("/search_scan", methods=["POST"])
+@profiled
+def search_scan():
+    timer = _start_timer("search_scan")
+    try:
+        payload = request.get_json(silent=True) or {}
+        query_text = str(payload.get("q", "")).strip()
+        if not query_text:
+            return jsonify({"status": "error", "message": "Missing 'q' parameter."}), 400
+        folders, error = _parse_scan_folders(payload)
+        if error:
+            status_code = 404 if not SCAN_ROOTS else 400
+            return jsonify({"status": "error", "message": error}), status_code
+
+        # ভুল কুয়েরি বা cursor হলে পুরো ফোল্ডার ট্রি পড়ার আগেই 400
+        try:
+            query = parse_query(query_text, str(payload.get("scope") or "line"), payload.get("fuzzy"),
+                                str(payload.get("syntax") or "literal"))
+            ResultPager.validate_params(query, payload)
+        except (QuerySyntaxError, PaginationError) as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        timer.lap("parse")
+
+        items = []
+        unreadable = 0
+        try:
+            for real_path, name in folders:
+                scanned, errors = scan_directory(real_path)
+                unreadable += errors
+                for scanned_file in scanned:
+                    items.append({
+                        'disk_path': scanned_file.path,
+                        'hash': stat_key(scanned_file),
+                        'file_name': os.path.basename(scanned_file.path),
+                        'file_path': f"{name}/{scanned_file.relative}",
+                        'original_path': scanned_file.path,
+                        'position': len(items),
+                    })
+        except ScanError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        timer.lap("walk")
+
+        try:
+            # cursor এর ফাইল সংখ্যা শুধু স্ক্যানের পরেই মেলানো যায়
+            pager = ResultPager.from_params(query, len(items), payload)
+        except PaginationError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+
+        extra = {"scanned": len(items), "unreadable": unreadable}
+        stream_format = _stream_format(str(payload.get("stream", "")))
+        if stream_format:
+            return _stream_search(items, query, pager, stream_format, timer, extra)
+
+        all_matches, total_count = _run_search(items, query, pager, timer)
+
+        response = {"status": "ok", "matches": all_matches, "count": total_count, "terms": list(query.terms)}
+        response.update(extra)
+        response.update(pager.summary())
+        return _timed_response(response, timer)
+
+    except Exception as e:
+        logger.exception("An error occurred during server-side scan search.")
+        return jsonify({"status": "error", "message": "An internal server error occurred."}), 500
@@ -1,15 +1,18 @@
 # routes/view_routes.py (আপডেট করা)
 
-from flask import Blueprint, request, jsonify, render_template, send_file, Response, redirect, url_for
+from flask import Blueprint, request, jsonify, render_template, Response, redirect, url_for
 from globals import FILE_STORAGE_DICT, FILE_STORAGE_LOCK
 # 💡 file_reader থেকে দুটি ফাংশন ইম্পোর্ট করা হলো
-from services.file_reader import get_file_text_content, open_folder_in_os
+from services.file_reader import get_file_text_content, get_line_index, open_folder_in_os
+from services.extraction_cache import content_hash
+from services.readers.registry import get_reader
+from routes.file_response import send_stored_file
+from routes.request_profiler import profiled
 from pathlib import Path
 import logging
 import uuid
-import threading
+import time
 import mimetypes
-import io # send_file এর জন্য io import করা হলো
 
 view_bp = Blueprint('view', __name__)
 logger = logging.getLogger("view_routes")
@@ -43,8 +46,10 @@ def upload_for_view():
                 'data': file_content_bytes,
                 'filename': uploaded_file.filename,
                 'original_path': original_path, # অ্যাবসোলিউট পাথ সেভ করা হলো
-                'timestamp': threading.local(), 
-                'size': len(file_content_bytes)
+                'timestamp': time.time(), 
+                'size': len(file_content_bytes),
+                # কন্টেন্ট হ্যাশ দিয়ে এক্সট্র্যাকশন ক্যাশ থেকে টেক্সট পাওয়া যায়
+                'hash': content_hash(file_content_bytes)
             }
         
         logger.info(f"File uploaded and stored: ID={file_id}, Name={uploaded_file.filename}, Size={len(file_content_bytes)} bytes")
@@ -59,6 +64,7 @@ def upload_for_view():
 # ----------------- VIEWER ROUTES (No change needed here) -----------------
 
 @view_bp.route("/view_code/<file_id>")
+@profiled
 def view_code(file_id):
     """
     Viewer for code/generic text files. Preloads content in HTML.
@@ -73,8 +79,8 @@ def view_code(file_id):
 
     try:
         # বাইনারি ডেটা সরাসরি কন্টেন্টে ডিকোড করা হলো (ছোট ফাইলের জন্য)
-        file_content_bytes = file_info['data']
-        preloaded_content = file_content_bytes.decode('utf-8', errors='replace')
+        # ডেটা bytes বা mmap (ডিস্কে রাখা বড় ফাইল) হতে পারে, দুটোই str() দিয়ে ডিকোড করা যায়
+        preloaded_content = str(file_info['data'], 'utf-8', errors='replace')
         
         return render_template(
             "code_viewer.html",
@@ -114,6 +120,7 @@ def view_text(file_id):
 # ----------------- FILE RETRIEVAL ROUTE (FIXED FOR PDF VIEWING) -----------------
 
 @view_bp.route("/get_file/<file_id>")
+@profiled
 def get_file(file_id):
     """
     Serves the file content.
@@ -128,14 +135,13 @@ def get_file(file_id):
         return "File not found or session expired.", 404
 
     filename = file_info['filename']
-    file_content_bytes = file_info['data']
     file_extension = Path(filename).suffix.lower()
 
     # 🌟 PDF ফাইল ব্রাউজারে খোলার জন্য বিশেষ হ্যান্ডলিং
     if file_extension == '.pdf':
-        # io.BytesIO ব্যবহার করে বাইট ডেটাকে ফাইল স্ট্রিম হিসেবে send_file এ পাঠানো
-        return send_file(
-            io.BytesIO(file_content_bytes),
+        # 🚀 Range রিকোয়েস্ট সাপোর্ট থাকায় ব্রাউজারের PDF ভিউয়ার প্রয়োজনীয় অংশ আলাদাভাবে আনতে পারে
+        return send_stored_file(
+            file_info,
             mimetype='application/pdf',
             as_attachment=False, # <--- attachment বন্ধ করা হলো
             download_name=filename 
@@ -145,6 +151,13 @@ def get_file(file_id):
     TEXT_GENERATION_EXTENSIONS = {'.docx', '.doc', '.xlsx', '.xls', '.csv'}
     
     if file_extension in TEXT_GENERATION_EXTENSIONS:
+        # কন্টেন্ট হ্যাশ দিয়ে ETag, তাই ভিউয়ার আবার খুললে এক্সট্র্যাকশন ছাড়াই 304 পাওয়া যায়
+        text_etag = f"{file_info['hash']}-text" if file_info.get('hash') else None
+        if text_etag and request.if_none_match.contains(text_etag):
+            not_modified = Response(status=304)
+            not_modified.set_etag(text_etag)
+            return not_modified
+
         try:
             # services/file_reader.py থেকে টেক্সট কন্টেন্ট জেনারেট করা হলো
             full_text = get_file_text_content(file_id, FILE_STORAGE_DICT)
@@ -159,6 +172,10 @@ def get_file(file_id):
             encoded_filename = filename.encode('utf-8').decode('latin-1', 'ignore')
             response.headers['Content-Disposition'] = f'attachment; filename="{encoded_filename}"; filename*=UTF-8''{filename}'
 
+            if text_etag:
+                response.set_etag(text_etag)
+                response.cache_control.no_cache = True
+
             return response
             
         except Exception as e:
@@ -172,14 +189,47 @@ def get_file(file_id):
         mime_type = 'application/octet-stream'
 
     
-    return Response(
-        file_content_bytes,
-        mimetype=mime_type,
-        headers={
-            # এই ফাইলগুলো (যা পিডিএফ বা টেক্সট জেনারেটেড নয়) বাই ডিফল্ট ডাউনলোড হবে
-            "Content-Disposition": f"attachment; filename=\"{filename}\"; filename*=UTF-8''{filename}" 
-        }
-    )
+    response = send_stored_file(file_info, mimetype=mime_type, as_attachment=True, download_name=filename)
+    # এই ফাইলগুলো (যা পিডিএফ বা টেক্সট জেনারেটেড নয়) বাই ডিফল্ট ডাউনলোড হবে
+    response.headers["Content-Disposition"] = f"attachment; filename=\"{filename}\"; filename*=UTF-8''{filename}"
+    return response
+
+@view_bp.route("/get_lines/<file_id>")
+def get_lines(file_id):
+    """
+    Returns a window of lines: ?start=<1-based line>&count=<lines> (count is capped at 2000).
+    Uses the cached line-offset index; the text viewer pages through a file with it.
+    Only types whose reader yields plain text (code/text, DOCX/DOC, XLSX/XLS/CSV) are served.
+    """
+    with FILE_STORAGE_LOCK:
+        file_info = FILE_STORAGE_DICT.get(file_id)
+
+    if not file_info:
+        return jsonify({"status": "error", "message": "File not found or session expired."}), 404
+
+    # PDF/ZIP এর কোনো প্লেইন টেক্সট নেই, র বাইট ডিকোড করে "লাইন" বানানো হবে না
+    reader = get_reader(file_info['filename'])
+    if reader is None or not reader.has_text:
+        return jsonify({"status": "error", "message": f"Line view is not available for {file_info['filename']}."}), 400
+
+    try:
+        start = max(1, int(request.args.get('start', 1)))
+        count = min(2000, max(1, int(request.args.get('count', 200))))
+    except ValueError:
+        return jsonify({"status": "error", "message": "'start' and 'count' must be integers."}), 400
+
+    try:
+        # রিডারের এক্সট্র্যাক্ট করা টেক্সট (সার্চের ক্যাশ থাকলে সেটিই)
+        full_text = get_file_text_content(file_id, FILE_STORAGE_DICT) or ''
+
+        line_index = get_line_index(full_text, file_info['filename'], file_info.get('hash'))
+        end = min(len(line_index), start + count - 1)
+        lines = [line_index.line_text(full_text, n) for n in range(start, end + 1)]
+
+        return jsonify({"status": "ok", "start": start, "lines": lines, "total_lines": len(line_index)}), 200
+    except Exception as e:
+        logger.error(f"Error reading lines for /get_lines/{file_id}: {e}")
+        return jsonify({"status": "error", "message": f"Error processing file content: {e}"}), 500
 
 # ----------------- FOLDER OPEN ROUTE (No change needed here) -----------------
 
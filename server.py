@@ -1,17 +1,21 @@
 # server.py (সংশোধিত)
 
-from flask import Flask, send_from_directory
-from routes.search_routes import search_bp
-from routes.open_routes import open_bp
-from routes.view_routes import view_bp
+import time
+# 🚀 ওয়ার্কার চালু হতে কত সময় লাগে তা মাপার জন্য (finder_startup_seconds)
+_IMPORT_STARTED = time.perf_counter()
+
+from flask import Flask, send_from_directory, jsonify, request, g, Response
 import logging
 from werkzeug import formparser
 from werkzeug.wrappers import Request
 import os
 import shutil
-import time
+import threading
 # 🚀 globals.py ফাইলটি থেকে সঠিক ভ্যারিয়েবল ইম্পোর্ট করা হলো 🚀
-from globals import TEMP_DIR_PATH, FILE_CLEANUP_HOURS, FILE_STORAGE_DICT, FILE_STORAGE_LOCK
+from globals import TEMP_DIR_PATH, FILE_CLEANUP_HOURS, FILE_STORAGE_DICT, FILE_STORAGE_LOCK, \
+    CONTENT_STORE_DICT, FILE_STORAGE_SWEEP_SECONDS, PRELOAD_READERS
+from services.metrics import METRICS, HTTP_REQUEST_SECONDS, PROMETHEUS_CONTENT_TYPE, STARTUP_SECONDS
+from services.readers.registry import preload_readers
 
 # অতিরিক্ত মেমরি ব্যবহারের জন্য: formparser-এর ফাইল বাফারের সীমা বৃদ্ধি 
 # 512 MB পর্যন্ত ছোট ফাইলগুলি মেমরিতে বাফার হবে
@@ -25,9 +29,6 @@ formparser.DEFAULT_MAX_FORM_MEMORY_SIZE = 10 * 1024 * 1024 # 10 MB
 # কনফিগারেশন: মোট আপলোড সাইজ 4 GB রাখা হলো
 MAX_CONTENT_LENGTH = 4 * 1024 * 1024 * 1024
 
-app = Flask(__name__, static_folder="static", static_url_path="")
-app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
-
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
 # 🌟 সার্ভার শুরুর আগে টেম্প ফোল্ডার পরিষ্কার করা
@@ -63,18 +64,89 @@ def cleanup_temp_files():
     # logging.info("In-memory file storage dictionary cleared.")
 
 
-# Register blueprints
-app.register_blueprint(search_bp)
-app.register_blueprint(open_bp)
-app.register_blueprint(view_bp)
+def create_app():
+    """Builds the Flask app: blueprints, the index page, storage stats, metrics and request timing."""
+    # ব্লুপ্রিন্টগুলো এখানে ইম্পোর্ট হয়, যাতে সার্চ ওয়ার্কার প্রসেসে শুধু services.* লোড হয়
+    from routes.search_routes import search_bp
+    from routes.open_routes import open_bp
+    from routes.view_routes import view_bp
+    from routes.request_profiler import profile_bp
+
+    app = Flask(__name__, static_folder="static", static_url_path="")
+    app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
+
+    # Register blueprints
+    app.register_blueprint(search_bp)
+    app.register_blueprint(open_bp)
+    app.register_blueprint(view_bp)
+    app.register_blueprint(profile_bp)
+
+    @app.route("/")
+    def index():
+        return send_from_directory(app.static_folder, "index.html")
+
+    # 🌟 স্টোরেজের বর্তমান ব্যবহার (মেমরি/ডিস্ক বাইট, এন্ট্রি সংখ্যা) দেখার জন্য
+    @app.route("/storage_stats")
+    def storage_stats():
+        return jsonify({
+            "status": "ok",
+            "file_storage": FILE_STORAGE_DICT.stats(),
+            "content_store": CONTENT_STORE_DICT.stats(),
+        })
+
+    # 🌟 Prometheus ফরম্যাটে মেট্রিক (লেটেন্সি হিস্টোগ্রাম, বাইট, ম্যাচ, ব্যর্থতা, স্টোরেজ)
+    @app.route("/metrics")
+    def metrics():
+        return Response(METRICS.render(), content_type=PROMETHEUS_CONTENT_TYPE)
 
-@app.route("/")
-def index():
-    return send_from_directory(app.static_folder, "index.html")
+    # 🌟 প্রতিটি রিকোয়েস্টের লেটেন্সি (স্ট্রিমিং রেসপন্সে শুধু প্রথম বাইট পর্যন্ত)
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
 
-# 🌟 ডেপ্লয়মেন্টের সময় cleanup ফাংশনটি চালানো উচিত
-with app.app_context():
+    @app.after_request
+    def record_request_latency(response):
+        started = g.pop("request_started", None)
+        if started is not None:
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                endpoint=request.endpoint or "unmatched", method=request.method, status=response.status_code,
+            )
+        return response
+
+    return app
+
+# 🌟 PRELOAD_READERS দেওয়া থাকলে রিডারগুলো ব্যাকগ্রাউন্ডে লোড হয়; ওয়ার্কার ততক্ষণে রিকোয়েস্ট নিতে পারে
+def _preload_readers():
+    started = time.perf_counter()
+    try:
+        timings = preload_readers(PRELOAD_READERS)
+    except Exception:
+        logging.exception("Could not preload readers")
+        return
+    STARTUP_SECONDS["preload"] = time.perf_counter() - started
+    logging.info(f"Preloaded readers {sorted(timings)} in {STARTUP_SECONDS['preload'] * 1000:.0f} ms")
+
+def start_background_tasks():
+    """Startup side effects of a serving process: temp cleanup, storage sweepers, reader preload."""
+    # 🌟 ডেপ্লয়মেন্টের সময় cleanup ফাংশনটি চালানো উচিত
     cleanup_temp_files()
 
+    # 🌟 ব্যাকগ্রাউন্ড sweeper: FILE_CLEANUP_HOURS এর বেশি সময় ব্যবহার না হওয়া ফাইল মুছে ফেলে
+    FILE_STORAGE_DICT.start_sweeper(FILE_STORAGE_SWEEP_SECONDS)
+    CONTENT_STORE_DICT.start_sweeper(FILE_STORAGE_SWEEP_SECONDS)
+
+    if PRELOAD_READERS:
+        threading.Thread(target=_preload_readers, name="reader-preload", daemon=True).start()
+
+# 🌟 "spawn" প্রসেস পুলের প্রতিটি ওয়ার্কার `python server.py` চালালে এই ফাইলটি __mp_main__ নামে আবার
+# ইম্পোর্ট করে; সেখানে অ্যাপ, টেম্প cleanup, sweeper বা প্রিলোড কিছুই চালানো হয় না
+if __name__ != "__mp_main__":
+    app = create_app()
+    start_background_tasks()
+
+    STARTUP_SECONDS["import"] = time.perf_counter() - _IMPORT_STARTED
+    logging.info(f"Server ready in {STARTUP_SECONDS['import'] * 1000:.0f} ms (readers load on first use)")
+
 if __name__ == "__main__":
-    app.run(port=5055, debug=False)
\ No newline at end of file
+    app.run(port=5055, debug=False)
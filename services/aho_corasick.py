@@ -0,0 +1,91 @@
+# services/aho_corasick.py
+
+import re
+from collections import deque
+
+
+def fold_case(text):
+    """
+    Lowercases `text` without changing its length, so offsets in the result are offsets in `text`.
+    (A few characters, e.g. 'İ', lowercase to two characters; those are left unchanged.)
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+
+class AhoCorasick:
+    """
+    Multi-pattern automaton: finds every occurrence of every pattern (overlapping ones included)
+    in a single left-to-right scan of the text.
+
+    Patterns are matched exactly; callers fold case (fold_case) on both patterns and text
+    for case-insensitive search.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._lengths = [len(p) for p in self.patterns]
+        self._goto = [{}]     # state -> {char: next_state}
+        self._fail = [0]      # state -> failure link
+        self._output = [()]   # state -> pattern indexes ending at this state
+
+        for index, pattern in enumerate(self.patterns):
+            if not pattern:
+                raise ValueError("Empty pattern.")
+            state = 0
+            for ch in pattern:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                    self._goto[state][ch] = next_state
+                state = next_state
+            self._output[state] += (index,)
+
+        # Breadth-first: একটি স্টেটের failure link তার চেয়ে কম গভীরতার স্টেটে যায়
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(ch, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+        # রুট স্টেটে থাকলে কোনো প্যাটার্নের প্রথম অক্ষর পর্যন্ত regex (C) দিয়ে এক লাফে এগোনো হয়
+        first_chars = sorted({pattern[0] for pattern in self.patterns})
+        self._skip = re.compile("[" + "".join(re.escape(ch) for ch in first_chars) + "]")
+
+    def findall(self, text):
+        """
+        Returns [(start, end, pattern_index), ...] for every occurrence, ordered by end offset.
+        """
+        return list(self.finditer(text))
+
+    def finditer(self, text):
+        """Like findall, but yields occurrences lazily so callers can stop early."""
+        goto, fail, output, lengths = self._goto, self._fail, self._output, self._lengths
+        skip = self._skip.search
+        state = 0
+        position = 0
+        text_length = len(text)
+
+        while position < text_length:
+            if state == 0:
+                m = skip(text, position)
+                if m is None:
+                    break
+                position = m.start()
+            ch = text[position]
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            position += 1
+            for index in output[state]:
+                yield position - lengths[index], position, index
@@ -0,0 +1,115 @@
+# services/directory_scan.py
+
+import hashlib
+import logging
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from globals import SCAN_ROOTS, SCAN_WORKERS, SCAN_MAX_FILES, SCAN_MAX_FILE_BYTES
+from .readers.registry import get_reader
+
+logger = logging.getLogger("directory_scan")
+
+ScannedFile = namedtuple("ScannedFile", "path relative size mtime_ns")
+
+
+class ScanError(ValueError):
+    pass
+
+
+def resolve_scan_root(path):
+    """
+    Returns the real path of `path` if it is an existing directory inside one of SCAN_ROOTS,
+    otherwise raises ScanError (symlinks and ".." are resolved before the check).
+    """
+    if not SCAN_ROOTS:
+        raise ScanError("Server-side scanning is not enabled (SCAN_ROOTS is empty).")
+    if not isinstance(path, str) or not os.path.isabs(path):
+        raise ScanError("The folder must be an absolute path.")
+    real_path = os.path.realpath(path)
+    for root in SCAN_ROOTS:
+        try:
+            inside = os.path.commonpath([root, real_path]) == root
+        except ValueError:  # Windows এ আলাদা ড্রাইভ
+            inside = False
+        if inside:
+            if not os.path.isdir(real_path):
+                raise ScanError(f"Not a directory: {path}")
+            return real_path
+    raise ScanError(f"Folder is outside the allowed scan roots: {path}")
+
+
+def _wanted(name, size):
+    """The client's filter (collectFilesRecursively): a searchable extension, no "~$" lock files, size cap."""
+    if name.startswith('~$'):
+        return False
+    reader = get_reader(name)
+    if reader is None:
+        return False
+    return size <= SCAN_MAX_FILE_BYTES or reader.streams(size)
+
+
+def _scan_one(directory):
+    """Lists one directory: (files [(path, size, mtime_ns)], subdirectories, errors). Symlinks are skipped."""
+    files = []
+    subdirectories = []
+    errors = 0
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    # সিমলিংক অনুসরণ করা হয় না, তাই স্ক্যান কখনো অনুমোদিত রুটের বাইরে যায় না
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False) and get_reader(entry.name) is not None:
+                        stat = entry.stat(follow_symlinks=False)
+                        if _wanted(entry.name, stat.st_size):
+                            files.append((entry.path, stat.st_size, stat.st_mtime_ns))
+                except OSError:
+                    errors += 1
+    except OSError as e:
+        logger.warning(f"Cannot scan {directory}: {e}")
+        errors += 1
+    return files, subdirectories, errors
+
+
+def scan_directory(root, workers=SCAN_WORKERS, max_files=SCAN_MAX_FILES):
+    """
+    Walks `root` (see resolve_scan_root) with os.scandir, one directory per task on a thread
+    pool. Returns (files, errors): ScannedFile entries sorted by relative path ("/"-separated),
+    and the number of entries that could not be read. Raises ScanError beyond `max_files`.
+    """
+    found = []
+    errors = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="scan") as pool:
+        pending = {pool.submit(_scan_one, root)}
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    files, subdirectories, directory_errors = future.result()
+                    found.extend(files)
+                    errors += directory_errors
+                    if len(found) > max_files:
+                        raise ScanError(f"More than {max_files} searchable files under {root}; choose a smaller folder.")
+                    pending.update(pool.submit(_scan_one, directory) for directory in subdirectories)
+        finally:
+            for future in pending:
+                future.cancel()
+
+    scanned = [
+        ScannedFile(path, os.path.relpath(path, root).replace(os.sep, '/'), size, mtime_ns)
+        for path, size, mtime_ns in found
+    ]
+    scanned.sort(key=lambda scanned_file: scanned_file.relative)
+    return scanned, errors
+
+
+def stat_key(scanned_file):
+    """
+    Stands in for the content hash of a file on disk: path, size and modification time, so
+    repeat searches reuse EXTRACTION_CACHE without reading (and hashing) every byte again.
+    """
+    identity = f"{scanned_file.path}\0{scanned_file.size}\0{scanned_file.mtime_ns}"
+    return hashlib.sha256(identity.encode("utf-8", "surrogateescape")).hexdigest()
@@ -0,0 +1,145 @@
+# services/extraction_cache.py
+
+import hashlib
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from globals import EXTRACTION_CACHE_MAX_BYTES, EXTRACTION_CACHE_TTL_SECONDS
+
+logger = logging.getLogger("extraction_cache")
+
+# বড় আপলোড হ্যাশ করার সময় একবারে এতটুকু পড়া হয়
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def content_hash(data):
+    """
+    Returns the hex SHA-256 digest of a file's raw bytes.
+    SHA-256 is used because the browser can compute the same digest (crypto.subtle).
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def content_hash_stream(file_obj):
+    """content_hash of a file object's bytes, read chunk by chunk (the position is left at the start)."""
+    digest = hashlib.sha256()
+    file_obj.seek(0)
+    for chunk in iter(lambda: file_obj.read(HASH_CHUNK_BYTES), b""):
+        digest.update(chunk)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+
+def _estimate_size(value):
+    """
+    Rough in-memory size of an extracted value (str, bytes, or nested list/tuple/dict of them).
+    """
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_estimate_size(k) + _estimate_size(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+class ExtractionCache:
+    """
+    Content-addressed cache of extracted file content.
+
+    Keys are (content_hash, kind) tuples, where kind is usually the file extension,
+    because the same bytes can be extracted differently depending on the reader.
+    Entries are evicted least-recently-used first once the byte budget is exceeded,
+    and any entry that has not been used for `ttl_seconds` is dropped.
+    """
+
+    def __init__(self, max_bytes, ttl_seconds):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (value, size, last_used)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, size, last_used = entry
+            if now - last_used > self.ttl_seconds:
+                self._remove_locked(key)
+                self.misses += 1
+                return None
+            self._entries[key] = (value, size, now)
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            # একটি এন্ট্রি পুরো বাজেটের চেয়ে বড় হলে ক্যাশ করা হবে না
+            logger.info(f"Not caching {key[1]} content of {size} bytes (over budget).")
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove_locked(key)
+            self._entries[key] = (value, size, time.time())
+            self._total_bytes += size
+            self._evict_locked()
+
+    def get_or_extract(self, key, extractor):
+        """
+        Returns the cached value for `key`, running `extractor()` on a miss.
+        Falsy results (failed or empty extraction) are returned but not cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        value = extractor()
+        if value:
+            self.put(key, value)
+        return value
+
+    def discard(self, content_hash_value):
+        """Removes every cached kind for one content hash."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == content_hash_value]:
+                self._remove_locked(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _remove_locked(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._total_bytes -= size
+
+    def _evict_locked(self):
+        cutoff = time.time() - self.ttl_seconds
+        # OrderedDict is in LRU order, so expired entries are at the front
+        while self._entries:
+            oldest_key, (_, _, last_used) = next(iter(self._entries.items()))
+            if last_used >= cutoff and self._total_bytes <= self.max_bytes:
+                break
+            self._remove_locked(oldest_key)
+
+
+# 🌟 সার্চ এবং ভিউয়ার উভয়ের জন্য একটি শেয়ার্ড ক্যাশ
+EXTRACTION_CACHE = ExtractionCache(EXTRACTION_CACHE_MAX_BYTES, EXTRACTION_CACHE_TTL_SECONDS)
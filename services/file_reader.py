@@ -4,30 +4,158 @@ import os
 import logging
 import subprocess 
 import io
-from .readers.pdf_reader import search_pdf_content
-from .readers.docx_reader import get_docx_content 
-from .readers.doc_reader import get_doc_content
-from .readers.text_reader import get_text_content, search_text_content
-# 🚀 নতুন ইম্পোর্ট
-from .readers.excel_reader import get_excel_content, get_csv_content 
+import mmap
+import zipfile
+# 🚀 রিডারগুলো (fitz, pandas, openpyxl...) রেজিস্ট্রি থেকে প্রথম ব্যবহারে লোড হয়
+from .readers.registry import READERS, get_reader
+from .readers.text_reader import LineIndex
+from .extraction_cache import EXTRACTION_CACHE, content_hash
+from .trigram_index import CORPUS_INDEX
+from .query_parser import as_query
+from .metrics import FILE_STAGE_SECONDS, new_file_stats, timed_stage
+from globals import SCAN_MMAP_THRESHOLD_BYTES, ARCHIVE_MAX_DEPTH
 
 logger = logging.getLogger("file_reader_service")
 
-# 🚀 TEXT_EXTENSIONS এর সাথে নতুন Excel/CSV এক্সটেনশন যোগ করা হলো
-TEXT_EXTENSIONS = {
-    '.py', '.js', '.java', '.class', '.cpp', '.cc', '.cxx', '.hpp', '.hxx',
-    '.cs', '.ts', '.tsx', '.go', '.c', '.h', '.php', '.phtml', '.sql', '.rs',
-    '.rb', '.swift', '.kt', '.kts', '.r', '.R', '.pl', '.pm', '.dart', '.scala',
-    '.sc', '.vb', '.asm', '.s', '.html', '.htm', '.css', '.m', '.mat', '.sh',
-    '.bash', '.cls', '.cbl', '.cob', '.fs', '.fsi', '.fsx', '.ps1', '.plsql',
-    '.scm', '.ss', '.tsql', '.cr', '.pro', '.pl', '.vhd', '.vhdl', '.d', '.abap',
-    '.txt', '.md', '.log', '.json', '.xml', '.yml', '.yaml', '.toml',
-    # 🚀 নতুন সংযোজন
-    '.xlsx', '.xls', '.csv' 
-}
-
-EXCEL_EXTENSIONS = {'.xlsx', '.xls'}
-CSV_EXTENSION = {'.csv'}
+# সার্চ করা যায় এমন সব এক্সটেনশন (services/readers/registry.py তে প্রতিটি রিডারের সাথে নিবন্ধিত)
+SEARCHABLE_EXTENSIONS = frozenset(READERS)
+
+
+# ------------------ Extraction (cached by content hash) ------------------
+def extract_content(file_content_bytes, file_name, temp_uploads_dir):
+    """
+    Extracts a file's content without touching the cache (used directly by worker processes).
+    PDFs yield a list of pages (see extract_pdf_pages), spreadsheets and CSV files a
+    TabularContent, DOCX files a DocxContent; every other type yields plain text.
+    Returns None for file types without a reader.
+    """
+    reader = get_reader(file_name)
+    if reader is None:
+        return None
+    return reader.extract(file_content_bytes, file_name, temp_uploads_dir)
+
+
+def is_streamed(file_name, size):
+    """
+    True for files too large to extract in one piece: big CSV files are searched chunk by
+    chunk (search_csv_stream) and big text files straight from their bytes or window by
+    window (search_text_windows), never from the extraction cache or the index.
+    """
+    reader = get_reader(file_name)
+    return reader is not None and reader.streams(size)
+
+
+def read_item_data(file_item):
+    """
+    Raw content of a search item: its 'data' (bytes or mmap), the uploaded 'file_obj' (see
+    read_upload), or the file at 'disk_path' (server-side scan).
+    """
+    if 'data' in file_item:
+        return file_item['data']
+    if 'disk_path' in file_item:
+        return read_disk_file(file_item['disk_path'])
+    return read_upload(file_item['file_obj'], file_item['file_name'])
+
+
+def read_upload(file_obj, file_name):
+    """
+    Content of an uploaded file. A large upload that werkzeug already spooled to a temporary
+    file, like a large file on disk, is memory-mapped instead of read into memory (the mmap
+    stays valid after the upload is closed); only small or in-memory uploads are read.
+    """
+    file_obj.seek(0, os.SEEK_END)
+    size = file_obj.tell()
+    file_obj.seek(0)
+    if size > SCAN_MMAP_THRESHOLD_BYTES or is_streamed(file_name, size):
+        try:
+            return mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            pass
+    data = file_obj.read()
+    file_obj.seek(0)
+    return data
+
+
+def read_disk_file(path):
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size > SCAN_MMAP_THRESHOLD_BYTES:
+            # ফাইল বন্ধ হলেও mmap বৈধ থাকে
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return f.read()
+
+
+def extraction_key(file_name, file_hash):
+    """Key of a file's extracted content in EXTRACTION_CACHE."""
+    return (file_hash, os.path.splitext(file_name)[1].lower())
+
+
+def get_extracted_content(file_content_bytes, file_name, temp_uploads_dir, file_hash=None):
+    """
+    Returns the extracted content of a file, reusing the shared extraction cache.
+    """
+    if file_hash is None:
+        file_hash = content_hash(file_content_bytes)
+
+    return EXTRACTION_CACHE.get_or_extract(
+        extraction_key(file_name, file_hash),
+        lambda: extract_content(file_content_bytes, file_name, temp_uploads_dir)
+    )
+
+
+def index_content(file_content_bytes, file_name, temp_uploads_dir, file_hash, owner, extract=True):
+    """
+    Adds a file's extracted content to CORPUS_INDEX (one unit per PDF page, one unit otherwise)
+    on behalf of `owner`, who must release it (CORPUS_INDEX.release) once done with the file.
+    Returns the document id, or None if the content could not be extracted. With extract=False
+    only an already indexed document is claimed (None if it isn't indexed yet).
+    """
+    reader = get_reader(file_name)
+    if reader is None or reader.streams(len(file_content_bytes)):
+        return None
+    file_extension = os.path.splitext(file_name)[1].lower()
+    if file_hash is None:
+        file_hash = content_hash(file_content_bytes)
+
+    doc_id = (file_hash, file_extension)
+    if CORPUS_INDEX.add_owner(doc_id, owner):
+        return doc_id
+    if not extract:
+        return None
+
+    content = get_extracted_content(file_content_bytes, file_name, temp_uploads_dir, file_hash)
+    if not content:
+        return None
+
+    units = reader.index_units(content) or [get_content_text(content, file_name, file_hash)]
+    CORPUS_INDEX.add_document(doc_id, units, owner)
+    return doc_id
+
+
+def get_line_index(full_text, file_name, file_hash=None):
+    """
+    Returns the LineIndex of extracted text, cached next to the text so the viewer and
+    repeat searches don't rebuild it.
+    """
+    if file_hash is None:
+        return LineIndex(full_text)
+    file_hash, file_extension = extraction_key(file_name, file_hash)
+    return EXTRACTION_CACHE.get_or_extract((file_hash, f"{file_extension}:lines"), lambda: LineIndex(full_text))
+
+
+def get_content_text(content, file_name, file_hash=None):
+    """
+    Returns the plain text of extracted content (for the viewer and the index). Text that has
+    to be rendered (spreadsheets) is cached next to the content; searches never need it.
+    """
+    if isinstance(content, str):
+        return content
+    reader = get_reader(file_name)
+    if file_hash is None:
+        return reader.text(content)
+    file_hash, file_extension = extraction_key(file_name, file_hash)
+    return EXTRACTION_CACHE.get_or_extract((file_hash, f"{file_extension}:text"), lambda: reader.text(content))
+
 
 # ------------------ New Function for Text Content Retrieval ------------------
 def get_file_text_content(file_id, file_storage):
@@ -39,38 +167,25 @@ def get_file_text_content(file_id, file_storage):
     if not file_info:
         return None
     
-    file_content_bytes = file_info['data']
     file_filename = file_info['filename']
     file_extension = os.path.splitext(file_filename)[1].lower()
+    reader = get_reader(file_filename)
     
     # ⚠️ Note: For .doc files, this path is needed by the underlying library (antiword)
     # Ensure this path is defined in globals.py or passed correctly if used in the reader function.
     temp_uploads_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'temp_uploads')
 
-    file_obj = io.BytesIO(file_content_bytes)
-    
-    if file_extension == '.docx':
-        return get_docx_content(file_obj)
-    
-    elif file_extension == '.doc':
-        return get_doc_content(file_obj, file_filename, temp_uploads_dir)
-    
-    # 🚀 Excel ফাইল হ্যান্ডলিং
-    elif file_extension in EXCEL_EXTENSIONS:
-        return get_excel_content(file_obj, file_filename)
-        
-    # 🚀 CSV ফাইল হ্যান্ডলিং
-    elif file_extension in CSV_EXTENSION:
-        return get_csv_content(file_obj)
-    
-    elif file_extension in TEXT_EXTENSIONS:
-        # অন্যান্য টেক্সট ফাইলগুলোর জন্য (যেমন .py, .txt ইত্যাদি)
-        return get_text_content(file_obj)
-    
-    else:
+    if reader is None or not reader.has_text:
         logger.warning(f"Attempted to view unsupported file type {file_extension} as plain text.")
         return None
 
+    # সার্চের সময় এক্সট্র্যাক্ট করা টেক্সট ক্যাশে থাকলে ভিউয়ার সেটিই ব্যবহার করবে
+    with FILE_STAGE_SECONDS.time(stage="view", file_type=file_type_label(file_filename)):
+        content = get_extracted_content(file_info['data'], file_filename, temp_uploads_dir, file_info.get('hash'))
+        if not content:
+            return content
+        return get_content_text(content, file_filename, file_info.get('hash'))
+
 # ------------------ Open Folder Functions (আগের মতোই রাখা হলো) ------------------
 def get_original_folder_path(file_id, file_storage):
     file_info = file_storage.get(file_id)
@@ -111,47 +226,156 @@ def open_folder_in_os(file_or_folder_path):
         return False
 # ------------------------------------------------------------------
 
+def is_searchable(file_name):
+    return get_reader(file_name) is not None
+
+
+def file_type_label(file_name):
+    """File type for metrics labels: the extension without the dot, or "other" (keeps label values bounded)."""
+    if not is_searchable(file_name):
+        return "other"
+    return os.path.splitext(file_name)[1].lower().lstrip('.')
+
+
+def search_extracted_content(content, file_item, query, use_cache=True):
+    """
+    Searches already-extracted content (from extract_content/get_extracted_content) of one file.
+    `use_cache=False` skips caching derived data (worker processes have their own, unshared cache).
+    `query` is a parsed Query (services/query_parser.py) or a plain query string.
+    """
+    file_name = file_item['file_name']
+    reader = get_reader(file_name)
+    # 'max_matches' থাকলে রিডার এতগুলো ম্যাচ পাওয়ার পর সার্চ থামিয়ে "truncated" জানায়
+    if not content and reader.empty_is_failure:
+        return {"status": "error", "message": reader.failure_message(file_name)}, 500
+
+    file_hash = file_item.get('hash') if use_cache else None
+    return reader.search(
+        content, file_item, as_query(query), lambda text: get_line_index(text, file_name, file_hash)
+    )
+
+
+def search_raw_text(file_content_bytes, file_item, query):
+    """
+    Byte-level fast path for plain text files whose decoded text isn't cached: searches the
+    raw bytes and skips binary files. Returns None when the file must be decoded instead.
+    """
+    reader = get_reader(file_item['file_name'])
+    if reader is None:
+        return None
+    return reader.search_bytes(
+        file_content_bytes, file_item['file_name'], file_item['file_path'], as_query(query), file_item.get('max_matches')
+    )
+
+
 def search_file_content(file_item, query, temp_uploads_dir):
-    file_obj = file_item['file_obj']
+    """
+    Searches one file. `file_item` carries either an uploaded 'file_obj' or the raw
+    'data' bytes (optionally with its content 'hash', e.g. from CONTENT_STORE_DICT).
+    An optional 'candidate_units' set (from CORPUS_INDEX) limits the search to those
+    units; an empty set means the index ruled the file out and it is not read at all.
+    An optional 'max_matches' stops the search early (the result then has "truncated": True).
+    .zip archives are searched member by member (see search_archive).
+    The result carries "stats" (bytes, extract and scan seconds, see services/metrics.py).
+    """
+    stats = new_file_stats()
+    result, status_code = _search_file_content(file_item, query, temp_uploads_dir, stats)
+    result["stats"] = stats
+    return result, status_code
+
+
+def _search_file_content(file_item, query, temp_uploads_dir, stats):
     file_name = file_item['file_name']
-    file_path = file_item['file_path']
-    file_extension = os.path.splitext(file_name)[1].lower()
+    reader = get_reader(file_name)
 
-    if file_extension == '.pdf':
-        return search_pdf_content(file_obj, file_path, query)
+    if reader is None:
+        file_extension = os.path.splitext(file_name)[1].lower()
+        return {"status": "error", "message": f"Unsupported file type: {file_extension}"}, 400
 
-    elif file_extension == '.docx':
-        full_text = get_docx_content(file_obj)
-        if not full_text:
-            return {"status": "error", "message": f"Could not read content from {file_name}"}, 500
-        return search_text_content(full_text, file_name, file_path, query)
+    candidate_units = file_item.get('candidate_units')
+    if candidate_units is not None and not candidate_units:
+        return {"status": "ok", "matches": [], "count": 0}, 200
 
-    elif file_extension == '.doc':
-        full_text = get_doc_content(file_obj, file_name, temp_uploads_dir)
-        if not full_text:
-            return {"status": "error", "message": f"Could not read content from {file_name}"}, 500
-        return search_text_content(full_text, file_name, file_path, query)
-        
-    # 🚀 Excel ফাইল হ্যান্ডলিং
-    elif file_extension in EXCEL_EXTENSIONS:
-        full_text = get_excel_content(file_obj, file_name)
-        if not full_text:
-            return {"status": "error", "message": f"Could not read content from {file_name}. Check if required libraries (openpyxl/xlrd) are installed."}, 500
-        # Excel/CSV-এর জন্য text_reader-এর সার্চ ফাংশন ব্যবহার করা হলো
-        return search_text_content(full_text, file_name, file_path, query)
-
-    # 🚀 CSV ফাইল হ্যান্ডলিং
-    elif file_extension in CSV_EXTENSION:
-        full_text = get_csv_content(file_obj)
-        if not full_text:
-            return {"status": "error", "message": f"Could not read content from {file_name}. Check if required libraries (pandas) are installed."}, 500
-        return search_text_content(full_text, file_name, file_path, query)
-
-    elif file_extension in TEXT_EXTENSIONS:
-        full_text = get_text_content(file_obj)
-        if not full_text:
-            return {"status": "error", "message": f"Could not read content from {file_name}"}, 500
-        return search_text_content(full_text, file_name, file_path, query)
-
-    else:
-        return {"status": "error", "message": f"Unsupported file type: {file_extension}"}, 400
\ No newline at end of file
+    file_content_bytes = read_item_data(file_item)
+    stats["bytes"] = len(file_content_bytes)
+
+    if reader.is_archive:
+        return search_archive(file_content_bytes, file_item, query, temp_uploads_dir, stats)
+
+    if reader.streams(len(file_content_bytes)):
+        with timed_stage(stats, "scan"):
+            return reader.search_stream(
+                file_content_bytes, file_name, file_item['file_path'], as_query(query), file_item.get('max_matches')
+            )
+
+    # ক্যাশে ডিকোড করা টেক্সট না থাকলে কাঁচা বাইটেই সার্চ (বেশিরভাগ ফাইলে ম্যাচ থাকে না)
+    if not file_item.get('hash') or EXTRACTION_CACHE.get(extraction_key(file_name, file_item['hash'])) is None:
+        with timed_stage(stats, "scan"):
+            outcome = search_raw_text(file_content_bytes, file_item, query)
+        if outcome is not None:
+            return outcome
+
+    file_hash = file_item.get('hash') or content_hash(file_content_bytes)
+    with timed_stage(stats, "extract"):
+        content = get_extracted_content(file_content_bytes, file_name, temp_uploads_dir, file_hash)
+    with timed_stage(stats, "scan"):
+        return search_extracted_content(content, dict(file_item, hash=file_hash), query)
+
+
+def search_archive(data, file_item, query, temp_uploads_dir, stats):
+    """
+    Searches every member of a .zip archive with its own reader, as if it were a file of its
+    own (nested archives too, up to ARCHIVE_MAX_DEPTH levels). Members are read in memory,
+    never extracted to disk, and their extracted content is cached by hash like any file.
+
+    Each match gets the "path" archive.zip!/inner/path, the archive's "file" (the file the
+    client picked) and the inner path in "member". One ArchiveLimits is shared with nested
+    archives; once a limit is hit the rest is skipped and the result says why in "archive_limit".
+    """
+    archives = get_reader(file_item['file_name']).module
+    depth = file_item.get('archive_depth', 0) + 1
+    limits = file_item.get('archive_limits') or archives.ArchiveLimits()
+    max_matches = file_item.get('max_matches')
+    results = []
+    truncated = False
+    members = 0
+
+    try:
+        for inner_path, member_data in archives.iter_members(data, limits):
+            member_name = inner_path.rsplit('/', 1)[-1]
+            member_path = f"{file_item['file_path']}{archives.MEMBER_SEPARATOR}{inner_path}"
+            if get_reader(member_name).is_archive and depth >= ARCHIVE_MAX_DEPTH:
+                logger.info(f"Skipping nested archive {member_path} (ARCHIVE_MAX_DEPTH is {ARCHIVE_MAX_DEPTH})")
+                continue
+            member_item = {
+                'data': member_data,
+                'file_name': member_name,
+                'file_path': member_path,
+                'archive_depth': depth,
+                'archive_limits': limits,
+            }
+            if max_matches is not None:
+                member_item['max_matches'] = max_matches - len(results)
+            result, status_code = _search_file_content(member_item, query, temp_uploads_dir, stats)
+            members += 1
+            if status_code != 200:
+                logger.warning(f"Failed to search archive member {member_item['file_path']}: {result.get('message')}")
+                continue
+            for match in result["matches"]:
+                match["file"] = file_item['file_name']
+                # ভেতরের আর্কাইভের ম্যাচে তার নিজের মেম্বার পাথও যোগ হয় (a.zip!/b.zip!/c.txt)
+                nested = match.get("member")
+                match["member"] = f"{inner_path}{archives.MEMBER_SEPARATOR}{nested}" if nested else inner_path
+            results.extend(result["matches"])
+            if result.get("truncated"):
+                truncated = True
+                break
+    except zipfile.BadZipFile as e:
+        return {"status": "error", "message": f"Could not read archive {file_item['file_name']}: {e}"}, 500
+
+    stats["bytes"] = len(data)
+    result = {"status": "ok", "matches": results, "count": len(results), "truncated": truncated, "members": members}
+    if limits.exceeded:
+        logger.warning(f"Stopped searching {file_item['file_path']} after {members} members: {limits.exceeded}")
+        result["archive_limit"] = f"Stopped after {members} members: {limits.exceeded}."
+    return result, 200
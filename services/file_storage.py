@@ -0,0 +1,297 @@
+# services/file_storage.py
+
+import logging
+import mmap
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger("file_storage")
+
+
+class BoundedFileStorage:
+    """
+    Dict-like store of uploaded files: {key: {'data': bytes, ...metadata}}.
+
+    - Blobs up to `spill_threshold` bytes stay in memory while the in-memory total is within
+      `memory_budget`; larger blobs, and least-recently-used blobs once the budget is exceeded,
+      are written to files under `spill_dir` and read back through a read-only mmap.
+    - Once the total (memory + disk) size exceeds `total_budget`, least-recently-used entries
+      are evicted. Entries not accessed for `ttl_seconds` are evicted by sweep(), which the
+      background sweeper thread runs periodically.
+
+    get() returns a fresh dict whose 'data' is either bytes or an mmap (both support the
+    buffer protocol, so io.BytesIO, hashlib and memoryview accept either).
+    """
+
+    def __init__(self, name, memory_budget, spill_threshold, total_budget, ttl_seconds, spill_dir):
+        self.name = name
+        self.memory_budget = memory_budget
+        self.spill_threshold = spill_threshold
+        self.total_budget = total_budget
+        self.ttl_seconds = ttl_seconds
+        self.spill_dir = Path(spill_dir)
+        self._entries = OrderedDict()  # key -> record dict (LRU order: oldest first)
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._pending_deletes = []  # spill files that couldn't be removed yet (e.g. still mapped on Windows)
+        self._eviction_listeners = []
+        self._lock = threading.RLock()
+        self._sweeper = None
+        self._stop_event = threading.Event()
+        self.evictions = 0
+
+    # ------------------ dict-like interface ------------------
+
+    def __setitem__(self, key, entry):
+        data = entry['data']
+        metadata = {k: v for k, v in entry.items() if k != 'data'}
+        size = len(data)
+
+        # বড় ব্লব (এবং মেমরি বাজেট ছাড়ানো LRU ব্লব, _spill দেখুন) লকের বাইরে ডিস্কে লেখা হয়, যাতে অন্য রিকোয়েস্ট আটকে না থাকে
+        spill_path = self._write_spill_file(data) if size > self.spill_threshold else None
+
+        with self._lock:
+            if key in self._entries:
+                self._remove_locked(key)
+
+            record = {
+                'metadata': metadata,
+                'size': size,
+                'data': None if spill_path else bytes(data),
+                'path': spill_path,
+                'last_access': time.time(),
+            }
+            self._entries[key] = record
+
+            if spill_path:
+                self._disk_bytes += size
+            else:
+                self._memory_bytes += size
+
+            victims = self._pick_spill_victims_locked()
+            evicted = self._evict_over_budget_locked()
+
+        self._spill(victims)
+        self._notify_evicted(evicted)
+
+    def get(self, key, default=None):
+        with self._lock:
+            record = self._entries.get(key)
+            if record is None:
+                return default
+            if time.time() - record['last_access'] > self.ttl_seconds:
+                self._remove_locked(key)
+                self.evictions += 1
+                evicted = [key]
+            else:
+                record['last_access'] = time.time()
+                self._entries.move_to_end(key)
+                entry = dict(record['metadata'])
+                entry['data'] = record['data'] if record['path'] is None else self._map_file(record['path'])
+                entry['timestamp'] = record['last_access']
+                return entry
+
+        self._notify_evicted(evicted)
+        return default
+
+    def __getitem__(self, key):
+        entry = self.get(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def __delitem__(self, key):
+        with self._lock:
+            if key not in self._entries:
+                raise KeyError(key)
+            self._remove_locked(key)
+        self._notify_evicted([key])
+
+    def pop(self, key, default=None):
+        entry = self.get(key)
+        if entry is None:
+            return default
+        with self._lock:
+            if key in self._entries:
+                self._remove_locked(key)
+        self._notify_evicted([key])
+        return entry
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries.keys())
+
+    def clear(self):
+        with self._lock:
+            keys = list(self._entries.keys())
+            for key in keys:
+                self._remove_locked(key)
+        self._notify_evicted(keys)
+
+    # ------------------ eviction ------------------
+
+    def add_eviction_listener(self, callback):
+        """`callback(key)` is called (outside the lock) whenever an entry is removed."""
+        self._eviction_listeners.append(callback)
+
+    def sweep(self):
+        """Evicts entries idle for longer than ttl_seconds. Returns the evicted keys."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [key for key, record in self._entries.items() if record['last_access'] < cutoff]
+            for key in expired:
+                self._remove_locked(key)
+            self.evictions += len(expired)
+            self._retry_pending_deletes_locked()
+            if self.spill_dir.exists():
+                # ডিরেক্টরির mtime আপডেট করা হলো, যাতে স্টার্টআপ cleanup এটিকে পুরনো মনে না করে
+                try:
+                    os.utime(self.spill_dir)
+                except OSError:
+                    pass
+
+        if expired:
+            logger.info(f"[{self.name}] Swept {len(expired)} expired entries.")
+        self._notify_evicted(expired)
+        return expired
+
+    def start_sweeper(self, interval_seconds):
+        """Starts the background TTL sweeper thread (idempotent)."""
+        with self._lock:
+            if self._sweeper is not None and self._sweeper.is_alive():
+                return
+            self._stop_event.clear()
+            self._sweeper = threading.Thread(
+                target=self._sweep_loop, args=(interval_seconds,),
+                name=f"{self.name}-sweeper", daemon=True
+            )
+            self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop_event.set()
+
+    def stats(self):
+        with self._lock:
+            spilled = sum(1 for record in self._entries.values() if record['path'] is not None)
+            return {
+                "entries": len(self._entries),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+                "total_bytes": self._memory_bytes + self._disk_bytes,
+                "spilled_entries": spilled,
+                "memory_budget": self.memory_budget,
+                "total_budget": self.total_budget,
+                "evictions": self.evictions,
+            }
+
+    # ------------------ internals ------------------
+
+    def _sweep_loop(self, interval_seconds):
+        while not self._stop_event.wait(interval_seconds):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"[{self.name}] Sweeper error: {e}")
+
+    def _map_file(self, path):
+        with open(path, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _write_spill_file(self, data):
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        path = self.spill_dir / f"{uuid.uuid4().hex}.blob"
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def _pick_spill_victims_locked(self):
+        """
+        Least-recently-used in-memory records to move to disk so the memory total gets back
+        within memory_budget. They stay in memory (and counted there) until _spill() has
+        written them; 'spilling' keeps concurrent writers from picking the same record twice.
+        """
+        victims = []
+        memory_bytes = self._memory_bytes
+        for key, record in self._entries.items():
+            if memory_bytes <= self.memory_budget:
+                break
+            if record['path'] is None and record['size'] > 0 and not record.get('spilling'):
+                record['spilling'] = True
+                memory_bytes -= record['size']
+                victims.append((key, record))
+        return victims
+
+    def _spill(self, victims):
+        # ১) লকের বাইরে ডিস্কে লেখা, যাতে get/stats/metrics আটকে না থাকে
+        # ২) লেখা সফল হলে তবেই লক নিয়ে রেকর্ড ও হিসাব বদলানো হয়
+        for key, record in victims:
+            try:
+                path = self._write_spill_file(record['data'])
+            except OSError as e:
+                logger.error(f"[{self.name}] Could not spill {key} to disk, keeping it in memory: {e}")
+                with self._lock:
+                    record['spilling'] = False
+                continue
+
+            with self._lock:
+                record['spilling'] = False
+                if self._entries.get(key) is not record:
+                    # লেখার মধ্যেই এন্ট্রিটি বাদ বা বদলে গেছে
+                    self._delete_file_locked(path)
+                    continue
+                record['path'] = path
+                record['data'] = None
+                self._memory_bytes -= record['size']
+                self._disk_bytes += record['size']
+
+    def _evict_over_budget_locked(self):
+        # মোট বাজেট ছাড়িয়ে গেলে LRU এন্ট্রি পুরোপুরি বাদ দেওয়া হয়
+        evicted = []
+        while self._entries and self._memory_bytes + self._disk_bytes > self.total_budget:
+            oldest_key = next(iter(self._entries))
+            self._remove_locked(oldest_key)
+            self.evictions += 1
+            evicted.append(oldest_key)
+        return evicted
+
+    def _remove_locked(self, key):
+        record = self._entries.pop(key)
+        if record['path'] is None:
+            self._memory_bytes -= record['size']
+        else:
+            self._disk_bytes -= record['size']
+            self._delete_file_locked(record['path'])
+
+    def _delete_file_locked(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            # Windows-এ ফাইলটি এখনও mmap করা থাকলে পরের sweep-এ আবার চেষ্টা করা হবে
+            self._pending_deletes.append(path)
+
+    def _retry_pending_deletes_locked(self):
+        pending, self._pending_deletes = self._pending_deletes, []
+        for path in pending:
+            self._delete_file_locked(path)
+
+    def _notify_evicted(self, keys):
+        for key in keys:
+            for callback in self._eviction_listeners:
+                try:
+                    callback(key)
+                except Exception as e:
+                    logger.error(f"[{self.name}] Eviction listener failed for {key}: {e}")
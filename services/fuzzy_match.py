@@ -0,0 +1,147 @@
+# services/fuzzy_match.py
+
+import re
+
+
+def _char_masks(pattern):
+    """{char: bitmask of the positions of char in pattern} (bit i = pattern[i])."""
+    masks = {}
+    for position, ch in enumerate(pattern):
+        masks[ch] = masks.get(ch, 0) | (1 << position)
+    return masks
+
+
+def _myers(masks, length, text, anchored=False):
+    """
+    Myers' bit-parallel edit distance (as formulated by Hyyrö): the whole column of the
+    dynamic-programming table is kept in two bit vectors (Python ints), so each character of
+    `text` costs a handful of integer operations instead of len(pattern) cell updates.
+
+    Yields (end, distance) for every prefix text[:end]: the fewest edits turning the pattern
+    into a substring of `text` ending at `end`, or, with `anchored`, into text[:end] itself.
+    """
+    full = (1 << length) - 1
+    high = 1 << (length - 1)
+    carry = 1 if anchored else 0
+    positive, negative, score = full, 0, length
+    for end, ch in enumerate(text, 1):
+        eq = masks.get(ch, 0)
+        vertical = eq | negative
+        horizontal = (((eq & positive) + positive) ^ positive) | eq
+        up = negative | (~(horizontal | positive) & full)
+        down = positive & horizontal
+        if up & high:
+            score += 1
+        elif down & high:
+            score -= 1
+        up = ((up << 1) | carry) & full
+        down = (down << 1) & full
+        positive = down | (~(vertical | up) & full)
+        negative = up & vertical
+        yield end, score
+
+
+def max_distance_for(pattern, max_distance):
+    """
+    The distance actually allowed for `pattern`: every one of the max_distance + 1 pieces
+    (see FuzzyMatcher) must keep at least two characters, so "cat" stays exact and a
+    short word never matches half the text.
+    """
+    return max(0, min(max_distance, len(pattern) // 2 - 1))
+
+
+class FuzzyMatcher:
+    """
+    Finds approximate occurrences of one pattern: substrings of the text that become the
+    pattern with at most `max_distance` insertions, deletions or substitutions (Levenshtein).
+    Pattern and text must already be case-folded (aho_corasick.fold_case).
+
+    The pattern is split into max_distance + 1 pieces; k edits can touch at most k of them,
+    so every occurrence contains one piece unchanged (the pigeonhole principle). The pieces
+    are found with one regex scan (in C), and the bit-parallel matcher (_myers) only runs on
+    the text around them, which keeps the search close to the speed of an exact search.
+    """
+
+    def __init__(self, pattern, max_distance):
+        if not pattern:
+            raise ValueError("Empty pattern.")
+        self.pattern = pattern
+        self.max_distance = max_distance_for(pattern, max_distance)
+        self.pieces = split_pieces(pattern, self.max_distance + 1)
+        # ফাঁকা lookahead তাই প্রতিটি অবস্থানে যেকোনো পিস শুরু হলেই ধরা পড়ে (ওভারল্যাপসহ)
+        alternatives = "|".join(re.escape(piece) for piece in sorted(set(self.pieces), key=len, reverse=True))
+        self._candidates = re.compile(f"(?=(?:{alternatives}))", re.DOTALL)
+        self._masks = _char_masks(pattern)
+        self._reversed_masks = _char_masks(pattern[::-1])
+
+    def distance(self, text):
+        """Edit distance between the pattern and the whole of `text`."""
+        if not text:
+            return len(self.pattern)
+        score = len(self.pattern)
+        for _, score in _myers(self._masks, len(self.pattern), text, anchored=True):
+            pass
+        return score
+
+    def finditer(self, text):
+        """Yields (start, end, distance) for each non-overlapping occurrence, ordered by offset."""
+        length = len(self.pattern)
+        reach = length + self.max_distance
+        previous_end = 0
+        for low, high in self._regions(text, reach):
+            for start, end, distance in self._search_region(text, low, high):
+                if start >= previous_end:
+                    previous_end = end
+                    yield start, end, distance
+
+    def _regions(self, text, reach):
+        """Merged [low, high) windows around every piece occurrence that could hold a match."""
+        low = high = None
+        for m in self._candidates.finditer(text):
+            position = m.start()
+            window_low, window_high = max(0, position - reach), min(len(text), position + reach)
+            if high is not None and window_low <= high:
+                high = window_high
+                continue
+            if high is not None:
+                yield low, high
+            low, high = window_low, window_high
+        if high is not None:
+            yield low, high
+
+    def _search_region(self, text, low, high):
+        # পরপর যেসব শেষ-অবস্থানে দূরত্ব সীমার মধ্যে, তাদের মধ্যে সবচেয়ে কম দূরত্বেরটি একটি ম্যাচ
+        # (সমান হলে পরেরটি, যাতে "helo" খুঁজলে "hel" নয়, পুরো "hello" হাইলাইট হয়)
+        best = None
+        for end, score in _myers(self._masks, len(self.pattern), text[low:high]):
+            if score <= self.max_distance:
+                if best is None or score <= best[1]:
+                    best = (low + end, score)
+            elif best is not None:
+                yield self._with_start(text, low, *best)
+                best = None
+        if best is not None:
+            yield self._with_start(text, low, *best)
+
+    def _with_start(self, text, low, end, distance):
+        """The start of the closest match ending at `end` (the longest one on ties, like the end)."""
+        length = len(self.pattern)
+        window_start = max(low, end - length - self.max_distance)
+        backwards = text[window_start:end][::-1]
+        start, best = end, None
+        for taken, score in _myers(self._reversed_masks, length, backwards, anchored=True):
+            if best is None or score <= best:
+                start, best = end - taken, score
+        return start, end, distance
+
+
+def split_pieces(pattern, count):
+    """`pattern` cut into `count` consecutive pieces of (nearly) equal length."""
+    size, extra = divmod(len(pattern), count)
+    pieces = []
+    position = 0
+    for index in range(count):
+        piece_length = size + (1 if index < extra else 0)
+        pieces.append(pattern[position:position + piece_length])
+        position += piece_length
+    return pieces
@@ -0,0 +1,254 @@
+# services/ingest_jobs.py
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from globals import (
+    FILE_STORAGE_DICT, FILE_STORAGE_LOCK, FILE_CLEANUP_HOURS, INGEST_WORKERS, INGEST_MAX_JOBS, INGEST_BATCH_FILES
+)
+from .file_reader import index_content
+from .trigram_index import CORPUS_INDEX
+from .readers.registry import get_reader
+from .search_executor import iter_extract
+from .metrics import METRICS, Counter, CallbackMetric
+
+logger = logging.getLogger("ingest_jobs")
+
+JOB_STATES = ("queued", "running", "done", "failed", "cancelled")
+FINISHED_STATES = frozenset(("done", "failed", "cancelled"))
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class IngestJob:
+    """
+    One uploaded corpus being prepared for search. Each file (already in FILE_STORAGE_DICT
+    under its 'file_id') goes from "pending" to "ready", "unsupported" or "failed"; every
+    change bumps `version` and wakes wait_for_change() (the SSE progress stream).
+    """
+
+    def __init__(self, job_id, files):
+        self.id = job_id
+        self.files = files  # [{'file_id', 'name', 'path', 'size', 'hash', 'status', ...}]
+        self.state = "queued"
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.error = None
+        self.version = 0
+        self.cancel_event = threading.Event()
+        self._changed = threading.Condition()
+
+    def update(self, **fields):
+        with self._changed:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.version += 1
+            self._changed.notify_all()
+
+    def set_file(self, index, **fields):
+        with self._changed:
+            self.files[index].update(fields)
+            self.version += 1
+            self._changed.notify_all()
+
+    def wait_for_change(self, version, timeout):
+        """Blocks until `version` is out of date or `timeout` seconds pass; returns the current version."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    @property
+    def finished_state(self):
+        return self.state in FINISHED_STATES
+
+    def counts(self):
+        counts = {"pending": 0, "ready": 0, "unsupported": 0, "failed": 0}
+        for entry in self.files:
+            counts[entry['status']] += 1
+        return counts
+
+    def snapshot(self, include_files=False):
+        with self._changed:
+            counts = self.counts()
+            snapshot = {
+                "job_id": self.id,
+                "state": self.state,
+                "version": self.version,
+                "total": len(self.files),
+                "processed": len(self.files) - counts["pending"],
+                "counts": counts,
+                "created": self.created,
+                "started": self.started,
+                "finished": self.finished,
+                "error": self.error,
+            }
+            if include_files:
+                snapshot["files"] = [
+                    {key: entry.get(key) for key in ("file_id", "name", "path", "size", "status", "message")}
+                    for entry in self.files
+                ]
+        return snapshot
+
+
+class IngestJobManager:
+    """
+    Runs ingestion jobs on a small thread pool (at most `workers` at a time, at most `max_jobs`
+    queued or running), so uploads return at once and request workers stay free. A job
+    extracts its files through iter_extract (the search process pool) into EXTRACTION_CACHE
+    and CORPUS_INDEX, batch by batch, owning its index documents under the job id. Finished
+    jobs are forgotten after `ttl_seconds`; deleted or forgotten jobs release their documents.
+    """
+
+    def __init__(self, workers, max_jobs, batch_files, ttl_seconds, temp_uploads_dir='temp_uploads'):
+        self.workers = max(1, workers)
+        self.max_jobs = max_jobs
+        self.batch_files = max(1, batch_files)
+        self.ttl_seconds = ttl_seconds
+        self.temp_uploads_dir = temp_uploads_dir
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def submit(self, files):
+        """Queues a job for `files` (see IngestJob); raises JobQueueFull when too many jobs are active."""
+        with self._lock:
+            self._expire_locked()
+            active = sum(1 for job in self._jobs.values() if not job.finished_state)
+            if active >= self.max_jobs:
+                raise JobQueueFull(f"Too many ingestion jobs in progress ({active}); try again later.")
+            job = IngestJob(uuid.uuid4().hex, [dict(entry, status="pending") for entry in files])
+            self._jobs[job.id] = job
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingest")
+            self._executor.submit(self._run, job)
+        logger.info(f"Queued ingestion job {job.id} with {len(files)} files")
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            self._expire_locked()
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            self._expire_locked()
+            return list(self._jobs.values())
+
+    def delete(self, job_id):
+        """Cancels a job (if still running) and drops it with its stored files. Returns False if unknown."""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job is None:
+            return False
+        job.cancel_event.set()
+        if not job.finished_state:
+            job.update(state="cancelled", finished=time.time())
+            JOBS_FINISHED.inc(state="cancelled")
+        self._drop_files(job)
+        CORPUS_INDEX.release(job.id)
+        return True
+
+    def state_counts(self):
+        with self._lock:
+            counts = dict.fromkeys(JOB_STATES, 0)
+            for job in self._jobs.values():
+                counts[job.state] += 1
+        return counts
+
+    def shutdown(self):
+        with self._lock:
+            for job in self._jobs.values():
+                job.cancel_event.set()
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _expire_locked(self):
+        cutoff = time.time() - self.ttl_seconds
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_state and job.finished < cutoff:
+                del self._jobs[job_id]
+                CORPUS_INDEX.release(job.id)
+
+    @staticmethod
+    def _drop_files(job):
+        with FILE_STORAGE_LOCK:
+            for entry in job.files:
+                FILE_STORAGE_DICT.pop(entry['file_id'], None)
+
+    def _run(self, job):
+        if job.cancel_event.is_set():
+            return
+        job.update(state="running", started=time.time())
+        try:
+            self._ingest(job)
+        finally:
+            # delete() চলমান ব্যাচের আগেই মালিকানা ছেড়ে দিতে পারে; শেষ ব্যাচের ডকুমেন্টগুলোও ছাড়া হলো
+            if job.cancel_event.is_set():
+                CORPUS_INDEX.release(job.id)
+
+    def _ingest(self, job):
+        try:
+            for start in range(0, len(job.files), self.batch_files):
+                if job.cancel_event.is_set():
+                    return
+                self._ingest_batch(job, range(start, min(start + self.batch_files, len(job.files))))
+        except Exception as e:
+            logger.exception(f"Ingestion job {job.id} failed")
+            job.update(state="failed", error=str(e), finished=time.time())
+            JOBS_FINISHED.inc(state="failed")
+            return
+        if not job.cancel_event.is_set():
+            job.update(state="done", finished=time.time())
+            JOBS_FINISHED.inc(state="done")
+            logger.info(f"Ingestion job {job.id} done in {job.finished - job.started:.2f} s: {job.counts()}")
+
+    def _ingest_batch(self, job, indexes):
+        items = []
+        for index in indexes:
+            entry = job.files[index]
+            if get_reader(entry['name']) is None:
+                job.set_file(index, status="unsupported", message="Unsupported file type.")
+                continue
+            with FILE_STORAGE_LOCK:
+                stored = FILE_STORAGE_DICT.get(entry['file_id'])
+            if stored is None:
+                job.set_file(index, status="failed", message="File expired before it was ingested.")
+                continue
+            items.append((index, {'data': stored['data'], 'file_name': entry['name'], 'hash': entry['hash']}))
+
+        extraction = iter_extract([item for _, item in items], self.temp_uploads_dir)
+        try:
+            for position, content in extraction:
+                index, item = items[position]
+                if job.cancel_event.is_set():
+                    return
+                if not content:
+                    message = get_reader(item['file_name']).failure_message(item['file_name'])
+                    job.set_file(index, status="failed", message=message)
+                    continue
+                # এক্সট্র্যাকশন ক্যাশে আছে, তাই এখানে শুধু ট্রাইগ্রাম ইনডেক্স তৈরি হয় (স্ট্রিম করা ফাইলে None)
+                doc_id = index_content(item['data'], item['file_name'], self.temp_uploads_dir, item['hash'], job.id)
+                job.set_file(index, status="ready", doc_id=doc_id)
+        finally:
+            extraction.close()
+
+
+# 🌟 সার্ভারের সব ইনজেশন জব 🌟
+INGEST_JOBS = IngestJobManager(
+    INGEST_WORKERS, INGEST_MAX_JOBS, INGEST_BATCH_FILES, ttl_seconds=FILE_CLEANUP_HOURS * 3600
+)
+
+JOBS_FINISHED = METRICS.register(Counter(
+    "finder_ingest_jobs_finished_total", "Ingestion jobs that finished, by final state.", ("state",),
+))
+METRICS.register(CallbackMetric(
+    "finder_ingest_jobs", "Ingestion jobs currently known, by state.", ("state",),
+    lambda: [((state,), count) for state, count in INGEST_JOBS.state_counts().items()],
+))
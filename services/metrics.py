@@ -0,0 +1,324 @@
+# services/metrics.py
+
+import heapq
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from globals import FILE_STORAGE_DICT, CONTENT_STORE_DICT
+from .extraction_cache import EXTRACTION_CACHE
+from .readers.registry import all_readers
+
+# সেকেন্ডে; ছোট ফাইলের স্ক্যান মিলিসেকেন্ডে হয়, তাই নিচের দিকে বেশি বাকেট
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """A monotonically increasing count per label set (the name should end in _total)."""
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram per label set, as Prometheus expects."""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # key -> [bucket counts..., +Inf count], sum
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][position] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        names = self.labelnames + ("le",)
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(names, key + (_format_value(bound),))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class CallbackMetric(_Metric):
+    """
+    A gauge (or counter) whose values are read at scrape time: `callback` returns
+    [(label values tuple, value), ...].
+    """
+
+    def __init__(self, name, documentation, labelnames, callback, kind="gauge"):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self.callback = callback
+
+    def samples(self):
+        for key, value in self.callback():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics)
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+# 🌟 /metrics এ দেখানো সব মেট্রিক 🌟
+METRICS = MetricsRegistry()
+
+FILE_STAGE_SECONDS = METRICS.register(Histogram(
+    "finder_file_stage_seconds",
+    "Time spent on one file per stage: extract (reader), scan (matching), view (viewer text).",
+    ("stage", "file_type"),
+))
+FILES_SEARCHED = METRICS.register(Counter(
+    "finder_files_searched_total", "Files searched, by outcome (ok, skipped, unsupported, error).",
+    ("file_type", "outcome"),
+))
+FILE_BYTES = METRICS.register(Counter(
+    "finder_file_bytes_processed_total", "Bytes of file content searched.", ("file_type",),
+))
+MATCHES = METRICS.register(Counter(
+    "finder_matches_total", "Matches found (before pagination limits).", ("file_type",),
+))
+EXTRACTION_FAILURES = METRICS.register(Counter(
+    "finder_extraction_failures_total", "Files whose content could not be read or searched.", ("file_type",),
+))
+REQUEST_STAGE_SECONDS = METRICS.register(Histogram(
+    "finder_request_stage_seconds",
+    "Time spent per search request stage: walk (server-side scan), parse, index, search, serialize, total.",
+    ("route", "stage"),
+))
+HTTP_REQUEST_SECONDS = METRICS.register(Histogram(
+    "finder_http_request_duration_seconds", "HTTP request latency.", ("endpoint", "method", "status"),
+))
+
+
+def _storage_values(field):
+    def collect():
+        return [((name,), store.stats()[field]) for name, store in
+                (("file_storage", FILE_STORAGE_DICT), ("content_store", CONTENT_STORE_DICT))]
+    return collect
+
+
+def _storage_bytes():
+    values = []
+    for name, store in (("file_storage", FILE_STORAGE_DICT), ("content_store", CONTENT_STORE_DICT)):
+        stats = store.stats()
+        values.append(((name, "memory"), stats["memory_bytes"]))
+        values.append(((name, "disk"), stats["disk_bytes"]))
+    return values
+
+
+METRICS.register(CallbackMetric(
+    "finder_storage_entries", "Uploaded files held by each store.", ("store",), _storage_values("entries"),
+))
+METRICS.register(CallbackMetric(
+    "finder_storage_bytes", "Bytes held by each store, in memory and spilled to disk.", ("store", "tier"),
+    _storage_bytes,
+))
+METRICS.register(CallbackMetric(
+    "finder_extraction_cache_entries", "Entries in the extraction cache.", (),
+    lambda: [((), EXTRACTION_CACHE.stats()["entries"])],
+))
+METRICS.register(CallbackMetric(
+    "finder_extraction_cache_bytes", "Estimated bytes held by the extraction cache.", (),
+    lambda: [((), EXTRACTION_CACHE.stats()["bytes"])],
+))
+METRICS.register(CallbackMetric(
+    "finder_extraction_cache_lookups_total", "Extraction cache lookups.", ("result",),
+    lambda: [(("hit",), EXTRACTION_CACHE.hits), (("miss",), EXTRACTION_CACHE.misses)],
+    kind="counter",
+))
+
+# 🚀 ওয়ার্কার চালু হওয়ার সময় (server.py সেট করে) ও কোন রিডার কতক্ষণে লোড হয়েছে
+STARTUP_SECONDS = {}
+
+METRICS.register(CallbackMetric(
+    "finder_startup_seconds", "Seconds from the start of the server import until the app was ready.", ("phase",),
+    lambda: [((phase,), seconds) for phase, seconds in STARTUP_SECONDS.items()],
+))
+METRICS.register(CallbackMetric(
+    "finder_reader_load_seconds", "Seconds the first use of each reader spent importing it (absent until loaded).",
+    ("reader",),
+    lambda: [((reader.name,), reader.load_seconds) for reader in all_readers() if reader.load_seconds is not None],
+))
+
+
+# ------------------ প্রতি ফাইলের টাইমিং ------------------
+def new_file_stats(size=0):
+    """Per-file numbers carried back with a search result (also from worker processes)."""
+    return {"bytes": size, "extract": 0.0, "scan": 0.0}
+
+
+@contextmanager
+def timed_stage(stats, stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats[stage] += time.perf_counter() - start
+
+
+def record_file_search(file_type, result, status_code, stats):
+    """Adds one searched file's outcome and stats to the metrics."""
+    if status_code >= 500:
+        outcome = "error"
+        EXTRACTION_FAILURES.inc(file_type=file_type)
+    elif status_code != 200:
+        outcome = "unsupported"
+    elif result.get("skipped"):
+        outcome = "skipped"
+    else:
+        outcome = "ok"
+        MATCHES.inc(result.get("count", len(result.get("matches", ()))), file_type=file_type)
+    FILES_SEARCHED.inc(file_type=file_type, outcome=outcome)
+    if stats:
+        FILE_BYTES.inc(stats["bytes"], file_type=file_type)
+        for stage in ("extract", "scan"):
+            if stats[stage]:
+                FILE_STAGE_SECONDS.observe(stats[stage], stage=stage, file_type=file_type)
+
+
+# ------------------ প্রতি রিকোয়েস্টের টাইমিং ------------------
+class RequestTimer:
+    """
+    Stage timings of one search request. lap(stage) charges the time since the previous lap
+    to `stage` (walk, parse, index, search, serialize); add_file() sums the per-file extract/scan
+    times, which overlap when files are searched in parallel and so can exceed "search",
+    and remembers each file's own times for slowest_files().
+    """
+
+    LAP_STAGES = ("parse", "walk", "index", "search", "serialize")
+
+    def __init__(self, route):
+        self.route = route
+        self.started = self._mark = time.perf_counter()
+        self.stages = {}
+        self._files = []  # (extract + scan, file_path, stats)
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self._mark
+        self._mark = now
+
+    def add_file(self, file_path, stats):
+        for stage in ("extract", "scan"):
+            self.stages[stage] = self.stages.get(stage, 0.0) + stats[stage]
+        self._files.append((stats["extract"] + stats["scan"], file_path, stats))
+
+    def slowest_files(self, count):
+        """The `count` files that took longest to extract and scan, slowest first."""
+        return [
+            {
+                "path": file_path,
+                "bytes": stats["bytes"],
+                "extract_ms": round(stats["extract"] * 1000, 2),
+                "scan_ms": round(stats["scan"] * 1000, 2),
+                "total_ms": round(seconds * 1000, 2),
+            }
+            for seconds, file_path, stats in heapq.nlargest(count, self._files, key=lambda entry: entry[0])
+        ]
+
+    def summary(self):
+        """Compact breakdown in milliseconds, for the response body."""
+        summary = {stage: round(seconds * 1000, 2) for stage, seconds in self.stages.items()}
+        summary["total"] = round((time.perf_counter() - self.started) * 1000, 2)
+        return summary
+
+    def server_timing(self):
+        """Value of the Server-Timing response header."""
+        return ", ".join(f"{stage};dur={ms}" for stage, ms in self.summary().items())
+
+    def finish(self):
+        for stage in self.LAP_STAGES:
+            if stage in self.stages:
+                REQUEST_STAGE_SECONDS.observe(self.stages[stage], route=self.route, stage=stage)
+        REQUEST_STAGE_SECONDS.observe(time.perf_counter() - self.started, route=self.route, stage="total")
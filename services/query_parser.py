@@ -0,0 +1,316 @@
+# services/query_parser.py
+
+import re
+from heapq import merge
+
+from .aho_corasick import AhoCorasick, fold_case
+from .fuzzy_match import FuzzyMatcher
+
+# একটি কুয়েরিতে এর বেশি টার্ম রাখা যাবে না
+MAX_QUERY_TERMS = 64
+
+# ফাজি সার্চে প্রতিটি টার্মে সর্বোচ্চ এতগুলো ভুল (এডিট) মানা হয়
+MAX_FUZZY_DISTANCE = 3
+
+QUERY_SCOPES = ("line", "file")
+
+# "literal" (ডিফল্ট): পুরো কুয়েরি একটি টার্ম; "boolean": কোট, AND/OR/NOT ও বন্ধনী মানা হয়
+QUERY_SYNTAXES = ("literal", "boolean")
+
+_TOKEN_PATTERN = re.compile(r'\s*(?:(?P<phrase>"[^"]*"?)|(?P<paren>[()])|(?P<word>[^\s()"]+))')
+_OPERATORS = {"AND", "OR", "NOT"}
+# boolean মোডেও কুয়েরিতে এগুলোর কোনোটি না থাকলে পুরো কুয়েরি একটি লিটারাল টার্ম
+_BOOLEAN_SYNTAX = re.compile(r'"|(?<![^\s()])(?:AND|OR|NOT)(?![^\s()])')
+
+
+class QuerySyntaxError(ValueError):
+    pass
+
+
+class Query:
+    """
+    A parsed search query.
+
+    Boolean syntax (only with syntax "boolean"):
+        hello world           one phrase (adjacent plain words stay a single term, as before)
+        "foo" "bar"           two terms, both required (implicit AND)
+        foo AND bar           both terms; AND, OR, NOT must be uppercase
+        foo OR bar OR baz     any of the terms
+        foo NOT bar           foo without bar
+        (foo OR bar) AND baz  parentheses group
+
+    With scope "line" the expression is evaluated per line (per page for PDFs); with scope
+    "file" it is evaluated over the whole file. Only lines/files containing at least one
+    term that is not negated are ever reported.
+
+    With the default syntax "literal" the whole query is one term, searched exactly as typed
+    (so `print("hello")` or `IS NOT NULL` find themselves). In boolean mode a query without
+    quotes or uppercase AND/OR/NOT is still one literal term. A single-term query is "simple"
+    and uses the original single-phrase search.
+
+    With `max_distance` > 0 (fuzzy search) every term also matches text that is at most that
+    many insertions, deletions or substitutions away (see services/fuzzy_match.py); such a
+    query is never "simple", so every reader takes its term-based path.
+    """
+
+    def __init__(self, text, root, terms, positive, scope, max_distance=0, syntax="literal"):
+        self.text = text
+        self.root = root            # ("term", index) | ("and"/"or", (children...)) | ("not", child)
+        self.terms = terms          # tuple of term strings
+        self.positive = positive    # frozenset of indexes of terms that appear un-negated
+        self.scope = scope
+        self.max_distance = max_distance
+        self.syntax = syntax
+        self._automata = {}
+
+    @property
+    def is_simple(self):
+        return self.root[0] == "term" and not self.max_distance
+
+    @property
+    def simple_text(self):
+        return self.terms[0]
+
+    def matches(self, present):
+        """Evaluates the expression for a set of term indexes found in one line/page/file."""
+        return _evaluate(self.root, present)
+
+    def find_terms(self, text, collapse_whitespace=False):
+        """
+        Finds every occurrence of every term (case-insensitive) in one scan of `text`.
+        Returns [(start, end, term_index), ...]. With `collapse_whitespace`, whitespace inside
+        a term is matched as a single space (the caller collapses whitespace in the text too).
+        """
+        return list(self.iter_terms(text, collapse_whitespace))
+
+    def iter_terms(self, text, collapse_whitespace=False):
+        """Like find_terms, but lazy (ordered by end offset), so the scan can stop early."""
+        automaton = self._automaton(collapse_whitespace)
+        if not self.max_distance:
+            return automaton.finditer(fold_case(text))
+        folded = fold_case(text)
+        # প্রতিটি টার্মের ম্যাচ আলাদা ক্রমে আসে; শেষ অফসেট অনুযায়ী মিলিয়ে একটি ক্রম করা হলো
+        hits = [_tagged(matcher.finditer(folded), term) for term, matcher in enumerate(automaton)]
+        return merge(*hits, key=lambda hit: hit[1])
+
+    def distance(self, matched_text, term, collapse_whitespace=False):
+        """Edit distance between a term and the text it matched (always 0 without fuzzy search)."""
+        if not self.max_distance:
+            return 0
+        return self._automaton(collapse_whitespace)[term].distance(fold_case(matched_text))
+
+    def prefilter_terms(self):
+        """
+        Strings of which at least one occurs (case-insensitively) in every line/page/file this
+        query reports: the non-negated terms, or with fuzzy search the pieces of them that
+        every approximate match contains unchanged. Used for the trigram index and byte pre-checks.
+        """
+        if not self.max_distance:
+            return [self.terms[term] for term in sorted(self.positive)]
+        matchers = self._automaton(False)
+        return [piece for term in sorted(self.positive) for piece in matchers[term].pieces]
+
+    def _automaton(self, collapse_whitespace):
+        """The AhoCorasick automaton of the terms, or with fuzzy search one FuzzyMatcher per term."""
+        automaton = self._automata.get(collapse_whitespace)
+        if automaton is None:
+            patterns = [fold_case(" ".join(term.split()) if collapse_whitespace else term) for term in self.terms]
+            if self.max_distance:
+                automaton = [FuzzyMatcher(pattern, self.max_distance) for pattern in patterns]
+            else:
+                automaton = AhoCorasick(patterns)
+            self._automata[collapse_whitespace] = automaton
+        return automaton
+
+    def __getstate__(self):
+        # অটোমেটন প্রসেস পুলে পাঠানো হয় না, ওয়ার্কারে আবার তৈরি হয়
+        state = self.__dict__.copy()
+        state["_automata"] = {}
+        return state
+
+    def __repr__(self):
+        fuzzy = f", max_distance={self.max_distance}" if self.max_distance else ""
+        return f"Query({self.text!r}, scope={self.scope!r}, syntax={self.syntax!r}{fuzzy})"
+
+
+def _tagged(hits, term):
+    """(start, end, distance) fuzzy hits as (start, end, term) hits."""
+    for start, end, _ in hits:
+        yield start, end, term
+
+
+def _evaluate(node, present):
+    kind = node[0]
+    if kind == "term":
+        return node[1] in present
+    if kind == "not":
+        return not _evaluate(node[1], present)
+    if kind == "and":
+        return all(_evaluate(child, present) for child in node[1])
+    return any(_evaluate(child, present) for child in node[1])
+
+
+def _tokenize(text):
+    """
+    Returns (kind, value) tokens: ("op", "AND"), ("paren", "("), ("term", "...").
+    Runs of plain words become a single term (the original text between them is kept).
+    """
+    tokens = []
+    run_start = run_end = None
+    position = 0
+
+    def flush():
+        if run_start is not None:
+            tokens.append(("term", text[run_start:run_end]))
+
+    while position < len(text):
+        m = _TOKEN_PATTERN.match(text, position)
+        if m is None or m.end() == position:
+            break
+        position = m.end()
+
+        word = m.group("word")
+        if word is not None and word not in _OPERATORS:
+            if run_start is None:
+                run_start = m.start("word")
+            run_end = m.end("word")
+            continue
+
+        flush()
+        run_start = run_end = None
+
+        if word is not None:
+            tokens.append(("op", word))
+        elif m.group("paren"):
+            tokens.append(("paren", m.group("paren")))
+        else:
+            phrase = m.group("phrase")
+            if len(phrase) < 2 or not phrase.endswith('"'):
+                raise QuerySyntaxError("Unterminated quote in query.")
+            if not phrase[1:-1].strip():
+                raise QuerySyntaxError("Empty quoted term in query.")
+            tokens.append(("term", phrase[1:-1]))
+
+    flush()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+        self.terms = []
+        self.positive = set()
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def parse(self):
+        node = self.parse_or(negated=False)
+        if self.position < len(self.tokens):
+            raise QuerySyntaxError(f"Unexpected '{self.peek()[1]}' in query.")
+        return node
+
+    def parse_or(self, negated):
+        children = [self.parse_and(negated)]
+        while self.peek() == ("op", "OR"):
+            self.take()
+            children.append(self.parse_and(negated))
+        return children[0] if len(children) == 1 else ("or", tuple(children))
+
+    def parse_and(self, negated):
+        children = [self.parse_unary(negated)]
+        while True:
+            kind, value = self.peek()
+            if (kind, value) == ("op", "AND"):
+                self.take()
+            elif not (kind == "term" or (kind, value) in (("op", "NOT"), ("paren", "("))):
+                break
+            # পাশাপাশি দুটি টার্ম/গ্রুপ থাকলে implicit AND
+            children.append(self.parse_unary(negated))
+        return children[0] if len(children) == 1 else ("and", tuple(children))
+
+    def parse_unary(self, negated):
+        if self.peek() == ("op", "NOT"):
+            self.take()
+            return ("not", self.parse_unary(not negated))
+        return self.parse_primary(negated)
+
+    def parse_primary(self, negated):
+        kind, value = self.take()
+        if kind == "term":
+            return ("term", self.add_term(value, negated))
+        if (kind, value) == ("paren", "("):
+            node = self.parse_or(negated)
+            if self.take() != ("paren", ")"):
+                raise QuerySyntaxError("Missing ')' in query.")
+            return node
+        if kind is None:
+            raise QuerySyntaxError("Query ends where a term was expected.")
+        raise QuerySyntaxError(f"Expected a term but found '{value}'.")
+
+    def add_term(self, term, negated):
+        # একই টার্ম একাধিকবার থাকলে অটোমেটনে একবারই রাখা হয়
+        folded = [fold_case(t) for t in self.terms]
+        if fold_case(term) in folded:
+            index = folded.index(fold_case(term))
+        else:
+            if len(self.terms) >= MAX_QUERY_TERMS:
+                raise QuerySyntaxError(f"Too many terms in query (max {MAX_QUERY_TERMS}).")
+            index = len(self.terms)
+            self.terms.append(term)
+        if not negated:
+            self.positive.add(index)
+        return index
+
+
+def parse_distance(value):
+    """The 'fuzzy' request parameter: a maximum edit distance from 0 to MAX_FUZZY_DISTANCE (empty = 0)."""
+    if value is None or value is False or (isinstance(value, str) and not value.strip()):
+        return 0
+    try:
+        distance = int(value)
+    except (TypeError, ValueError):
+        distance = None
+    if distance is None or not 0 <= distance <= MAX_FUZZY_DISTANCE:
+        raise QuerySyntaxError(f"Invalid fuzzy distance '{value}'. Use a number from 0 to {MAX_FUZZY_DISTANCE}.")
+    return distance
+
+
+def parse_query(text, scope="line", fuzzy=0, syntax="literal"):
+    """
+    Parses a search query (see Query). `fuzzy` is the maximum edit distance per term (see
+    parse_distance); `syntax` is one of QUERY_SYNTAXES. Raises QuerySyntaxError on invalid input.
+    """
+    text = (text or "").strip()
+    scope = (scope or "line").strip().lower()
+    if scope not in QUERY_SCOPES:
+        raise QuerySyntaxError(f"Invalid scope '{scope}'. Use one of: {', '.join(QUERY_SCOPES)}.")
+    syntax = (syntax or "literal").strip().lower()
+    if syntax not in QUERY_SYNTAXES:
+        raise QuerySyntaxError(f"Invalid syntax '{syntax}'. Use one of: {', '.join(QUERY_SYNTAXES)}.")
+    max_distance = parse_distance(fuzzy)
+
+    if not text:
+        raise QuerySyntaxError("Empty query.")
+    if syntax == "literal" or not _BOOLEAN_SYNTAX.search(text):
+        return Query(text, ("term", 0), (text,), frozenset({0}), scope, max_distance, syntax)
+
+    tokens = _tokenize(text)
+
+    parser = _Parser(tokens)
+    root = parser.parse()
+    if not parser.positive:
+        raise QuerySyntaxError("Query needs at least one term that is not negated.")
+
+    return Query(text, root, tuple(parser.terms), frozenset(parser.positive), scope, max_distance, syntax)
+
+
+def as_query(query):
+    """Accepts a Query or a plain query string (parsed with the default scope)."""
+    return query if isinstance(query, Query) else parse_query(query)
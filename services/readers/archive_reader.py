@@ -0,0 +1,149 @@
+# services/readers/archive_reader.py
+
+import errno
+import io
+import logging
+import zipfile
+import zlib
+
+from globals import ARCHIVE_MAX_TOTAL_BYTES, ARCHIVE_MAX_MEMBERS
+from .registry import get_reader
+
+logger = logging.getLogger("archive_reader")
+
+# আর্কাইভের ভেতরের পাথ এভাবে দেখানো হয়: archive.zip!/inner/path
+MEMBER_SEPARATOR = "!/"
+
+# মেম্বার পড়ার সময় একবারে এতটুকু আনকম্প্রেস করা হয়
+READ_CHUNK_BYTES = 1024 * 1024
+
+
+class ArchiveLimits:
+    """
+    What is left to read from one archive, nested archives included: uncompressed bytes and
+    members. Once a limit is hit, `exceeded` says which one and no further member is read.
+    """
+
+    def __init__(self, max_bytes=ARCHIVE_MAX_TOTAL_BYTES, max_members=ARCHIVE_MAX_MEMBERS):
+        self.max_bytes = max_bytes
+        self.max_members = max_members
+        self.bytes_left = max_bytes
+        self.members_left = max_members
+        self.exceeded = None
+
+    def stop(self, reason):
+        if self.exceeded is None:
+            self.exceeded = reason
+        return False
+
+    def stop_on_size(self):
+        return self.stop(f"more than {self.max_bytes // (1024 * 1024)} MB uncompressed")
+
+    def allows(self, info):
+        if self.exceeded is not None:
+            return False
+        if self.members_left <= 0:
+            return self.stop(f"more than {self.max_members} members")
+        # ঘোষিত আকার দেখে আগেই থামা; ভুল আকার দেওয়া থাকলেও পড়ার সময় আবার যাচাই হয়
+        if info.file_size > self.bytes_left:
+            return self.stop_on_size()
+        return True
+
+
+class _BufferFile(io.RawIOBase):
+    """
+    A read-only, seekable file over a buffer (bytes or mmap) that doesn't copy it. zipfile
+    needs seekable() and friends, which an mmap doesn't have.
+    """
+
+    def __init__(self, data):
+        super().__init__()
+        self._view = memoryview(data).cast('B')
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        chunk = self._view[self._position:self._position + len(buffer)]
+        size = len(chunk)
+        buffer[:size] = chunk
+        self._position += size
+        return size
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        if offset < 0:
+            # আসল ফাইলের মতো OSError, যাতে zipfile খুব ছোট ফাইলকে BadZipFile হিসেবে ধরে
+            raise OSError(errno.EINVAL, f"Negative seek position {offset}")
+        self._position = offset
+        return offset
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        # mmap বন্ধ করা যায় যাতে, তাই memoryview ছেড়ে দেওয়া হলো
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+def is_wanted(name):
+    """
+    Like the client's folder filter: a searchable extension, no "~$" lock files and no
+    macOS resource forks.
+    """
+    base_name = name.rsplit('/', 1)[-1]
+    if not base_name or base_name.startswith('~$') or name.startswith('__MACOSX/'):
+        return False
+    return get_reader(base_name) is not None
+
+
+def _read_member(archive, info, limits):
+    """The member's bytes, or None past the byte limit (read chunk by chunk, never trusting the header)."""
+    chunks = []
+    size = 0
+    with archive.open(info) as member:
+        while True:
+            chunk = member.read(min(READ_CHUNK_BYTES, limits.bytes_left - size + 1))
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > limits.bytes_left:
+                limits.stop_on_size()
+                return None
+            chunks.append(chunk)
+    limits.bytes_left -= size
+    limits.members_left -= 1
+    return b"".join(chunks)
+
+
+def iter_members(data, limits):
+    """
+    Yields (inner_path, bytes) for every searchable member (see is_wanted) of a .zip archive
+    (bytes or mmap), in archive order, decompressed in memory (nothing is written to disk).
+    Stops at `limits` (ArchiveLimits). Encrypted or corrupt members are skipped.
+    Raises zipfile.BadZipFile if `data` isn't a zip archive.
+    """
+    with _BufferFile(data) as stream, zipfile.ZipFile(stream) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not is_wanted(info.filename):
+                continue
+            if not limits.allows(info):
+                return
+            try:
+                member_data = _read_member(archive, info, limits)
+            except (RuntimeError, NotImplementedError, zipfile.BadZipFile, zlib.error) as e:
+                # এনক্রিপ্ট করা বা অসমর্থিত কম্প্রেশনের মেম্বার বাদ, বাকিগুলো সার্চ হয়
+                logger.warning(f"Skipping archive member {info.filename}: {e}")
+                continue
+            if member_data is None:
+                return
+            yield info.filename, member_data
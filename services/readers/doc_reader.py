@@ -2,62 +2,261 @@ import logging
 import subprocess
 import os
 import shutil
+import signal
 import platform
 import tempfile
+import threading
+import queue
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from pathlib import Path
+
+from .word97_reader import extract_word97_text
+from globals import (
+    TEMP_DIR_PATH, LIBREOFFICE_WORKERS, LIBREOFFICE_BATCH_SIZE, LIBREOFFICE_TIMEOUT_SECONDS,
+    LIBREOFFICE_JOB_TIMEOUT_SECONDS, LIBREOFFICE_QUEUE_SIZE
+)
 
 logger = logging.getLogger("doc_reader")
 
-def get_doc_content(file_obj, file_name, temp_uploads_dir):
-    full_text = ""
-    input_file_path = os.path.join(temp_uploads_dir, file_name)
-    output_dir = tempfile.mkdtemp()
-    
+# UTF-8 এ এক্সপোর্ট নিশ্চিত করা হলো, যাতে সিস্টেম এনকোডিং এর উপর নির্ভর করতে না হয়
+TEXT_EXPORT_FILTER = 'txt:Text (encoded):UTF8'
+
+# একটি ব্যাচে এর বেশি ফাইল থাকলে টাইমআউট প্রতিটি অতিরিক্ত ফাইলের জন্য এতটুকু বাড়ে
+BATCH_SECONDS_PER_EXTRA_FILE = 10
+
+
+def _libreoffice_path():
+    # Determine the LibreOffice executable path based on the operating system
+    if platform.system() == 'Windows':
+        return 'soffice.exe'
+    elif platform.system() == 'Darwin':  # macOS
+        return '/Applications/LibreOffice.app/Contents/MacOS/soffice'
+    else:  # Linux
+        return shutil.which('libreoffice') or shutil.which('soffice') or 'libreoffice'
+
+
+def _kill_process_tree(process):
+    # 'libreoffice' একটি wrapper, আসল soffice.bin তার child প্রসেস, তাই পুরো গ্রুপ বন্ধ করা হয়
     try:
-        # Save the uploaded file to a temporary location
-        with open(input_file_path, "wb") as f:
-            f.write(file_obj.read())
-
-        # Determine the LibreOffice executable path based on the operating system
-        if platform.system() == 'Windows':
-            libreoffice_path = 'soffice.exe'
-        elif platform.system() == 'Darwin':  # macOS
-            libreoffice_path = '/Applications/LibreOffice.app/Contents/MacOS/soffice'
-        else:  # Linux
-            libreoffice_path = 'libreoffice'
-
-        # Convert the .doc file to a plain text file using LibreOffice
+        if os.name == 'nt':
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(process.pid)], capture_output=True)
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except Exception as e:
+        logger.error(f"Could not kill LibreOffice process {process.pid}: {e}")
+        process.kill()
+
+
+class _DocJob:
+    def __init__(self, data, file_name, temp_uploads_dir):
+        self.data = data
+        self.file_name = file_name
+        self.temp_uploads_dir = temp_uploads_dir
+        self.future = Future()
+        self.job_dir = None
+        self.input_path = None
+
+
+class DocConversionPool:
+    """
+    Converts .doc files to text with a fixed number of LibreOffice worker threads.
+
+    - Each worker has its own LibreOffice profile (-env:UserInstallation), so workers can run
+      in parallel (a shared profile makes concurrent instances fail) and the profile stays warm.
+    - A worker takes every job waiting in the queue (up to `batch_size`) and converts them in a
+      single soffice invocation, so the multi-second startup is paid once per batch, not per file.
+    - Each job's input is written to its own temporary directory, so files with the same name
+      never collide.
+    - A batch that times out or fails is retried one file at a time, so one broken file only fails itself.
+    """
+
+    def __init__(self, workers, batch_size, timeout_seconds, queue_size, profile_root):
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.timeout_seconds = timeout_seconds
+        self.profile_root = Path(profile_root)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def submit(self, data, file_name, temp_uploads_dir):
+        """Queues a conversion and returns a Future with the text ("" on failure)."""
+        self._ensure_started()
+        job = _DocJob(data, file_name, temp_uploads_dir)
+        try:
+            self._queue.put(job, timeout=self.timeout_seconds)
+        except queue.Full:
+            job.future.set_exception(TimeoutError("LibreOffice conversion queue is full."))
+        return job.future
+
+    def shutdown(self):
+        with self._lock:
+            for _ in self._threads:
+                self._queue.put(None)
+            self._threads = []
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._threads:
+                return
+            for worker_id in range(self.workers):
+                thread = threading.Thread(
+                    target=self._worker_loop, args=(worker_id,),
+                    name=f"libreoffice-{worker_id}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker_loop(self, worker_id):
+        profile_uri = (self.profile_root / f"worker-{worker_id}").resolve().as_uri()
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            batch = [job]
+            # কিউতে অপেক্ষমাণ বাকি কাজগুলো একই soffice কলে কনভার্ট করা হয়
+            while len(batch) < self.batch_size:
+                try:
+                    next_job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if next_job is None:
+                    self._queue.put(None)
+                    break
+                batch.append(next_job)
+
+            batch = [job for job in batch if job.future.set_running_or_notify_cancel()]
+            if batch:
+                self._run_batch(batch, profile_uri)
+
+    def _run_batch(self, batch, profile_uri):
+        output_dir = None
+        try:
+            for job in batch:
+                # প্রতিটি কাজের জন্য আলাদা ডিরেক্টরি, তাই একই নামের ফাইল একে অপরকে ওভাররাইট করে না
+                os.makedirs(job.temp_uploads_dir, exist_ok=True)
+                job.job_dir = tempfile.mkdtemp(prefix="doc-job-", dir=os.path.abspath(job.temp_uploads_dir))
+                job.input_path = os.path.join(job.job_dir, f"{uuid.uuid4().hex}.doc")
+                with open(job.input_path, "wb") as f:
+                    f.write(job.data)
+
+            output_dir = tempfile.mkdtemp(prefix="doc-out-")
+            timeout = self.timeout_seconds + BATCH_SECONDS_PER_EXTRA_FILE * (len(batch) - 1)
+            try:
+                self._convert([job.input_path for job in batch], output_dir, profile_uri, timeout)
+            except (subprocess.TimeoutExpired, subprocess.CalledProcessError) as e:
+                if len(batch) == 1:
+                    raise
+                logger.warning(f"Batch conversion of {len(batch)} .doc files failed ({e}); retrying one by one.")
+                for job in batch:
+                    self._run_single(job, output_dir, profile_uri)
+                return
+
+            for job in batch:
+                job.future.set_result(self._read_output(job, output_dir))
+
+        except FileNotFoundError:
+            logger.error("LibreOffice executable not found. Please ensure it is installed and in your system PATH.")
+            self._finish(batch, "")
+        except subprocess.TimeoutExpired:
+            logger.error(f"LibreOffice timed out converting {batch[0].file_name}")
+            self._finish(batch, "")
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Error during file conversion: {e.stderr}")
+            self._finish(batch, "")
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+            self._finish(batch, "")
+        finally:
+            # Clean up temporary files and directories
+            for job in batch:
+                job.data = None
+                if job.job_dir and os.path.exists(job.job_dir):
+                    shutil.rmtree(job.job_dir, ignore_errors=True)
+            if output_dir and os.path.exists(output_dir):
+                shutil.rmtree(output_dir, ignore_errors=True)
+
+    def _run_single(self, job, output_dir, profile_uri):
+        try:
+            self._convert([job.input_path], output_dir, profile_uri, self.timeout_seconds)
+            job.future.set_result(self._read_output(job, output_dir))
+        except subprocess.TimeoutExpired:
+            logger.error(f"LibreOffice timed out converting {job.file_name}")
+            job.future.set_result("")
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Error during file conversion of {job.file_name}: {e.stderr}")
+            job.future.set_result("")
+
+    def _convert(self, input_paths, output_dir, profile_uri, timeout):
         command = [
-            libreoffice_path,
+            _libreoffice_path(),
+            f'-env:UserInstallation={profile_uri}',
             '--headless',
-            '--convert-to', 'txt:Text',
+            '--norestore',
+            '--convert-to', TEXT_EXPORT_FILTER,
             '--outdir', output_dir,
-            input_file_path
+            *input_paths
         ]
-        
-        logger.info(f"Running command: {' '.join(command)}")
-        subprocess.run(command, check=True, capture_output=True, text=True, timeout=60)
-        
+
+        logger.info(f"Converting {len(input_paths)} .doc file(s) with LibreOffice")
+        process = subprocess.Popen(
+            command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            start_new_session=(os.name != 'nt')
+        )
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            _kill_process_tree(process)
+            process.communicate()
+            raise
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, command, stdout, stderr)
+
+    def _read_output(self, job, output_dir):
         # Read the content from the converted text file
-        output_file_name = os.path.splitext(file_name)[0] + '.txt'
+        output_file_name = os.path.splitext(os.path.basename(job.input_path))[0] + '.txt'
         output_file_path = os.path.join(output_dir, output_file_name)
-        
-        if os.path.exists(output_file_path):
-            with open(output_file_path, 'r', encoding='utf-8') as f:
-                full_text = f.read()
-        else:
-            logger.error(f"Converted text file not found at {output_file_path}")
-            
-    except FileNotFoundError:
-        logger.error("LibreOffice executable not found. Please ensure it is installed and in your system PATH.")
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error during file conversion: {e.stderr}")
+
+        if not os.path.exists(output_file_path):
+            logger.error(f"Converted text file not found for {job.file_name}")
+            return ""
+        with open(output_file_path, 'r', encoding='utf-8-sig', errors='replace') as f:
+            return f.read()
+
+    def _finish(self, batch, text):
+        for job in batch:
+            if not job.future.done():
+                job.future.set_result(text)
+
+
+# 🌟 সব .doc কনভার্সনের জন্য একটি শেয়ার্ড পুল (প্রথম ব্যবহারে worker থ্রেড চালু হয়)
+DOC_CONVERSION_POOL = DocConversionPool(
+    workers=LIBREOFFICE_WORKERS,
+    batch_size=LIBREOFFICE_BATCH_SIZE,
+    timeout_seconds=LIBREOFFICE_TIMEOUT_SECONDS,
+    queue_size=LIBREOFFICE_QUEUE_SIZE,
+    profile_root=TEMP_DIR_PATH / f"libreoffice-{os.getpid()}",
+)
+
+
+def get_doc_content(file_obj, file_name, temp_uploads_dir):
+    data = file_obj.read()
+
+    # 🚀 প্রথমে LibreOffice ছাড়াই সরাসরি পার্স করা হয় (মিলিসেকেন্ডে); না পারলে LibreOffice পুল
+    native_text = extract_word97_text(data)
+    if native_text is not None:
+        return native_text
+
+    full_text = ""
+    try:
+        future = DOC_CONVERSION_POOL.submit(data, file_name, temp_uploads_dir)
+        full_text = future.result(timeout=LIBREOFFICE_JOB_TIMEOUT_SECONDS)
+    except FutureTimeoutError:
+        # কিউতে থাকা কাজ বাতিল করা হয়, যাতে কেউ অপেক্ষা না করা ফাইল কনভার্ট না হয়
+        future.cancel()
+        logger.error(f"Timed out waiting for the conversion of {file_name}")
     except Exception as e:
         logger.error(f"An unexpected error occurred: {e}")
-    finally:
-        # Clean up temporary files and directories
-        if os.path.exists(input_file_path):
-            os.remove(input_file_path)
-        if os.path.exists(output_dir):
-            shutil.rmtree(output_dir)
-            
-    return full_text
\ No newline at end of file
+
+    return full_text
@@ -1,17 +1,234 @@
 import logging
-import io
-from docx import Document
+import posixpath
+import re
+import zipfile
+from array import array
+from bisect import bisect_right
+import xml.etree.ElementTree as ET
+from xml.parsers import expat
 
 logger = logging.getLogger("docx_reader")
 
+MAIN_DOCUMENT_PART = "word/document.xml"
+
+# XML পার্ট একবারে এতটুকু করে ডিকম্প্রেস ও পার্স করা হয়
+XML_CHUNK_BYTES = 64 * 1024
+
+# document.xml.rels এর এই টাইপগুলোর পার্টও পড়া হয় (বডির পরে, এই ক্রমে)
+EXTRA_PART_TYPES = ("header", "footer", "footnotes", "endnotes")
+
+# এই এলিমেন্টগুলোর ভেতরের টেক্সট দেখানো হয় না:
+# Fallback = একই text box এর পুরনো (VML) কপি, delText = মুছে ফেলা ট্র্যাক-চেঞ্জ, instrText = ফিল্ড কোড
+_SKIPPED_ELEMENTS = {"Fallback", "delText", "instrText"}
+# শুধু run (w:r) এর ভেতরে থাকলে এগুলো অক্ষর; w:pPr/w:tabs এর w:tab হলো ট্যাব-স্টপের সংজ্ঞা
+_RUN_CHARACTERS = {"tab": "\t", "ptab": "\t", "br": "\n", "cr": "\n", "noBreakHyphen": "-"}
+
+_RELATIONSHIP_TYPE = re.compile(r"/(officeDocument|header|footer|footnotes|endnotes)$")
+
+
+class DocxContent:
+    """
+    Text of a .docx file with, for every paragraph, the part it came from ("document",
+    "header1", "footnotes", ...) and its 1-based index in that part.
+
+    The body comes first (so its line numbers are the same as before); every other part
+    follows under a "===== part =====" line.
+    """
+
+    def __init__(self, text, paragraphs):
+        self.text = text
+        # [(first_line, part, paragraph_index)] কে কম মেমরির array তে রাখা হলো (part = self.parts এর ইনডেক্স)
+        self.parts = []
+        part_ids = {}
+        self._first_lines = array('q')
+        self._part_ids = array('i')
+        self._paragraph_indexes = array('i')
+        for first_line, part, paragraph_index in paragraphs:
+            if part not in part_ids:
+                part_ids[part] = len(self.parts)
+                self.parts.append(part)
+            self._first_lines.append(first_line)
+            self._part_ids.append(part_ids[part])
+            self._paragraph_indexes.append(paragraph_index)
+
+    def __len__(self):
+        return len(self.text)
+
+    def __sizeof__(self):
+        arrays = (self._first_lines, self._part_ids, self._paragraph_indexes)
+        return object.__sizeof__(self) + self.text.__sizeof__() + sum(a.buffer_info()[1] * a.itemsize for a in arrays)
+
+    def locate(self, line_number):
+        """(part, paragraph_index) of a 1-based line of `text`, or (None, None) for a part title line."""
+        position = bisect_right(self._first_lines, line_number) - 1
+        if position < 0 or self.parts[self._part_ids[position]] is None:
+            return None, None
+        return self.parts[self._part_ids[position]], self._paragraph_indexes[position]
+
+    def annotate(self, matches):
+        """Adds "part" and "paragraph" to search matches (which carry a text "line")."""
+        for match in matches:
+            match["part"], match["paragraph"] = self.locate(match["line"])
+        return matches
+
+
+def _local_name(tag):
+    # নেমস্পেস বাদ দিয়ে শুধু নাম (Transitional ও Strict দুই ধরনের OOXML ই মেলে)
+    return tag.rpartition("}")[2]
+
+
+class _PartParser:
+    """
+    Expat callbacks that collect the text of every paragraph of one WordprocessingML part.
+    Only flags and a stack of open paragraphs are kept; no element tree is built.
+    """
+
+    def __init__(self):
+        self.finished = []    # শেষ হওয়া প্যারাগ্রাফগুলোর টেক্সট, _iter_paragraphs নিয়ে নেয়
+        self.stack = []       # খোলা প্যারাগ্রাফগুলোর টুকরো (text box এর প্যারাগ্রাফ বাইরেরটির ভেতরে থাকে)
+        self.skip_depth = 0
+        self.run_depth = 0
+        self.separator_depth = 0   # ফুটনোট/এন্ডনোটের separator নোটের ভেতরে
+        self.in_text = False
+        self._names = {}      # পূর্ণ ট্যাগ -> লোকাল নাম (একই ট্যাগ হাজারবার আসে)
+
+    def _name(self, tag):
+        name = self._names.get(tag)
+        if name is None:
+            name = self._names[tag] = _local_name(tag)
+        return name
+
+    def start(self, tag, attributes):
+        name = self._name(tag)
+        if name == "t":
+            self.in_text = True
+        elif name == "p":
+            self.stack.append([])
+        elif name == "r":
+            self.run_depth += 1
+        elif name in _SKIPPED_ELEMENTS:
+            self.skip_depth += 1
+        elif name in _RUN_CHARACTERS:
+            if self.run_depth and self.stack and not self.skip_depth:
+                self.stack[-1].append(_RUN_CHARACTERS[name])
+        elif name in ("footnote", "endnote") and any(_local_name(key) == "type" for key in attributes):
+            self.separator_depth += 1
+
+    def end(self, tag):
+        name = self._name(tag)
+        if name == "t":
+            self.in_text = False
+        elif name == "p":
+            if self.stack:
+                pieces = self.stack.pop()
+                # Fallback এর ভেতরের প্যারাগ্রাফও stack থেকে সরাতে হয়, কিন্তু দেখানো হয় না
+                if not self.skip_depth and not self.separator_depth:
+                    self.finished.append("".join(pieces))
+        elif name == "r":
+            self.run_depth -= 1
+        elif name in _SKIPPED_ELEMENTS:
+            self.skip_depth -= 1
+        elif name in ("footnote", "endnote") and self.separator_depth:
+            self.separator_depth -= 1
+
+    def characters(self, data):
+        if self.in_text and self.stack and not self.skip_depth:
+            self.stack[-1].append(data)
+
+
+def _iter_paragraphs(stream):
+    """
+    Yields the text of every paragraph of one WordprocessingML part in document order,
+    parsing the stream incrementally (paragraphs inside tables and text boxes included;
+    a text box's paragraphs come just before the paragraph that anchors it).
+    """
+    handler = _PartParser()
+    parser = expat.ParserCreate(namespace_separator="}")
+    parser.buffer_text = True
+    parser.StartElementHandler = handler.start
+    parser.EndElementHandler = handler.end
+    parser.CharacterDataHandler = handler.characters
+
+    while True:
+        chunk = stream.read(XML_CHUNK_BYTES)
+        parser.Parse(chunk, not chunk)
+        if handler.finished:
+            yield from handler.finished
+            handler.finished = []
+        if not chunk:
+            return
+
+
+def _resolve_target(source_part, target):
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source_part), target))
+
+
+def _relationships(archive, part):
+    """{type: [target part, ...]} of a part's relationships (only the types we read)."""
+    rels_part = posixpath.join(posixpath.dirname(part), "_rels", posixpath.basename(part) + ".rels")
+    found = {}
+    try:
+        with archive.open(rels_part) as stream:
+            for _, elem in ET.iterparse(stream):
+                if _local_name(elem.tag) != "Relationship" or elem.get("TargetMode") == "External":
+                    continue
+                m = _RELATIONSHIP_TYPE.search(elem.get("Type", ""))
+                if m:
+                    found.setdefault(m.group(1), []).append(_resolve_target(part, elem.get("Target", "")))
+    except KeyError:
+        pass
+    return found
+
+
+def _natural_key(part):
+    return [int(piece) if piece.isdigit() else piece for piece in re.split(r"(\d+)", part)]
+
+
+def _content_parts(archive):
+    """[(label, part)] in the order they are extracted: the body, then headers, footers, notes."""
+    main = _relationships(archive, "").get("officeDocument", [MAIN_DOCUMENT_PART])[0]
+    names = set(archive.namelist())
+    if main not in names:
+        main = MAIN_DOCUMENT_PART
+    parts = [("document", main)]
+
+    relationships = _relationships(archive, main)
+    for part_type in EXTRA_PART_TYPES:
+        for part in sorted(set(relationships.get(part_type, ())), key=_natural_key):
+            if part in names:
+                parts.append((posixpath.splitext(posixpath.basename(part))[0], part))
+    return parts
+
+
 def get_docx_content(file_obj):
-    full_text = ""
+    """
+    Extracts a .docx file as DocxContent by streaming its XML parts straight from the zip
+    (no python-docx object model): the body with its tables and text boxes, then headers,
+    footers, footnotes and endnotes. Returns "" if the file can't be read.
+    """
+    lines = []
+    paragraphs = []
+    line_number = 1
     try:
-        # docx.Document requires a file path or a seekable file-like object.
-        # We use BytesIO to make the in-memory file object seekable.
-        doc = Document(io.BytesIO(file_obj.read()))
-        for para in doc.paragraphs:
-            full_text += para.text + "\n"
+        file_obj.seek(0)
+        with zipfile.ZipFile(file_obj) as archive:
+            for label, part in _content_parts(archive):
+                if label != "document":
+                    lines.append(f"\n===== {label} =====")
+                    paragraphs.append((line_number, None, 0))
+                    line_number += 2
+                with archive.open(part) as stream:
+                    for index, text in enumerate(_iter_paragraphs(stream), 1):
+                        paragraphs.append((line_number, label, index))
+                        lines.append(text)
+                        line_number += text.count("\n") + 1
     except Exception as e:
         logger.error(f"Error reading DOCX content: {e}")
-    return full_text
\ No newline at end of file
+        if not lines:
+            return ""
+
+    # প্রতিটি প্যারাগ্রাফের পরে "\n" (আগের মতো)
+    lines.append("")
+    return DocxContent("\n".join(lines), paragraphs)
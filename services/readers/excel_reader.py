@@ -1,100 +1,156 @@
 # services/readers/excel_reader.py
 
-import io
+import re
+import csv
 import logging
+from itertools import islice, repeat
+
+import numpy as np
 import pandas as pd
 from openpyxl import load_workbook
+from openpyxl.utils import get_column_letter
 from openpyxl.utils.exceptions import InvalidFileException
 
+from .text_reader import _highlight_line, _merge_spans
+from globals import CSV_CHUNK_ROWS, CSV_SNIFF_BYTES
+
 logger = logging.getLogger("excel_reader")
 
-def _clean_cell_value(value):
+# একটি কলামের সব সেল এই অক্ষর দিয়ে জুড়ে একবারে সার্চ করা হয় (কুয়েরিতে এটি থাকে না)
+CELL_SEPARATOR = "\x00"
+
+# CSV ডিলিমিটার হিসেবে এগুলোই বিবেচনা করা হয়
+CSV_DELIMITERS = ",;\t|"
+
+
+class TabularContent:
+    """
+    Extracted content of a spreadsheet or CSV file: one DataFrame of cell strings per sheet
+    (a CSV file is a single unnamed sheet), with rows and columns in file order, so a match
+    maps straight to its sheet/row/column.
+
+    Searching works column by column on the DataFrames (see search_tabular_content);
+    render_text() builds the tab-separated text shown in the text viewer.
+    """
+
+    def __init__(self, sheets, sheet_headers=True, row_offset=0):
+        self.sheets = sheets                  # [(sheet_name, DataFrame of str)]
+        self.sheet_headers = sheet_headers    # render_text() puts a "Worksheet" header before each sheet
+        self.row_offset = row_offset          # rows before the first one (a CSV chunk's position in the file)
+
+    def __len__(self):
+        return len(self.sheets)
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + sum(
+            int(frame.memory_usage(index=True, deep=True).sum()) for _, frame in self.sheets
+        )
+
+    def line_offsets(self):
+        """For each sheet, the line of render_text() just before its first row."""
+        offsets = []
+        line = self.row_offset
+        for _, frame in self.sheets:
+            if self.sheet_headers:
+                # "\n===== Worksheet: ... =====\n" তিনটি লাইন নেয়
+                line += 3
+            offsets.append(line)
+            line += len(frame)
+        return offsets
+
+    def render_text(self):
+        """Tab-separated text of all sheets (the format the text viewer and the index use)."""
+        full_text = []
+        for sheet_name, frame in self.sheets:
+            if self.sheet_headers:
+                full_text.append(f"\n===== Worksheet: {sheet_name} =====\n")
+            full_text.extend(_row_strings(frame))
+        return '\n'.join(full_text)
+
+
+def _row_strings(frame):
+    """Joins every row's cells with tabs, column-wise (no Python loop over rows)."""
+    if frame.shape[1] == 0:
+        return [""] * len(frame)
+    columns = [frame.iloc[:, index] for index in range(frame.shape[1])]
+    if len(columns) == 1:
+        return columns[0].tolist()
+    return columns[0].str.cat(columns[1:], sep='\t').tolist()
+
+
+def _to_text_frame(df, strip=True):
     """
-    Converts cell value to a standardized string, handling None/NaN/dates.
+    Converts every cell to a string ("" for empty cells/NaN), stripped unless `strip` is False,
+    with whole-column operations, and numbers the columns 0..n-1.
     """
-    if pd.isna(value) or value is None:
-        return ""
-    if isinstance(value, str):
-        return value.strip()
-    return str(value).strip()
+    frame = df.where(df.notna(), "").astype(str)
+    frame.columns = range(frame.shape[1])
+    if frame.empty or not strip:
+        return frame
+    return frame.apply(lambda column: column.str.strip())
+
 
 def get_excel_content(file_obj, file_name):
     """
-    Extracts text content from .xlsx and .xls files by iterating through worksheets.
+    Extracts the worksheets of .xlsx and .xls files as a TabularContent (or None on failure).
     """
-    full_text = []
-    
+    sheets = []
+
     # Reset file pointer
     file_obj.seek(0)
-    
+
     extension = file_name.lower().split('.')[-1]
-    
+
     if extension == 'xlsx':
         # Use openpyxl for .xlsx
         try:
             # openpyxl requires an open file-like object
             wb = load_workbook(file_obj, read_only=True, data_only=True)
-            
+
             for sheet_name in wb.sheetnames:
                 ws = wb[sheet_name]
-                full_text.append(f"\n===== Worksheet: {sheet_name} =====\n")
-                
-                for row in ws.rows:
-                    row_data = [_clean_cell_value(cell.value) for cell in row]
-                    # একটি সারির সব ডেটা ট্যাব দিয়ে যুক্ত করে
-                    full_text.append('\t'.join(row_data)) 
-                
+                # dtype=object: পূর্ণসংখ্যা float এ বদলে যায় না ("1" থাকে, "1.0" হয় না)
+                df = pd.DataFrame(list(ws.values), dtype=object)
+                sheets.append((sheet_name, _to_text_frame(df)))
+
         except InvalidFileException:
             logger.error(f"Invalid Excel file (xlsx): {file_name}")
             return None
         except Exception as e:
             logger.error(f"Error reading Excel file {file_name} with openpyxl: {e}")
             return None
-            
+
     elif extension == 'xls':
         # Use pandas for .xls (requires xlrd backend, which should be included with pandas)
         try:
-            # pandas.read_excel can handle the file-like object directly
-            excel_data = pd.read_excel(file_obj, sheet_name=None, engine='xlrd')
-            
+            # header=None: প্রথম সারিও ডেটা, তাই সারি নম্বর শিটের সারি নম্বরের সাথে মেলে
+            excel_data = pd.read_excel(file_obj, sheet_name=None, header=None, dtype=object, engine='xlrd')
+
             for sheet_name, df in excel_data.items():
-                full_text.append(f"\n===== Worksheet: {sheet_name} =====\n")
-                # প্রতিটি সারিকে স্ট্রিং এ রূপান্তর করে লিস্টে যোগ করা হলো
-                for row_index, row in df.iterrows():
-                    row_data = [_clean_cell_value(item) for item in row]
-                    full_text.append('\t'.join(row_data))
-                    
+                sheets.append((sheet_name, _to_text_frame(df)))
+
         except Exception as e:
             logger.error(f"Error reading Excel file {file_name} with pandas/xlrd: {e}")
             return None
-            
+
     else:
         logger.warning(f"Unsupported extension for Excel reader: {extension}")
         return None
 
-    # Line endings Standardization: This is crucial for search_text_content
-    # The excel content is separated by newline characters (and tabs within a line)
-    return '\n'.join(full_text)
+    return TabularContent(sheets)
 
 
 def get_csv_content(file_obj):
     """
-    Extracts text content from .csv files.
+    Extracts a .csv file as a single-sheet TabularContent. Falls back to the plain
+    decoded text if pandas can't parse it.
     """
-    # Reset file pointer
-    file_obj.seek(0)
-    
     try:
-        # Use pandas to read CSV robustly, including encoding detection (if possible)
-        df = pd.read_csv(file_obj, encoding='utf-8', on_bad_lines='skip', sep=None, engine='python')
-        
-        # Convert DataFrame to a single string representation
-        # Using to_csv ensures consistent delimiter and quote handling
-        csv_string = df.to_csv(index=False, sep='\t', header=True)
-        
-        # Clean up line endings as done in text_reader for consistency
-        return csv_string.replace('\r\n', '\n').replace('\r', '\n')
-        
+        # Sniff the dialect from a small sample, then parse with the fast C engine
+        dialect = sniff_csv_dialect(file_obj)
+        df = _read_csv(file_obj, dialect)
+        return TabularContent([(None, _to_text_frame(df, strip=False))], sheet_headers=False)
+
     except Exception as e:
         logger.error(f"Error reading CSV file with pandas: {e}")
         # Fallback: Try decoding as pure text (as done in text_reader)
@@ -103,4 +159,298 @@ def get_csv_content(file_obj):
              content_bytes = file_obj.read()
              return content_bytes.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
         except:
-             return None
\ No newline at end of file
+             return None
+
+
+# ------------------ Tabular search ------------------
+def _cell_ref(column_index, row_index):
+    """A1-style reference of a 0-based (column, row)."""
+    return f"{get_column_letter(column_index + 1)}{row_index + 1}"
+
+
+def _scan_column(column, finditer, limit=None):
+    """
+    Searches one column by joining its cells into a single string, so the regex/automaton
+    runs once per column in C instead of once per cell. Hit offsets are mapped back to rows
+    with one vectorized binary search over the cells' start offsets.
+
+    `finditer(text)` yields (start, end, tag) tuples. Returns (rows, starts, ends, tags), with
+    starts/ends relative to the cell, for at most `limit` hits. A hit never spans two cells:
+    fuzzy hits (see services/fuzzy_match.py) can take in a separator at either end, which is
+    trimmed off, and hits that run across a separator are dropped.
+    """
+    hits = list(islice(finditer(CELL_SEPARATOR.join(column.tolist())), limit))
+    if not hits:
+        return [], [], [], []
+
+    lengths = column.str.len().to_numpy(dtype=np.int64)
+    cell_starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+    starts, ends, tags = zip(*hits)
+    starts = np.asarray(starts)
+    ends = np.asarray(ends)
+    rows = np.searchsorted(cell_starts, starts, side='right') - 1
+    starts = starts - cell_starts[rows]
+    # বিভাজকেই শুরু হলে ম্যাচটি আসলে পরের সেলের শুরু থেকে
+    on_separator = starts == lengths[rows]
+    rows = rows + on_separator
+    starts = np.where(on_separator, 0, starts)
+    end_rows = np.searchsorted(cell_starts, ends - 1, side='right') - 1
+    ends = np.minimum(ends - cell_starts[end_rows], lengths[end_rows])
+    keep = (end_rows == rows) & (ends > starts)
+    if not keep.all():
+        rows, starts, ends = rows[keep], starts[keep], ends[keep]
+        tags = [tag for tag, kept in zip(tags, keep) if kept]
+    return rows.tolist(), starts.tolist(), ends.tolist(), list(tags)
+
+
+def _scan_sheet(frame, finditer, limit=None):
+    """Returns [(row, column, start, end, tag), ...] of one sheet (at most `limit` hits per column)."""
+    hits = []
+    for column_index in range(frame.shape[1]):
+        rows, starts, ends, tags = _scan_column(frame.iloc[:, column_index], finditer, limit)
+        hits.extend(zip(rows, repeat(column_index), starts, ends, tags))
+    return hits
+
+
+def _row_preview(cells, spans_by_column):
+    """Tab-joined row with the given in-cell (start, end) spans of each column highlighted."""
+    row_spans = []
+    position = 0
+    for column_index, cell in enumerate(cells):
+        for start, end in spans_by_column.get(column_index, ()):
+            row_spans.append((position + start, position + end))
+        position += len(cell) + 1
+    return _highlight_line('\t'.join(cells), 0, _merge_spans(row_spans))
+
+
+def _matched_rows(frame, row_indexes):
+    """Cells of only the given rows (the rest of a large sheet is never rendered)."""
+    rows = sorted(set(row_indexes))
+    return dict(zip(rows, frame.iloc[rows].to_numpy().tolist()))
+
+
+def _tabular_match(file_name, file_path, sheet_name, line, row_index, column_index, preview):
+    return {
+        "file": file_name,
+        "path": file_path,
+        "page": "N/A",
+        "line": line,
+        "sheet": sheet_name,
+        "row": row_index + 1,
+        "column": get_column_letter(column_index + 1),
+        "cell": _cell_ref(column_index, row_index),
+        "preview": preview,
+    }
+
+
+def search_tabular_content(content, file_name, file_path, query, max_matches=None):
+    """
+    Single-phrase search over a TabularContent: one result per occurrence (like
+    search_text_content), with the sheet, row, column and cell of the match.
+    "line" is the line of the row in render_text(), for the text viewer.
+    """
+    pattern = re.compile(re.escape(query), re.IGNORECASE)
+
+    def finditer(text):
+        return ((m.start(), m.end(), None) for m in pattern.finditer(text))
+
+    # প্রতিটি কলামে max_matches + 1 টির বেশি খোঁজার দরকার নেই (আরও আছে কিনা জানতে + 1)
+    limit = max_matches + 1 if max_matches is not None else None
+    hits = []  # (sheet_index, row, column, start, end)
+    for sheet_index, (_, frame) in enumerate(content.sheets):
+        hits.extend((sheet_index, row, column, start, end) for row, column, start, end, _ in _scan_sheet(frame, finditer, limit))
+        if limit is not None and len(hits) >= limit:
+            # পরের শিটের ম্যাচগুলো ক্রমে এর পরে আসে, তাই সেগুলো পড়ার দরকার নেই
+            break
+    hits.sort()
+
+    truncated = max_matches is not None and len(hits) > max_matches
+    reported = hits[:max_matches] if truncated else hits
+
+    # একই সারির সব ম্যাচ preview-তে হাইলাইট করা হয়
+    spans_by_row = {}
+    for sheet_index, row, column, start, end in hits:
+        spans_by_row.setdefault((sheet_index, row), {}).setdefault(column, []).append((start, end))
+
+    line_offsets = content.line_offsets()
+    results = []
+    previews = {}
+    for sheet_index, (sheet_name, frame) in enumerate(content.sheets):
+        sheet_hits = [hit for hit in reported if hit[0] == sheet_index]
+        if not sheet_hits:
+            continue
+        cells_by_row = _matched_rows(frame, [row for _, row, _, _, _ in sheet_hits])
+        for _, row, column, _, _ in sheet_hits:
+            preview = previews.get((sheet_index, row))
+            if preview is None:
+                preview = _row_preview(cells_by_row[row], spans_by_row[(sheet_index, row)])
+                previews[(sheet_index, row)] = preview
+            results.append(_tabular_match(
+                file_name, file_path, sheet_name, line_offsets[sheet_index] + row + 1,
+                content.row_offset + row, column, preview
+            ))
+
+    return {"status": "ok", "matches": results, "count": len(results), "truncated": truncated}, 200
+
+
+def _scan_terms(content, query):
+    """Returns {(sheet_index, row): [(column, start, end, term), ...]} for every term hit."""
+    hits_by_row = {}
+    for sheet_index, (_, frame) in enumerate(content.sheets):
+        for row, column, start, end, term in _scan_sheet(frame, query.iter_terms):
+            hits_by_row.setdefault((sheet_index, row), []).append((column, start, end, term))
+    return hits_by_row
+
+
+def _term_rows(content, file_name, file_path, query, hits_by_row, max_matches=None):
+    """
+    Renders the rows of `hits_by_row` that contain a non-negated term (and, with scope "line",
+    satisfy the expression). Returns (results, truncated).
+    """
+    selected = []  # ((sheet_index, row), found_terms)
+    truncated = False
+    for key in sorted(hits_by_row):
+        present = {term for _, _, _, term in hits_by_row[key]}
+        found_terms = present & query.positive
+        # শুধু non-negated টার্ম থাকা সারিই দেখানো হয়
+        if not found_terms or (query.scope == "line" and not query.matches(present)):
+            continue
+        if max_matches is not None and len(selected) >= max_matches:
+            truncated = True
+            break
+        selected.append((key, found_terms))
+
+    line_offsets = content.line_offsets()
+    results = []
+    for sheet_index, (sheet_name, frame) in enumerate(content.sheets):
+        sheet_rows = [(row, found_terms) for (index, row), found_terms in selected if index == sheet_index]
+        if not sheet_rows:
+            continue
+        cells_by_row = _matched_rows(frame, [row for row, _ in sheet_rows])
+        for row, found_terms in sheet_rows:
+            spans_by_column = {}
+            distances = []
+            for column, start, end, term in hits_by_row[(sheet_index, row)]:
+                if term in found_terms:
+                    spans_by_column.setdefault(column, []).append((start, end))
+                    if query.max_distance:
+                        distances.append(query.distance(cells_by_row[row][column][start:end], term))
+            columns = sorted(spans_by_column)
+            match = _tabular_match(
+                file_name, file_path, sheet_name, line_offsets[sheet_index] + row + 1,
+                content.row_offset + row, columns[0], _row_preview(cells_by_row[row], spans_by_column)
+            )
+            match["cells"] = [_cell_ref(column, content.row_offset + row) for column in columns]
+            match["terms"] = [query.terms[term] for term in sorted(found_terms)]
+            if distances:
+                match["distance"] = min(distances)
+            results.append(match)
+
+    return results, truncated
+
+
+def search_tabular_terms(content, file_name, file_path, query, max_matches=None):
+    """
+    Multi-term/boolean search over a TabularContent for a parsed query
+    (services/query_parser.Query). The expression is evaluated per row, or over the whole
+    workbook when query.scope is "file". Returns one result per row, with "terms" and the
+    "cells" where they were found ("cell"/"column" are the first of them).
+    """
+    hits_by_row = _scan_terms(content, query)
+
+    if query.scope == "file":
+        present_in_file = {term for hits in hits_by_row.values() for _, _, _, term in hits}
+        if not query.matches(present_in_file):
+            return {"status": "ok", "matches": [], "count": 0, "truncated": False}, 200
+
+    results, truncated = _term_rows(content, file_name, file_path, query, hits_by_row, max_matches)
+    return {"status": "ok", "matches": results, "count": len(results), "truncated": truncated}, 200
+
+
+# ------------------ Streaming CSV search ------------------
+def sniff_csv_dialect(file_obj):
+    """
+    Detects the delimiter and quote character once, from the first CSV_SNIFF_BYTES of the
+    file (whole lines only), instead of letting the slow Python parser guess over the whole file.
+    Returns read_csv keyword arguments.
+    """
+    file_obj.seek(0)
+    sample = file_obj.read(CSV_SNIFF_BYTES)
+    file_obj.seek(0)
+    if len(sample) == CSV_SNIFF_BYTES and b"\n" in sample:
+        # শেষের অসম্পূর্ণ লাইন বাদ দেওয়া হলো
+        sample = sample[:sample.rindex(b"\n")]
+    try:
+        dialect = csv.Sniffer().sniff(sample.decode("utf-8", errors="replace"), delimiters=CSV_DELIMITERS)
+        return {"sep": dialect.delimiter, "quotechar": dialect.quotechar or '"',
+                "skipinitialspace": dialect.skipinitialspace}
+    except csv.Error:
+        return {"sep": ","}
+
+
+def _read_csv(file_obj, dialect, chunksize=None):
+    # C engine; প্রতিটি সেল ফাইলের হুবহু টেক্সট, আর ফাঁকা লাইনও রাখা হয়, তাই সারি নম্বর ফাইলের লাইনের সাথে মেলে
+    return pd.read_csv(
+        file_obj, encoding='utf-8-sig', encoding_errors='replace', on_bad_lines='skip', engine='c',
+        header=None, dtype=str, keep_default_na=False, skip_blank_lines=False, chunksize=chunksize,
+        **dialect
+    )
+
+
+def iter_csv_chunks(file_obj, chunk_rows=None):
+    """
+    Yields a single-sheet TabularContent for every `chunk_rows` rows of a CSV file (each with
+    its row_offset), so only one chunk is in memory at a time.
+    """
+    dialect = sniff_csv_dialect(file_obj)
+    row_offset = 0
+    with _read_csv(file_obj, dialect, chunksize=chunk_rows or CSV_CHUNK_ROWS) as reader:
+        for chunk in reader:
+            yield TabularContent([(None, _to_text_frame(chunk, strip=False))], sheet_headers=False, row_offset=row_offset)
+            row_offset += len(chunk)
+
+
+def search_csv_stream(file_obj, file_name, file_path, query, max_matches=None, chunk_rows=None):
+    """
+    Searches a CSV file chunk by chunk as it is parsed (see iter_csv_chunks) with the same
+    results as searching its whole TabularContent; memory use depends on the chunk size,
+    not the file size. `query` is a parsed Query (services/query_parser.py).
+    """
+    results = []
+    truncated = False
+    present_in_file = set()
+
+    for content in iter_csv_chunks(file_obj, chunk_rows):
+        remaining = None if max_matches is None else max_matches - len(results)
+
+        if query.is_simple:
+            result, _ = search_tabular_content(content, file_name, file_path, query.simple_text, remaining)
+            results.extend(result["matches"])
+            truncated = result["truncated"]
+        elif query.scope == "line":
+            chunk_results, truncated = _term_rows(content, file_name, file_path, query, _scan_terms(content, query), remaining)
+            results.extend(chunk_results)
+        else:
+            # ফাইল-স্কোপ: পুরো ফাইলে কোন টার্ম আছে তা জানতে শেষ পর্যন্ত পড়া হয়, কিন্তু
+            # রেজাল্ট max_matches + 1 টির বেশি রাখা হয় না
+            hits_by_row = _scan_terms(content, query)
+            present_in_file.update(term for hits in hits_by_row.values() for _, _, _, term in hits)
+            if remaining is None or remaining >= 0:
+                chunk_results, _ = _term_rows(
+                    content, file_name, file_path, query, hits_by_row,
+                    None if remaining is None else remaining + 1
+                )
+                results.extend(chunk_results)
+            continue
+
+        if truncated:
+            break
+
+    if not query.is_simple and query.scope == "file":
+        if not query.matches(present_in_file):
+            return {"status": "ok", "matches": [], "count": 0, "truncated": False}, 200
+        if max_matches is not None and len(results) > max_matches:
+            results = results[:max_matches]
+            truncated = True
+
+    return {"status": "ok", "matches": results, "count": len(results), "truncated": truncated}, 200
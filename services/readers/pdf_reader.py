@@ -4,101 +4,172 @@ import re
 import logging
 import io
 
+from .text_reader import _merge_spans
+
 logger = logging.getLogger("pdf_reader")
 
-def get_pdf_content(file_obj):
-    full_text = ""
-    # গুরুত্বপূর্ণ: .read() ডাকার আগে file_obj কে শুরু থেকে নিয়ে যেতে হবে
+def extract_pdf_pages(file_obj):
+    """
+    Extracts the text blocks of every page once, so the result can be cached and searched many times.
+    Returns a list of {"blocks": [block_text, ...], "text": page_text} dicts, or None if the PDF can't be opened.
+    """
     file_obj.seek(0)
+    pages = []
     try:
         doc = fitz.open(stream=io.BytesIO(file_obj.read()), filetype="pdf")
         for page in doc:
-            full_text += page.get_text()
+            blocks = page.get_text("blocks")
+            # page.get_text("text") হলো টেক্সট ব্লকগুলোর (type 0) ধারাবাহিক যোগফল, তাই আবার পার্স করার দরকার নেই
+            pages.append({
+                "blocks": [block[4] for block in blocks],
+                "text": "".join(block[4] for block in blocks if block[6] == 0),
+            })
         doc.close()
+    except fitz.FileDataError as e:
+        logger.warning(f"Could not open/process PDF: {e}")
+        pages = None
     except Exception as e:
-        logger.error(f"Error reading PDF content: {e}")
-    
-    # ফাংশন শেষে file_obj কে আবার শুরু থেকে নিয়ে যাওয়া নিরাপদ
-    file_obj.seek(0)
-    return full_text
-    
-def search_pdf_content(file_obj, file_path, query):
-    # .read() ডাকার আগে file_obj কে শুরু থেকে নিয়ে যেতে হবে
+        logger.exception(f"An error occurred while extracting PDF pages: {e}")
+        pages = None
+
     file_obj.seek(0)
-    
-    try:
-        query_parts = query.strip().split()
-        escaped_query_parts = [re.escape(part) for part in query_parts]
-        # একাধিক শব্দ থাকলেও সেগুলোর মাঝে এক বা একাধিক whitespace থাকবে
-        regex_pattern_str = r'\s+'.join(escaped_query_parts) 
-        matcher = re.compile(regex_pattern_str, re.IGNORECASE)
+    return pages
+
+
+def _compile_pdf_query(query):
+    query_parts = query.strip().split()
+    escaped_query_parts = [re.escape(part) for part in query_parts]
+    # একাধিক শব্দ থাকলেও সেগুলোর মাঝে এক বা একাধিক whitespace থাকবে
+    regex_pattern_str = r'\s+'.join(escaped_query_parts) 
+    return re.compile(regex_pattern_str, re.IGNORECASE)
+
 
+def _pdf_match(text, m, file_path, page_number):
+    start_index = max(0, m.start() - 50)
+    end_index = min(len(text), m.end() + 50)
+
+    highlighted_preview = (
+        text[start_index:m.start()] +
+        f"**{text[m.start():m.end()]}**" +
+        text[m.end():end_index]
+    )
+    highlighted_preview = re.sub(r'\s+', ' ', highlighted_preview).strip()
+
+    return {
+        "file": os.path.basename(file_path),
+        "path": file_path,
+        "page": page_number,
+        "line": None, # <--- লাইন নম্বর দেখানো বন্ধ করতে এটিকে None করা হলো
+        "preview": highlighted_preview
+    }
+
+
+def search_pdf_pages(pages, file_path, query, page_numbers=None, max_matches=None):
+    """
+    Searches pages produced by extract_pdf_pages.
+    `page_numbers` (0-based) restricts the scan to candidate pages, e.g. from the trigram index.
+    With `max_matches`, the remaining pages are not scanned once that many matches are found.
+    """
+    try:
+        matcher = _compile_pdf_query(query)
     except re.error as e:
         logger.error(f"Invalid regex pattern: {e}")
         return {"status": "error", "message": f"Invalid regex pattern: {e}"}, 400
 
     results = []
-    
-    try:
-        # doc তৈরি করার জন্য file_obj থেকে data পড়া হচ্ছে
-        doc = fitz.open(stream=io.BytesIO(file_obj.read()), filetype="pdf")
 
-        for pno in range(len(doc)):
-            page = doc[pno]
-            blocks = page.get_text("blocks")
-            
-            found_in_blocks = False
-            for block_num, block in enumerate(blocks, start=1):
-                block_text = block[4]
-                
-                for m in matcher.finditer(block_text):
-                    start_index = max(0, m.start() - 50)
-                    end_index = min(len(block_text), m.end() + 50)
-                    
-                    highlighted_preview = (
-                        block_text[start_index:m.start()] +
-                        f"**{block_text[m.start():m.end()]}**" +
-                        block_text[m.end():end_index]
-                    )
-                    highlighted_preview = re.sub(r'\s+', ' ', highlighted_preview).strip()
-
-                    results.append({
-                        "file": os.path.basename(file_path),
-                        "path": file_path,
-                        "page": pno + 1,
-                        "line": None, # <--- ব্লক নম্বর দেখানো বন্ধ করতে এটিকে None করা হলো
-                        "preview": highlighted_preview
-                    })
-                    found_in_blocks = True
-            
-            # ব্লক ম্যাথড কাজ না করলে বা কোনো কারণে পুরো পেইজ টেক্সট সার্চ করার জন্য
-            if not found_in_blocks:
-                full_page_text = page.get_text("text") or ""
-                for m in matcher.finditer(full_page_text):
-                    start_index = max(0, m.start() - 50)
-                    end_index = min(len(full_page_text), m.end() + 50)
-                    
-                    highlighted_preview = (
-                        full_page_text[start_index:m.start()] +
-                        f"**{full_page_text[m.start():m.end()]}**" +
-                        full_page_text[m.end():end_index]
-                    )
-                    highlighted_preview = re.sub(r'\s+', ' ', highlighted_preview).strip()
-
-                    results.append({
-                        "file": os.path.basename(file_path),
-                        "path": file_path,
-                        "page": pno + 1,
-                        "line": None, # <--- লাইন নম্বর দেখানো বন্ধ করতে এটিকে None করা হলো
-                        "preview": highlighted_preview
-                    })
+    def page_matches(pno, page):
+        found_in_blocks = False
+        for block_text in page["blocks"]:
+            for m in matcher.finditer(block_text):
+                yield _pdf_match(block_text, m, file_path, pno + 1)
+                found_in_blocks = True
 
-        doc.close()
-    except fitz.FileDataError as e:
-        logger.warning(f"Could not open/process {os.path.basename(file_path)}: {e}")
-    except Exception as e:
-        logger.exception(f"An error occurred while processing {os.path.basename(file_path)}: {e}")
-    
-    # ফাংশন শেষে file_obj কে আবার শুরু থেকে নিয়ে যাওয়া নিরাপদ
-    file_obj.seek(0)
-    return {"status": "ok", "matches": results, "count": len(results)}, 200
\ No newline at end of file
+        # ব্লক ম্যাথড কাজ না করলে বা কোনো কারণে পুরো পেইজ টেক্সট সার্চ করার জন্য
+        if not found_in_blocks:
+            full_page_text = page["text"] or ""
+            for m in matcher.finditer(full_page_text):
+                yield _pdf_match(full_page_text, m, file_path, pno + 1)
+
+    for pno, page in enumerate(pages or []):
+        if page_numbers is not None and pno not in page_numbers:
+            continue
+        for match in page_matches(pno, page):
+            if max_matches is not None and len(results) >= max_matches:
+                # সীমা পূর্ণ হয়েছে এবং আরও ম্যাচ আছে, বাকি পেজ আর দেখা হবে না
+                return {"status": "ok", "matches": results, "count": len(results), "truncated": True}, 200
+            results.append(match)
+
+    return {"status": "ok", "matches": results, "count": len(results), "truncated": False}, 200
+
+
+def _bold_preview(text, spans, start_index, end_index):
+    """Preview of text[start_index:end_index] with every (merged, sorted) span inside it in **bold**."""
+    pieces = []
+    previous = start_index
+    for start, end in spans:
+        if start < previous or end > end_index:
+            continue
+        pieces.append(text[previous:start])
+        pieces.append(f"**{text[start:end]}**")
+        previous = end
+    pieces.append(text[previous:end_index])
+    return "".join(pieces).strip()
+
+
+def search_pdf_terms(pages, file_path, query, page_numbers=None, max_matches=None):
+    """
+    Multi-term/boolean search for a parsed query (services/query_parser.Query) over pages
+    produced by extract_pdf_pages. PDFs have no reliable lines, so "line" scope is evaluated
+    per page; "file" scope over all pages. Whitespace inside a term matches any whitespace run,
+    like the single-phrase search. One result per page, with the terms found in "terms".
+    With `max_matches`, line-scope scanning stops after that many result pages.
+    """
+    def scan_pages():
+        for pno, page in enumerate(pages or []):
+            if page_numbers is not None and pno not in page_numbers:
+                continue
+            page_text = re.sub(r'\s+', ' ', "\n".join(page["blocks"]))
+            hits = query.find_terms(page_text, collapse_whitespace=True)
+            if hits:
+                yield pno, page_text, hits
+
+    page_hits = scan_pages()
+    if query.scope == "file":
+        page_hits = list(page_hits)
+        present_in_file = {term for _, _, hits in page_hits for _, _, term in hits}
+        if not query.matches(present_in_file):
+            return {"status": "ok", "matches": [], "count": 0, "truncated": False}, 200
+
+    results = []
+    for pno, page_text, hits in page_hits:
+        present = {term for _, _, term in hits}
+        found_terms = present & query.positive
+        if not found_terms or (query.scope == "line" and not query.matches(present)):
+            continue
+        if max_matches is not None and len(results) >= max_matches:
+            return {"status": "ok", "matches": results, "count": len(results), "truncated": True}, 200
+
+        spans = _merge_spans((start, end) for start, end, term in hits if term in found_terms)
+
+        # প্রথম ম্যাচের আশেপাশের অংশ preview হিসেবে দেখানো হলো
+        first_start, first_end = spans[0]
+        start_index = max(0, first_start - 50)
+        end_index = min(len(page_text), first_end + 50)
+
+        match = {
+            "file": os.path.basename(file_path),
+            "path": file_path,
+            "page": pno + 1,
+            "line": None,
+            "preview": _bold_preview(page_text, spans, start_index, end_index),
+            "terms": [query.terms[term] for term in sorted(found_terms)],
+        }
+        if query.max_distance:
+            match["distance"] = min(
+                query.distance(page_text[start:end], term, collapse_whitespace=True)
+                for start, end, term in hits if term in found_terms
+            )
+        results.append(match)
+
+    return {"status": "ok", "matches": results, "count": len(results), "truncated": False}, 200
@@ -0,0 +1,293 @@
+# services/readers/registry.py
+
+import importlib
+import io
+from abc import ABC, abstractmethod
+import logging
+import os
+import time
+
+from globals import CSV_STREAM_THRESHOLD_BYTES, TEXT_STREAM_THRESHOLD_BYTES
+
+logger = logging.getLogger("reader_registry")
+
+
+class Reader(ABC):
+    """
+    How one file format is extracted, searched and turned into viewer text.
+
+    The reader module (and with it fitz, pandas, openpyxl...) is imported on first use,
+    not when the server starts, so a worker that never sees a spreadsheet never loads pandas.
+    Subclasses only reach the module through `self.module`.
+    """
+
+    name = None
+    module_name = None
+    extensions = ()
+    # False for formats the viewer shows natively (PDF) instead of as extracted text
+    has_text = True
+    # empty extracted content is reported as an error (an empty PDF just has no matches)
+    empty_is_failure = True
+    # এর চেয়ে বড় ফাইল পুরোটা এক্সট্র্যাক্ট না করে search_stream দিয়ে সার্চ হয় (None = কখনো না)
+    stream_threshold = None
+    # আর্কাইভের মেম্বারগুলো নিজ নিজ রিডারে সার্চ হয় (file_reader.search_archive)
+    is_archive = False
+
+    def __init__(self):
+        self._module = None
+        # প্রথম লোডে কত সেকেন্ড লেগেছে (finder_reader_load_seconds মেট্রিক)
+        self.load_seconds = None
+
+    @property
+    def module(self):
+        if self._module is None:
+            started = time.perf_counter()
+            module = importlib.import_module(f"{__package__}.{self.module_name}")
+            # একই মডিউলের একাধিক রিডার (excel/csv) থাকলে প্রথমটিই লোডের সময় পায়
+            self.load_seconds = time.perf_counter() - started
+            self._module = module
+            logger.info(f"Loaded the {self.name} reader in {self.load_seconds * 1000:.1f} ms")
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    @abstractmethod
+    def extract(self, data, file_name, temp_uploads_dir):
+        """Extracted content of a file (what EXTRACTION_CACHE stores); falsy on failure."""
+
+    @abstractmethod
+    def search(self, content, file_item, query, line_index):
+        """
+        Searches extracted content with a parsed Query. `line_index(text)` returns the
+        (cached) LineIndex of plain text for readers that search text.
+        """
+
+    def text(self, content):
+        """Plain text of extracted content, for the viewer and the index."""
+        return content
+
+    def index_units(self, content):
+        """Index units of extracted content, or None for a single unit of its text."""
+        return None
+
+    def failure_message(self, file_name):
+        return f"Could not read content from {file_name}"
+
+    def streams(self, size):
+        return self.stream_threshold is not None and size > self.stream_threshold
+
+    def search_stream(self, data, file_name, file_path, query, max_matches):
+        """Searches a file too large to extract (only called when streams() is True)."""
+        return {"status": "error", "message": f"{file_name} can't be searched without extracting it."}, 400
+
+    def search_bytes(self, data, file_name, file_path, query, max_matches):
+        """Byte-level search without decoding, or None when the content must be extracted."""
+        return None
+
+
+def _search_text(module, text, file_item, query, line_index):
+    index = line_index(text)
+    if query.is_simple:
+        return module.search_text_content(
+            text, file_item['file_name'], file_item['file_path'], query.simple_text, index, file_item.get('max_matches')
+        )
+    return module.search_text_terms(
+        text, file_item['file_name'], file_item['file_path'], query, index, file_item.get('max_matches')
+    )
+
+
+class PdfReader(Reader):
+    name = "pdf"
+    module_name = "pdf_reader"
+    extensions = ('.pdf',)
+    has_text = False
+    empty_is_failure = False
+
+    def extract(self, data, file_name, temp_uploads_dir):
+        return self.module.extract_pdf_pages(io.BytesIO(data))
+
+    def search(self, content, file_item, query, line_index):
+        # খালি PDF (কোনো পেজ নেই) এরর নয়, শুধু ম্যাচ নেই
+        search = self.module.search_pdf_pages if query.is_simple else self.module.search_pdf_terms
+        return search(
+            content, file_item['file_path'], query.simple_text if query.is_simple else query,
+            file_item.get('candidate_units'), file_item.get('max_matches')
+        )
+
+    def text(self, content):
+        return "\n".join("\n".join(page["blocks"]) for page in content)
+
+    def index_units(self, content):
+        # প্রতিটি পেজ আলাদা ইউনিট, তাই ইনডেক্স পেজ পর্যন্ত candidate বলতে পারে
+        return ["\n".join(page["blocks"]) for page in content]
+
+
+class DocxReader(Reader):
+    name = "docx"
+    module_name = "docx_reader"
+    extensions = ('.docx',)
+
+    def extract(self, data, file_name, temp_uploads_dir):
+        return self.module.get_docx_content(io.BytesIO(data))
+
+    def search(self, content, file_item, query, line_index):
+        # টেক্সটে সার্চ করে প্রতিটি ম্যাচে পার্ট (বডি/হেডার/ফুটনোট...) ও প্যারাগ্রাফ যোগ করা হয়
+        result, status = _search_text(TEXT_READER.module, content.text, file_item, query, line_index)
+        content.annotate(result["matches"])
+        return result, status
+
+    def text(self, content):
+        return content.text
+
+
+class DocReader(Reader):
+    name = "doc"
+    module_name = "doc_reader"
+    extensions = ('.doc',)
+
+    def extract(self, data, file_name, temp_uploads_dir):
+        return self.module.get_doc_content(io.BytesIO(data), file_name, temp_uploads_dir)
+
+    def search(self, content, file_item, query, line_index):
+        return _search_text(TEXT_READER.module, content, file_item, query, line_index)
+
+
+class TabularReader(Reader):
+    """Cell-level search over spreadsheets and CSV files (excel_reader.TabularContent)."""
+    module_name = "excel_reader"
+
+    def search(self, content, file_item, query, line_index):
+        if query.is_simple:
+            return self.module.search_tabular_content(
+                content, file_item['file_name'], file_item['file_path'], query.simple_text, file_item.get('max_matches')
+            )
+        return self.module.search_tabular_terms(
+            content, file_item['file_name'], file_item['file_path'], query, file_item.get('max_matches')
+        )
+
+    def text(self, content):
+        # বড় CSV এর কন্টেন্ট শুধু ভিউয়ারের জন্য টেক্সট (search_stream দিয়ে সার্চ হয়)
+        return content if isinstance(content, str) else content.render_text()
+
+
+class ExcelReader(TabularReader):
+    name = "excel"
+    extensions = ('.xlsx', '.xls')
+
+    def extract(self, data, file_name, temp_uploads_dir):
+        return self.module.get_excel_content(io.BytesIO(data), file_name)
+
+    def failure_message(self, file_name):
+        return f"Could not read content from {file_name}. Check if required libraries (openpyxl/xlrd) are installed."
+
+
+class CsvReader(TabularReader):
+    name = "csv"
+    extensions = ('.csv',)
+    stream_threshold = CSV_STREAM_THRESHOLD_BYTES
+
+    def extract(self, data, file_name, temp_uploads_dir):
+        if self.streams(len(data)):
+            # বড় CSV সার্চ হয় স্ট্রিমিং করে (search_stream); এখানে শুধু ভিউয়ারের জন্য টেক্সট
+            return TEXT_READER.module.get_text_content(io.BytesIO(data))
+        return self.module.get_csv_content(io.BytesIO(data))
+
+    def failure_message(self, file_name):
+        return f"Could not read content from {file_name}. Check if required libraries (pandas) are installed."
+
+    def search_stream(self, data, file_name, file_path, query, max_matches):
+        # mmap (ডিস্কে রাখা ফাইল) নিজেই file-like, তাই কপি না করে সরাসরি পড়া হয়
+        stream = data if hasattr(data, 'read') else io.BytesIO(data)
+        return self.module.search_csv_stream(stream, file_name, file_path, query, max_matches)
+
+
+class ArchiveReader(Reader):
+    """
+    .zip archives: never extracted or cached as a whole; each member is read in memory and
+    searched with its own reader (see file_reader.search_archive).
+    """
+    name = "zip"
+    module_name = "archive_reader"
+    extensions = ('.zip',)
+    has_text = False
+    # কন্টেন্ট না থাকা এরর নয়; search() নিজেই 400 ফেরত দেয়
+    empty_is_failure = False
+    is_archive = True
+
+    def streams(self, size):
+        # পুরো আর্কাইভ কখনো এক্সট্র্যাক্ট, ক্যাশ বা ইনডেক্স হয় না (বড় স্ট্রিম করা ফাইলের মতো)
+        return True
+
+    def extract(self, data, file_name, temp_uploads_dir):
+        # আর্কাইভের নিজের কোনো কন্টেন্ট নেই; মেম্বারগুলো আলাদাভাবে এক্সট্র্যাক্ট হয়
+        return None
+
+    def search(self, content, file_item, query, line_index):
+        return self.search_stream(None, file_item['file_name'], file_item['file_path'], query, file_item.get('max_matches'))
+
+    def search_stream(self, data, file_name, file_path, query, max_matches):
+        # মেম্বারগুলো file_reader.search_archive দিয়েই সার্চ হয় (search_file_content)
+        return {"status": "error", "message": f"Archive {file_name} is searched member by member."}, 400
+
+
+class TextReader(Reader):
+    """Code and plain text files; searched straight from their bytes whenever possible."""
+    name = "text"
+    module_name = "text_reader"
+    extensions = (
+        '.py', '.js', '.java', '.class', '.cpp', '.cc', '.cxx', '.hpp', '.hxx',
+        '.cs', '.ts', '.tsx', '.go', '.c', '.h', '.php', '.phtml', '.sql', '.rs',
+        '.rb', '.swift', '.kt', '.kts', '.r', '.R', '.pl', '.pm', '.dart', '.scala',
+        '.sc', '.vb', '.asm', '.s', '.html', '.htm', '.css', '.m', '.mat', '.sh',
+        '.bash', '.cls', '.cbl', '.cob', '.fs', '.fsi', '.fsx', '.ps1', '.plsql',
+        '.scm', '.ss', '.tsql', '.cr', '.pro', '.vhd', '.vhdl', '.d', '.abap',
+        '.txt', '.md', '.log', '.json', '.xml', '.yml', '.yaml', '.toml',
+    )
+    stream_threshold = TEXT_STREAM_THRESHOLD_BYTES
+
+    def extract(self, data, file_name, temp_uploads_dir):
+        return self.module.get_text_content(io.BytesIO(data))
+
+    def search(self, content, file_item, query, line_index):
+        return _search_text(self.module, content, file_item, query, line_index)
+
+    def search_stream(self, data, file_name, file_path, query, max_matches):
+        return self.module.search_text_windows(data, file_name, file_path, query, max_matches)
+
+    def search_bytes(self, data, file_name, file_path, query, max_matches):
+        return self.module.search_text_bytes(data, file_name, file_path, query, max_matches)
+
+
+TEXT_READER = TextReader()
+
+# 🌟 এক্সটেনশন (ছোট হাতের) -> রিডার 🌟
+READERS = {}
+for _reader in (PdfReader(), DocxReader(), DocReader(), ExcelReader(), CsvReader(), ArchiveReader(), TEXT_READER):
+    for _extension in _reader.extensions:
+        READERS[_extension.lower()] = _reader
+
+
+def get_reader(file_name):
+    """The Reader for a file name's extension, or None if the type isn't searchable."""
+    return READERS.get(os.path.splitext(file_name)[1].lower())
+
+
+def all_readers():
+    """Every registered reader once, in registration order."""
+    return list({id(reader): reader for reader in READERS.values()}.values())
+
+
+def preload_readers(names):
+    """
+    Imports the named readers' modules now ("all" for every reader), e.g. in the background
+    after startup so the first request doesn't pay for pandas/fitz. Returns {name: seconds}.
+    """
+    timings = {}
+    for reader in all_readers():
+        if "all" in names or reader.name in names:
+            started = time.perf_counter()
+            reader.module
+            timings[reader.name] = time.perf_counter() - started
+    return timings
@@ -3,26 +3,82 @@
 import logging
 import io
 import re
+import codecs
+import operator
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, groupby, repeat
 
 logger = logging.getLogger("text_reader")
 
+# ফাইলের শুরুর এতটুকু দেখে এনকোডিং/বাইনারি ঠিক করা হয় (git এর মতো)
+SNIFF_BYTES = 8192
+
+# বাইনারি বলে বাদ দেওয়া ফাইলের রেজাল্টে এই কারণ থাকে
+BINARY_SKIP_REASON = "binary"
+
+_LONE_CR = re.compile(b'\r(?!\n)')
+
+# খুব বড় টেক্সট ফাইল এতটুকু করে ডিকোড করে সার্চ করা হয় (search_text_windows)
+TEXT_WINDOW_BYTES = 8 * 1024 * 1024
+
+
+def sniff_text_encoding(data):
+    """
+    Classifies a file from its first SNIFF_BYTES bytes: 'utf-8-sig' / 'utf-16' (BOM),
+    'utf-16-le' / 'utf-16-be' (no BOM, every other byte zero), 'binary' (other NUL bytes),
+    'utf-8' (the sample decodes) or 'latin-1'.
+    """
+    head = bytes(data[:SNIFF_BYTES])
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    if b'\x00' in head:
+        # BOM ছাড়া UTF-16: ASCII লেখায় প্রতি দ্বিতীয় বাইট শূন্য
+        even, odd = head[0::2], head[1::2]
+        if odd.count(0) > 0.9 * len(odd) and even.count(0) < 0.1 * len(even):
+            return 'utf-16-le'
+        if even.count(0) > 0.9 * len(even) and odd.count(0) < 0.1 * len(odd):
+            return 'utf-16-be'
+        return 'binary'
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # নমুনার শেষে কাটা পড়া মাল্টিবাইট অক্ষর ভুল নয়
+        if e.reason != 'unexpected end of data':
+            return 'latin-1'
+    return 'utf-8'
+
+
+def _normalize_line_endings(text):
+    # CRLF/CR না থাকলে (বেশিরভাগ ফাইল) কোনো কপি হয় না
+    if '\r' not in text:
+        return text
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
 def get_text_content(file_obj):
     full_text = ""
     try:
         file_obj.seek(0)
         content_bytes = file_obj.read()
-        
-        # 1. BOM Removal (Important for UTF-8 files with BOM)
-        if content_bytes.startswith(b'\xef\xbb\xbf'):
-            content_bytes = content_bytes[3:]
-            
-        # 2. Try decoding with fallbacks
-        for encoding in ['utf-8', 'latin-1', 'cp1252']:
-            try:
-                full_text = content_bytes.decode(encoding)
-                break
-            except UnicodeDecodeError:
-                continue
+        encoding = sniff_text_encoding(content_bytes)
+
+        if encoding.startswith('utf-16'):
+            full_text = content_bytes.decode(encoding, errors='replace')
+        else:
+            # 1. BOM Removal (Important for UTF-8 files with BOM)
+            if encoding == 'utf-8-sig':
+                content_bytes = content_bytes[3:]
+
+            # 2. Try decoding with fallbacks (a sniffed non-UTF-8 file goes straight to latin-1)
+            for encoding in (['utf-8', 'latin-1'] if encoding != 'latin-1' else ['latin-1']):
+                try:
+                    full_text = content_bytes.decode(encoding)
+                    break
+                except UnicodeDecodeError:
+                    continue
     except Exception as e:
         logger.error(f"Error reading text file content: {e}")
         return ""
@@ -30,48 +86,388 @@ def get_text_content(file_obj):
     # 3. Standardize Line Endings (CRLF to LF)
     # This is the most crucial step for correct and consistent counting across OS types.
     # Replace all \r\n and \r with a single \n.
-    full_text = full_text.replace('\r\n', '\n').replace('\r', '\n') 
-    
-    return full_text
+    return _normalize_line_endings(full_text)
+
+class LineIndex:
+    """
+    Start offsets of every '\n'-separated line of a text, so that finding the line of a
+    character offset is a binary search (O(log n)) instead of counting newlines.
+    Built once per text and reusable (the extraction cache keeps it next to the text).
+    """
+
+    def __init__(self, text):
+        # starts[i] = offset of line i (0-based); the last entry is len(text) + 1 as a sentinel.
+        # Everything here runs in C iterators, no per-line Python loop.
+        line_lengths = map(len, text.split('\n'))
+        self.starts = array('q', accumulate(map(operator.add, line_lengths, repeat(1)), initial=0))
+
+    def __len__(self):
+        """Number of lines."""
+        return len(self.starts) - 1
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + self.starts.buffer_info()[1] * self.starts.itemsize
+
+    def line_number(self, offset):
+        """1-based line number containing character `offset`."""
+        return bisect_right(self.starts, offset)
 
-def search_text_content(full_text, file_name, file_path, query):
+    def line_bounds(self, line_number):
+        """(start, end) offsets of a 1-based line, excluding its '\n'."""
+        return self.starts[line_number - 1], self.starts[line_number] - 1
+
+    def line_text(self, text, line_number):
+        start, end = self.line_bounds(line_number)
+        return text[start:end]
+
+
+def _highlight_line(line_text, line_start, spans):
+    """
+    Wraps every (start, end) span (absolute offsets) of one line in <mark>, in a single pass of slicing.
+    """
+    line_end = line_start + len(line_text)
+    pieces = []
+    previous = 0
+    for start, end in spans:
+        # লাইনের বাইরে চলে যাওয়া ম্যাচ লাইনের শেষে কেটে দেওয়া হলো
+        start = max(start, line_start) - line_start
+        end = min(end, line_end) - line_start
+        if start < previous:
+            continue
+        pieces.append(line_text[previous:start])
+        pieces.append(f"<mark>{line_text[start:end]}</mark>")
+        previous = end
+    pieces.append(line_text[previous:])
+    return "".join(pieces)
+
+
+def search_text_content(full_text, file_name, file_path, query, line_index=None, max_matches=None):
+    """
+    Single-phrase search. With `max_matches`, scanning stops once that many matches are found
+    and the result has "truncated": True if the text has more.
+    """
     results = []
     
     escaped_query = re.escape(query)
     pattern = re.compile(escaped_query, re.IGNORECASE | re.DOTALL)
-    
-    # Text split into lines (lines list contains non-empty and empty lines)
-    lines = full_text.splitlines(keepends=False)
-    
+
+    if line_index is None:
+        line_index = LineIndex(full_text)
+
+    # 1. একই লাইনের সব ম্যাচ একসাথে জড়ো করা (line number -> [(start, end), ...])
+    spans_by_line = {}
+    rows_by_line = {}
+    row_count = 0
+    truncated = False
     for match in pattern.finditer(full_text):
-        start_index = match.start()
-        
-        # 1. Find the exact line number of the match
-        # Count the number of newline characters ('\n') before the start_index
-        line_number = full_text.count('\n', 0, start_index) + 1
-        
-        # 2. Extract the complete line text
-        if 1 <= line_number <= len(lines):
-            line_text = lines[line_number - 1]
+        # Binary search over line start offsets gives the exact line of the match
+        line_number = line_index.line_number(match.start())
+        if max_matches is not None and row_count >= max_matches:
+            truncated = True
+            if line_number not in spans_by_line:
+                break
+            # সীমা পূর্ণ হলেও একই লাইনের বাকি ম্যাচগুলো preview-তে হাইলাইট করা হয়
+            spans_by_line[line_number].append(match.span())
+            continue
+        spans_by_line.setdefault(line_number, []).append(match.span())
+        rows_by_line[line_number] = rows_by_line.get(line_number, 0) + 1
+        row_count += 1
+
+    # 2. প্রতিটি লাইনের preview একবারই তৈরি করে ওই লাইনের সব ম্যাচ হাইলাইট করা হলো
+    for line_number, spans in spans_by_line.items():
+        line_start, _ = line_index.line_bounds(line_number)
+        line_text = line_index.line_text(full_text, line_number)
+        highlighted_preview = _highlight_line(line_text, line_start, spans)
+
+        for _ in range(rows_by_line[line_number]):
+            results.append({
+                "file": file_name,
+                "path": file_path,
+                "page": "N/A",
+                "line": line_number,
+                "preview": highlighted_preview
+            })
+    
+    return {"status": "ok", "matches": results, "count": len(results), "truncated": truncated}, 200
+
+
+def _merge_spans(spans):
+    """Sorts (start, end) spans and merges overlapping ones."""
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
         else:
-            # Fallback
-            line_text = match.group()
-
-        # 3. Highlight the preview text on the server-side
-        highlighted_preview = re.sub(
-            re.escape(match.group()), 
-            f"<mark>{match.group()}</mark>", 
-            line_text, 
-            count=1, 
-            flags=re.IGNORECASE | re.DOTALL
-        )
-        
-        results.append({
+            merged.append((start, end))
+    return merged
+
+
+def search_text_terms(full_text, file_name, file_path, query, line_index=None, max_matches=None, present_terms=None):
+    """
+    Multi-term/boolean search for a parsed query (services/query_parser.Query).
+
+    Every term is found in one scan of the text (Aho-Corasick); the expression is then
+    evaluated per line, or once over the whole file when query.scope is "file".
+    Returns one result per line, with the terms found on that line in "terms" (and, for a
+    fuzzy query, the edit distance of the closest of them in "distance").
+    With `max_matches`, line-scope scanning stops after that many result lines.
+
+    With a `present_terms` set, a file-scope query isn't evaluated here: the terms found are
+    added to the set and every line with a non-negated term is returned (for callers that
+    search one file block by block).
+    """
+    if line_index is None:
+        line_index = LineIndex(full_text)
+
+    # হিটগুলো শেষ অফসেট অনুযায়ী আসে, তাই একই লাইনের হিটগুলো পাশাপাশি থাকে
+    hits_by_line = groupby(query.iter_terms(full_text), key=lambda hit: line_index.line_number(hit[0]))
+
+    if query.scope == "file":
+        hits_by_line = [(line_number, list(hits)) for line_number, hits in hits_by_line]
+        present_in_file = {term for _, hits in hits_by_line for _, _, term in hits}
+        if present_terms is not None:
+            present_terms.update(present_in_file)
+        elif not query.matches(present_in_file):
+            return {"status": "ok", "matches": [], "count": 0, "truncated": False}, 200
+
+    results = []
+    truncated = False
+    for line_number, hits in hits_by_line:
+        hits = list(hits)
+        present = {term for _, _, term in hits}
+        found_terms = present & query.positive
+        # শুধু non-negated টার্ম থাকা লাইনই দেখানো হয়
+        if not found_terms or (query.scope == "line" and not query.matches(present)):
+            continue
+        if max_matches is not None and len(results) >= max_matches:
+            truncated = True
+            break
+
+        line_start, _ = line_index.line_bounds(line_number)
+        line_text = line_index.line_text(full_text, line_number)
+        spans = _merge_spans((start, end) for start, end, term in hits if term in found_terms)
+
+        match = {
             "file": file_name,
             "path": file_path,
             "page": "N/A",
             "line": line_number,
-            "preview": highlighted_preview
-        })
-    
-    return {"status": "ok", "matches": results, "count": len(results)}, 200
\ No newline at end of file
+            "preview": _highlight_line(line_text, line_start, spans),
+            "terms": [query.terms[term] for term in sorted(found_terms)],
+        }
+        if query.max_distance:
+            # ফাজি সার্চে লাইনের সবচেয়ে কাছের ম্যাচের দূরত্ব (রেজাল্ট এটি অনুযায়ী সাজানো হয়)
+            match["distance"] = min(
+                query.distance(full_text[start:end], term) for start, end, term in hits if term in found_terms
+            )
+        results.append(match)
+
+    return {"status": "ok", "matches": results, "count": len(results), "truncated": truncated}, 200
+
+
+def _decode_line(line_bytes, encoding):
+    """Decodes one line; a line that isn't valid UTF-8 falls back to latin-1 (as whole files do)."""
+    if encoding != 'latin-1':
+        try:
+            return line_bytes.decode('utf-8'), 'utf-8'
+        except UnicodeDecodeError:
+            pass
+    return line_bytes.decode('latin-1'), 'latin-1'
+
+
+def _count_newlines(data, start, end):
+    if isinstance(data, bytes):
+        return data.count(b'\n', start, end)
+    # mmap এ count() নেই; ছোট ছোট টুকরো কপি করে গোনা হয়
+    count = 0
+    for position in range(start, end, 1 << 20):
+        count += data[position:min(position + (1 << 20), end)].count(b'\n')
+    return count
+
+
+def search_text_bytes(data, file_name, file_path, query, max_matches=None):
+    """
+    Searches a text file's raw bytes (bytes or mmap) without decoding it, for a parsed query
+    (services/query_parser.Query). Only the lines with matches are decoded, for the preview.
+
+    Returns the same result as decoding and running search_text_content, a "skipped" empty
+    result for binary files, or None when the bytes can't be searched directly (UTF-16,
+    lone CR line endings, non-ASCII, boolean or fuzzy queries that pass the byte pre-check); the
+    caller then decodes the file as usual.
+    """
+    encoding = sniff_text_encoding(data)
+    if encoding == 'binary':
+        return {"status": "ok", "matches": [], "count": 0, "truncated": False, "skipped": BINARY_SKIP_REASON}, 200
+    if encoding.startswith('utf-16'):
+        return None
+
+    terms = [query.simple_text] if query.is_simple else query.prefilter_terms()
+    # bytes regex এর IGNORECASE শুধু ASCII অক্ষরে কাজ করে
+    if not all(term.isascii() and '\r' not in term and '\n' not in term for term in terms):
+        return None
+    start = 3 if encoding == 'utf-8-sig' else 0
+
+    if not query.is_simple:
+        # কোনো non-negated টার্ম (ফাজি হলে তার কোনো পিস) না থাকলে কোনো লাইন/ফাইল রিপোর্ট হয় না, তাই ডিকোড করার দরকার নেই
+        any_term = re.compile(b'|'.join(re.escape(term.encode('ascii')) for term in terms), re.IGNORECASE)
+        if any_term.search(data, start) is None:
+            return {"status": "ok", "matches": [], "count": 0, "truncated": False}, 200
+        return None
+
+    crlf = data.find(b'\r', start) != -1
+    if crlf and _LONE_CR.search(data, start) is not None:
+        # একা '\r' ও লাইন ভাঙে; সেই লাইন নম্বর ডিকোড করা টেক্সটেই ঠিকভাবে হয়
+        return None
+
+    pattern = re.compile(re.escape(query.simple_text.encode('ascii')), re.IGNORECASE | re.DOTALL)
+
+    # একই লাইনের সব ম্যাচ একসাথে জড়ো করা (line number -> [line_start, line_end, [(start, end), ...]])
+    lines = {}
+    rows_by_line = {}
+    row_count = 0
+    truncated = False
+    line_number = 1
+    counted_to = start
+    line_start = line_end = -1
+    for match in pattern.finditer(data, start):
+        position = match.start()
+        if position > line_end:
+            # নতুন লাইন: আগের গোনা জায়গা থেকে শুধু এই পর্যন্ত '\n' গোনা হয় (C তে)
+            line_number += _count_newlines(data, counted_to, position)
+            counted_to = position
+            line_start = max(data.rfind(b'\n', start, position) + 1, start)
+            line_end = data.find(b'\n', position)
+            if line_end == -1:
+                line_end = len(data)
+        if max_matches is not None and row_count >= max_matches:
+            truncated = True
+            if line_number not in lines:
+                break
+            lines[line_number][2].append(match.span())
+            continue
+        lines.setdefault(line_number, [line_start, line_end, []])[2].append(match.span())
+        rows_by_line[line_number] = rows_by_line.get(line_number, 0) + 1
+        row_count += 1
+
+    results = []
+    for line_number, (line_start, line_end, spans) in lines.items():
+        line_bytes = data[line_start:line_end]
+        if crlf and line_bytes.endswith(b'\r'):
+            line_bytes = line_bytes[:-1]
+        line_text, line_encoding = _decode_line(line_bytes, encoding)
+        if line_encoding == 'latin-1':
+            char_spans = [(start - line_start, end - line_start) for start, end in spans]
+        else:
+            # বাইট অফসেট থেকে অক্ষর অফসেট
+            char_spans = [
+                (len(line_bytes[:start - line_start].decode('utf-8', errors='replace')),
+                 len(line_bytes[:end - line_start].decode('utf-8', errors='replace')))
+                for start, end in spans
+            ]
+        highlighted_preview = _highlight_line(line_text, 0, char_spans)
+        for _ in range(rows_by_line[line_number]):
+            results.append({
+                "file": file_name,
+                "path": file_path,
+                "page": "N/A",
+                "line": line_number,
+                "preview": highlighted_preview
+            })
+
+    return {"status": "ok", "matches": results, "count": len(results), "truncated": truncated}, 200
+
+
+def iter_text_windows(data, encoding, window_bytes):
+    """
+    Decodes raw bytes (bytes or mmap) one window at a time and yields (first_line_number, text)
+    blocks of whole lines with normalized line endings. The partial last line of a window is
+    carried over and scanned again with the next one, so no line is ever split.
+
+    Like get_text_content, UTF-8 is decoded strictly (a UTF-8 BOM is skipped): a byte that
+    isn't valid UTF-8, even far past the sniffed sample, raises UnicodeDecodeError, and the
+    caller starts over with 'latin-1'.
+    """
+    start = 0
+    if encoding.startswith('utf-16'):
+        # BOM ডিকোডার নিজেই বাদ দেয়; পুরো ফাইল ডিকোডের মতোই ভুল বাইট বদলে দেওয়া হয়
+        errors = 'replace'
+    else:
+        if bytes(data[:3]) == codecs.BOM_UTF8:
+            start = 3
+        encoding = 'latin-1' if encoding == 'latin-1' else 'utf-8'
+        errors = 'strict'
+    decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+
+    size = len(data)
+    carry = ""
+    line_number = 1
+    for position in range(start, size, window_bytes):
+        final = position + window_bytes >= size
+        # mmap থেকে শুধু এই উইন্ডোটুকু মেমরিতে আসে
+        text = carry + decoder.decode(data[position:position + window_bytes], final)
+        held = ""
+        if not final and text.endswith('\r'):
+            # "\r\n" দুই উইন্ডোতে ভাগ হলে দুটি লাইন-ব্রেক গোনা হতো
+            text, held = text[:-1], '\r'
+        text = _normalize_line_endings(text)
+        cut = len(text) if final else text.rfind('\n') + 1
+        carry = text[cut:] + held
+        if cut:
+            block = text[:cut]
+            yield line_number, block
+            line_number += block.count('\n')
+
+
+def search_text_windows(data, file_name, file_path, query, max_matches=None, window_bytes=None):
+    """
+    Searches a very large text file (bytes or mmap) without holding its decoded text:
+    search_text_bytes when it applies, otherwise window by window (iter_text_windows) with
+    the same results as decoding the whole file, except that a term containing a line break
+    can't match across two windows.
+    """
+    outcome = search_text_bytes(data, file_name, file_path, query, max_matches)
+    if outcome is not None:
+        return outcome
+
+    window_bytes = window_bytes or TEXT_WINDOW_BYTES
+    try:
+        return _search_windows(data, sniff_text_encoding(data), file_name, file_path, query, max_matches, window_bytes)
+    except UnicodeDecodeError:
+        # নমুনার পরে কোথাও UTF-8 নয় এমন বাইট: পুরো ফাইল ডিকোডের মতোই শুরু থেকে latin-1 এ আবার
+        return _search_windows(data, 'latin-1', file_name, file_path, query, max_matches, window_bytes)
+
+
+def _search_windows(data, encoding, file_name, file_path, query, max_matches, window_bytes):
+    results = []
+    truncated = False
+    file_scope = not query.is_simple and query.scope == "file"
+    present_in_file = set() if file_scope else None
+
+    for first_line, block in iter_text_windows(data, encoding, window_bytes):
+        remaining = None if max_matches is None else max_matches - len(results)
+        if file_scope:
+            # পুরো ফাইলে কোন টার্ম আছে তা জানতে শেষ পর্যন্ত পড়া হয়, রেজাল্ট max_matches + 1 টির বেশি নয়
+            result, _ = search_text_terms(
+                block, file_name, file_path, query, None,
+                None if remaining is None else max(remaining + 1, 0), present_in_file
+            )
+        elif query.is_simple:
+            result, _ = search_text_content(block, file_name, file_path, query.simple_text, None, remaining)
+        else:
+            result, _ = search_text_terms(block, file_name, file_path, query, None, remaining)
+
+        for match in result["matches"]:
+            match["line"] += first_line - 1
+        results.extend(result["matches"])
+        if not file_scope and result["truncated"]:
+            truncated = True
+            break
+
+    if file_scope:
+        if not query.matches(present_in_file):
+            return {"status": "ok", "matches": [], "count": 0, "truncated": False}, 200
+        if max_matches is not None and len(results) > max_matches:
+            results = results[:max_matches]
+            truncated = True
+
+    return {"status": "ok", "matches": results, "count": len(results), "truncated": truncated}, 200
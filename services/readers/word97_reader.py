@@ -0,0 +1,287 @@
+# services/readers/word97_reader.py
+# 🚀 LibreOffice ছাড়াই Word 97-2003 (.doc) ফাইল থেকে সরাসরি টেক্সট বের করা হয়
+
+import logging
+import re
+import struct
+
+logger = logging.getLogger("word97_reader")
+
+CFB_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+# বিশেষ সেক্টর নম্বর (MS-CFB)
+MAX_REGULAR_SECTOR = 0xFFFFFFFA
+NO_STREAM = 0xFFFFFFFF
+
+DIR_ENTRY_SIZE = 128
+STORAGE_OBJECT, STREAM_OBJECT, ROOT_STORAGE_OBJECT = 1, 2, 5
+
+# FIB (MS-DOC) এর ফিল্ড
+WORD_IDENT = 0xA5EC
+# nFib 101-105 হলো Word 6/95, যার FIB এর গঠন আলাদা
+MIN_WORD97_NFIB = 106
+FIB_FLAG_ENCRYPTED = 0x0100
+FIB_FLAG_WHICH_TABLE_STREAM = 0x0200
+FIB_FLAG_OBFUSCATED = 0x8000
+FC_CLX_INDEX = 33  # fibRgFcLcb97 এর ভেতরে (fcClx, lcbClx) জোড়ার ক্রম
+
+PIECE_COMPRESSED_FLAG = 0x40000000
+PIECE_FC_MASK = 0x3FFFFFFF
+
+# Word এর বিশেষ ক্যারেক্টারগুলোকে প্লেইন টেক্সটে রূপান্তর
+_SPECIAL_CHARS = {
+    '\r': '\n',       # paragraph end
+    '\x0b': '\n',     # line break
+    '\x0c': '\n',     # page / section break
+    '\x07': '\t',     # table cell / row end
+    '\x1e': '-',      # non-breaking hyphen
+    '\xa0': ' ',
+}
+_DROPPED_CHARS = re.compile(r'[\x00-\x06\x08\x0e-\x12\x16-\x1d\x1f]')
+
+
+class Word97FormatError(ValueError):
+    """The bytes are not a Word 97-2003 document this reader can handle."""
+
+
+class CompoundFile:
+    """
+    Minimal read-only parser of the OLE Compound File Binary format (MS-CFB), enough to
+    read the top-level streams of a .doc file from memory.
+    """
+
+    def __init__(self, data):
+        self.data = memoryview(data)
+        if len(data) < 512 or bytes(self.data[:8]) != CFB_SIGNATURE:
+            raise Word97FormatError("Not an OLE compound file.")
+
+        (sector_shift, mini_sector_shift) = struct.unpack_from('<HH', self.data, 0x1E)
+        (self.fat_sector_count, self.first_dir_sector, _, self.mini_stream_cutoff,
+         self.first_mini_fat_sector, self.mini_fat_sector_count,
+         self.first_difat_sector, self.difat_sector_count) = struct.unpack_from('<8I', self.data, 0x2C)
+        if sector_shift not in (9, 12) or mini_sector_shift != 6:
+            raise Word97FormatError("Unsupported compound file sector size.")
+
+        self.sector_size = 1 << sector_shift
+        self.mini_sector_size = 1 << mini_sector_shift
+        # ফাইলের দৈর্ঘ্য থেকে সর্বোচ্চ সেক্টর সংখ্যা, যাতে ভাঙা chain অসীম লুপে না পড়ে
+        self.max_sectors = len(data) // self.sector_size + 1
+
+        self.fat = self._read_fat()
+        self.entries = self._read_directory()
+        root = self.entries[0]
+        if root['type'] != ROOT_STORAGE_OBJECT:
+            raise Word97FormatError("Compound file has no root entry.")
+        self._mini_stream = None
+        self._mini_fat = None
+        self.streams = {entry['name']: entry for entry in self._children(root) if entry['type'] == STREAM_OBJECT}
+
+    def _sector(self, number):
+        offset = (number + 1) * self.sector_size
+        if number > MAX_REGULAR_SECTOR or offset >= len(self.data):
+            raise Word97FormatError(f"Sector {number} is out of range.")
+        return self.data[offset:offset + self.sector_size]
+
+    def _read_fat(self):
+        fat_sectors = list(struct.unpack_from('<109I', self.data, 0x4C))
+        difat_sector = self.first_difat_sector
+        per_difat_sector = self.sector_size // 4 - 1
+        for _ in range(min(self.difat_sector_count, self.max_sectors)):
+            if difat_sector > MAX_REGULAR_SECTOR:
+                break
+            values = struct.unpack(f'<{per_difat_sector + 1}I', self._sector(difat_sector))
+            fat_sectors.extend(values[:per_difat_sector])
+            difat_sector = values[per_difat_sector]
+
+        fat = []
+        per_sector = self.sector_size // 4
+        for sector in fat_sectors[:self.fat_sector_count]:
+            if sector > MAX_REGULAR_SECTOR:
+                break
+            fat.extend(struct.unpack(f'<{per_sector}I', self._sector(sector)))
+        return fat
+
+    def _chain(self, start, fat, limit):
+        sectors = []
+        sector = start
+        while sector <= MAX_REGULAR_SECTOR:
+            if len(sectors) >= limit or sector >= len(fat):
+                raise Word97FormatError("Broken sector chain.")
+            sectors.append(sector)
+            sector = fat[sector]
+        return sectors
+
+    def _read_chain(self, start, size=None):
+        chunks = [self._sector(s) for s in self._chain(start, self.fat, self.max_sectors)]
+        content = b''.join(chunks)
+        return content if size is None else content[:size]
+
+    def _read_directory(self):
+        raw = self._read_chain(self.first_dir_sector)
+        entries = []
+        for offset in range(0, len(raw) - DIR_ENTRY_SIZE + 1, DIR_ENTRY_SIZE):
+            name_length, entry_type = struct.unpack_from('<HB', raw, offset + 64)
+            left, right, child = struct.unpack_from('<3I', raw, offset + 68)
+            start, size = struct.unpack_from('<IQ', raw, offset + 116)
+            if self.sector_size == 512:
+                size &= 0xFFFFFFFF  # version 3 ফাইলে উপরের ৩২ বিট অর্থহীন
+            name = raw[offset:offset + max(0, min(name_length, 64) - 2)].decode('utf-16-le', errors='replace')
+            entries.append({
+                'name': name, 'type': entry_type, 'left': left, 'right': right,
+                'child': child, 'start': start, 'size': size,
+            })
+        if not entries:
+            raise Word97FormatError("Empty compound file directory.")
+        return entries
+
+    def _children(self, storage):
+        """Entries directly inside a storage (its red-black tree, walked iteratively)."""
+        children = []
+        seen = set()
+        stack = [storage['child']]
+        while stack:
+            index = stack.pop()
+            if index == NO_STREAM or index in seen or index >= len(self.entries):
+                continue
+            seen.add(index)
+            entry = self.entries[index]
+            children.append(entry)
+            stack.extend((entry['left'], entry['right']))
+        return children
+
+    def open_stream(self, name):
+        """Returns the bytes of a top-level stream, or None if it doesn't exist."""
+        entry = self.streams.get(name)
+        if entry is None:
+            return None
+        if entry['size'] >= self.mini_stream_cutoff:
+            return self._read_chain(entry['start'], entry['size'])
+
+        # ছোট স্ট্রিমগুলো root এন্ট্রির mini stream এর ভেতরে ৬৪-বাইট সেক্টরে থাকে
+        if self._mini_stream is None:
+            root = self.entries[0]
+            self._mini_stream = self._read_chain(root['start'], root['size'])
+            mini_fat_raw = self._read_chain(self.first_mini_fat_sector) if self.mini_fat_sector_count else b''
+            self._mini_fat = list(struct.unpack(f'<{len(mini_fat_raw) // 4}I', mini_fat_raw))
+        limit = len(self._mini_stream) // self.mini_sector_size + 1
+        chunks = []
+        for sector in self._chain(entry['start'], self._mini_fat, limit):
+            offset = sector * self.mini_sector_size
+            chunks.append(self._mini_stream[offset:offset + self.mini_sector_size])
+        return b''.join(chunks)[:entry['size']]
+
+
+def _clean_text(text):
+    # ফিল্ড কোড (0x13 ... 0x14) বাদ দিয়ে শুধু ফিল্ডের রেজাল্ট (0x14 ... 0x15) রাখা হয়
+    if '\x13' in text:
+        pieces = []
+        in_code = []  # প্রতিটি খোলা (nested) ফিল্ডের জন্য: এখনও কোড অংশে আছি কিনা
+        for part in re.split(r'([\x13\x14\x15])', text):
+            if part == '\x13':
+                in_code.append(True)
+            elif part == '\x14':
+                if in_code:
+                    in_code[-1] = False
+            elif part == '\x15':
+                if in_code:
+                    in_code.pop()
+            elif not any(in_code):
+                pieces.append(part)
+        text = ''.join(pieces)
+
+    for special, replacement in _SPECIAL_CHARS.items():
+        text = text.replace(special, replacement)
+    return _DROPPED_CHARS.sub('', text)
+
+
+def _read_pieces(word_stream, clx):
+    """Yields the text of every piece in the Clx's piece table (PlcPcd), in CP order."""
+    position = 0
+    while position < len(clx):
+        clxt = clx[position]
+        if clxt == 0x01:  # Prc: property modifiers, skipped
+            (grpprl_size,) = struct.unpack_from('<h', clx, position + 1)
+            position += 3 + max(0, grpprl_size)
+        elif clxt == 0x02:  # Pcdt: the piece table
+            (plc_size,) = struct.unpack_from('<I', clx, position + 1)
+            plc = clx[position + 5:position + 5 + plc_size]
+            piece_count = (len(plc) - 4) // 12
+            if piece_count <= 0:
+                raise Word97FormatError("Empty piece table.")
+            cps = struct.unpack_from(f'<{piece_count + 1}I', plc, 0)
+            for i in range(piece_count):
+                char_count = cps[i + 1] - cps[i]
+                if char_count <= 0:
+                    continue
+                (fc_value,) = struct.unpack_from('<I', plc, 4 * (piece_count + 1) + 8 * i + 2)
+                fc = fc_value & PIECE_FC_MASK
+                if fc_value & PIECE_COMPRESSED_FLAG:
+                    # Compressed piece: 8-bit (cp1252) ক্যারেক্টার, অফসেট fc/2 এ
+                    start = fc // 2
+                    yield word_stream[start:start + char_count].decode('cp1252', errors='replace')
+                else:
+                    yield word_stream[fc:fc + 2 * char_count].decode('utf-16-le', errors='replace')
+            return
+        else:
+            raise Word97FormatError(f"Unexpected Clx entry type {clxt}.")
+    raise Word97FormatError("Clx has no piece table.")
+
+
+def _open_word_document(data):
+    """Returns (compound_file, word_stream, table_stream, fc_clx, lcb_clx) or raises Word97FormatError."""
+    compound = CompoundFile(data)
+    word_stream = compound.open_stream('WordDocument')
+    if word_stream is None or len(word_stream) < 0x44:
+        raise Word97FormatError("No WordDocument stream.")
+
+    w_ident, n_fib = struct.unpack_from('<HH', word_stream, 0)
+    (flags,) = struct.unpack_from('<H', word_stream, 0x0A)
+    if w_ident != WORD_IDENT:
+        raise Word97FormatError("Not a Word document.")
+    if n_fib < MIN_WORD97_NFIB:
+        raise Word97FormatError(f"Word 6/95 format (nFib {n_fib:#x}) is not supported.")
+    if flags & (FIB_FLAG_ENCRYPTED | FIB_FLAG_OBFUSCATED):
+        raise Word97FormatError("Document is encrypted.")
+
+    # FibBase (৩২ বাইট) এর পরে পরিবর্তনশীল দৈর্ঘ্যের fibRgW, fibRgLw এবং fibRgFcLcb
+    position = 32
+    (csw,) = struct.unpack_from('<H', word_stream, position)
+    position += 2 + 2 * csw
+    (cslw,) = struct.unpack_from('<H', word_stream, position)
+    position += 2 + 4 * cslw
+    (cb_rg_fc_lcb,) = struct.unpack_from('<H', word_stream, position)
+    position += 2
+    if cb_rg_fc_lcb <= FC_CLX_INDEX:
+        raise Word97FormatError("FIB has no Clx location.")
+    fc_clx, lcb_clx = struct.unpack_from('<II', word_stream, position + 8 * FC_CLX_INDEX)
+
+    table_name = '1Table' if flags & FIB_FLAG_WHICH_TABLE_STREAM else '0Table'
+    table_stream = compound.open_stream(table_name)
+    if table_stream is None or lcb_clx == 0 or fc_clx + lcb_clx > len(table_stream):
+        raise Word97FormatError(f"Missing or invalid {table_name} stream.")
+
+    return compound, word_stream, table_stream, fc_clx, lcb_clx
+
+
+def can_extract_word97(data):
+    """Cheap check (header, directory and FIB only) whether extract_word97_text can read `data`."""
+    try:
+        _open_word_document(data)
+        return True
+    except (Word97FormatError, struct.error):
+        return False
+
+
+def extract_word97_text(data):
+    """
+    Extracts the text of a Word 97-2003 document (all stories: body, footnotes, headers,
+    comments, endnotes and text boxes, in document order) from its raw bytes.
+    Returns None if the document can't be read this way (Word 6/95, encrypted, damaged).
+    """
+    try:
+        _, word_stream, table_stream, fc_clx, lcb_clx = _open_word_document(data)
+        text = ''.join(_read_pieces(word_stream, table_stream[fc_clx:fc_clx + lcb_clx]))
+    except (Word97FormatError, struct.error) as e:
+        logger.info(f"Native .doc extraction not possible: {e}")
+        return None
+    return _clean_text(text)
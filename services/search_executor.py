@@ -0,0 +1,351 @@
+# services/search_executor.py
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from globals import SEARCH_EXECUTOR, SEARCH_MAX_WORKERS, DOC_THREAD_WORKERS, SCAN_BATCH_FILES
+from .extraction_cache import EXTRACTION_CACHE, content_hash
+from .readers.doc_reader import DOC_CONVERSION_POOL
+from .readers.word97_reader import can_extract_word97
+from .file_reader import (
+    extract_content, extraction_key, search_extracted_content, search_file_content, is_searchable,
+    is_streamed, read_item_data, search_raw_text, file_type_label, get_extracted_content
+)
+from .metrics import new_file_stats, timed_stage, record_file_search
+from .query_parser import as_query
+
+logger = logging.getLogger("search_executor")
+
+# কোনো কনফিগারেশনেই এর বেশি ওয়ার্কার চালানো হবে না
+WORKER_HARD_CAP = 32
+
+_process_pool = None
+_thread_pool = None
+_doc_pool = None
+_pool_lock = threading.Lock()
+
+
+def worker_count():
+    """Configured worker count, capped by the number of CPU cores."""
+    return max(1, min(SEARCH_MAX_WORKERS, os.cpu_count() or 1, WORKER_HARD_CAP))
+
+
+def _get_process_pool():
+    global _process_pool
+    with _pool_lock:
+        if _process_pool is None:
+            # "spawn" is used because forking a multi-threaded server process is unsafe
+            _process_pool = ProcessPoolExecutor(
+                max_workers=worker_count(),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _process_pool
+
+
+def _get_thread_pool():
+    global _thread_pool
+    with _pool_lock:
+        if _thread_pool is None:
+            _thread_pool = ThreadPoolExecutor(max_workers=worker_count(), thread_name_prefix="search")
+        return _thread_pool
+
+
+def _get_doc_pool():
+    global _doc_pool
+    with _pool_lock:
+        if _doc_pool is None:
+            _doc_pool = ThreadPoolExecutor(
+                max_workers=max(1, min(DOC_THREAD_WORKERS, WORKER_HARD_CAP)),
+                thread_name_prefix="doc-convert"
+            )
+        return _doc_pool
+
+
+def _reset_process_pool():
+    global _process_pool
+    with _pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
+
+
+def shutdown_pools():
+    global _thread_pool, _doc_pool
+    _reset_process_pool()
+    DOC_CONVERSION_POOL.shutdown()
+    with _pool_lock:
+        for pool in (_thread_pool, _doc_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
+        _doc_pool = None
+
+
+def _extract_and_search(file_item, query, temp_uploads_dir):
+    """
+    Runs inside a worker process: extracts without the (per-process) cache and searches.
+    The extracted content is returned so the parent can cache it (text files searched as
+    raw bytes return no content); the result carries "stats" like search_file_content's.
+    """
+    stats = new_file_stats(len(file_item['data']))
+    with timed_stage(stats, "scan"):
+        outcome = search_raw_text(file_item['data'], file_item, query)
+    content = None
+    if outcome is None:
+        with timed_stage(stats, "extract"):
+            content = extract_content(file_item['data'], file_item['file_name'], temp_uploads_dir)
+        with timed_stage(stats, "scan"):
+            outcome = search_extracted_content(content, file_item, query, use_cache=False)
+    outcome[0]["stats"] = stats
+    return content, outcome
+
+
+def _index_extracted(item):
+    """Runs an item's 'on_extracted' hook once its content is extracted (and in EXTRACTION_CACHE)."""
+    hook = item.get('on_extracted')
+    if hook is None:
+        return
+    try:
+        hook(item)
+    except Exception:
+        logger.exception(f"on_extracted hook failed for {item['file_name']}")
+
+
+def _search_and_index(item, query, temp_uploads_dir):
+    outcome = search_file_content(item, query, temp_uploads_dir)
+    _index_extracted(item)
+    return outcome
+
+
+def _search_cached(cached, item, query):
+    stats = new_file_stats(len(item['data']))
+    with timed_stage(stats, "scan"):
+        result, status_code = search_extracted_content(cached, item, query)
+    result["stats"] = stats
+    return result, status_code
+
+
+def iter_search(items, query, temp_uploads_dir, timer=None):
+    """
+    Searches `items` (see search_file_content) in parallel and yields
+    (index, (result, status_code)) as soon as each file is done, in completion order.
+    Every file's outcome and stats are recorded in the metrics (services/metrics.py) and,
+    if given, added to `timer` (a RequestTimer); "stats" is removed from the results.
+    A fuzzy query's matches are ranked by "distance" within each file. An item's optional
+    'on_extracted' callable is called with the item in the worker thread (or, for the process
+    pool, here once the extracted content is cached), e.g. to index the file without a
+    separate extraction pass.
+    """
+    query = as_query(query)
+    search = _iter_search(items, query, temp_uploads_dir)
+    try:
+        for index, (result, status_code) in search:
+            stats = result.pop("stats", None)
+            if status_code == 200 and query.max_distance:
+                rank_matches(result["matches"])
+            record_file_search(file_type_label(items[index]['file_name']), result, status_code, stats)
+            if timer is not None and stats:
+                timer.add_file(items[index]['file_path'], stats)
+            yield index, (result, status_code)
+    finally:
+        search.close()
+
+
+def rank_matches(matches):
+    """Sorts fuzzy matches by edit distance in place (stable, so equal distances keep their order)."""
+    matches.sort(key=lambda match: match.get("distance", 0))
+
+
+def _iter_search(items, query, temp_uploads_dir):
+    """
+    Files read from disk ('disk_path', see services/directory_scan.py) are searched
+    SCAN_BATCH_FILES at a time, so a whole tree is never held in memory at once.
+    """
+    if not items or 'disk_path' not in items[0] or len(items) <= SCAN_BATCH_FILES:
+        yield from _iter_search_batch(items, query, temp_uploads_dir)
+        return
+    for start in range(0, len(items), SCAN_BATCH_FILES):
+        batch = _iter_search_batch(items[start:start + SCAN_BATCH_FILES], query, temp_uploads_dir)
+        try:
+            for index, outcome in batch:
+                yield start + index, outcome
+        finally:
+            batch.close()
+
+
+def _iter_search_batch(items, query, temp_uploads_dir):
+    """
+    Cache hits and files ruled out by the index are searched inline; cache misses go to the
+    process pool (or thread pool), and .doc files the native reader can't parse go to a
+    separate thread pool because their cost is waiting on the LibreOffice conversion pool.
+    Closing the generator early cancels the files that haven't started yet.
+    """
+    if SEARCH_EXECUTOR == "serial" or worker_count() == 1 or len(items) <= 1:
+        for index, item in enumerate(items):
+            yield index, _search_and_index(item, query, temp_uploads_dir)
+        return
+
+    futures = {}  # future -> (index, item, from_process_pool)
+    process_jobs = []  # (index, item)
+
+    try:
+        for index, item in enumerate(items):
+            file_name = item['file_name']
+            candidate_units = item.get('candidate_units')
+            if not is_searchable(file_name) or (candidate_units is not None and not candidate_units):
+                yield index, search_file_content(item, query, temp_uploads_dir)
+                continue
+
+            data = read_item_data(item)
+            file_hash = item.get('hash') or content_hash(data)
+            item = dict(item, data=data, hash=file_hash)
+            item.pop('file_obj', None)
+
+            # বড় CSV/টেক্সট সবসময় স্ট্রিমিং করে সার্চ হয়, ভিউয়ারের ক্যাশ করা টেক্সট ব্যবহার হয় না
+            streamed = is_streamed(file_name, len(data))
+            cached = None if streamed else EXTRACTION_CACHE.get(extraction_key(file_name, file_hash))
+            if cached is not None:
+                outcome = _search_cached(cached, item, query)
+                _index_extracted(item)
+                yield index, outcome
+            elif os.path.splitext(file_name)[1].lower() == '.doc' and not can_extract_word97(data):
+                futures[_get_doc_pool().submit(_search_and_index, item, query, temp_uploads_dir)] = (index, item, False)
+            elif SEARCH_EXECUTOR == "thread" or streamed:
+                # স্ট্রিম করা ফাইল (প্রায়ই mmap) প্রসেসে পাঠাতে পুরোটা কপি ও pickle করতে হতো
+                futures[_get_thread_pool().submit(_search_and_index, item, query, temp_uploads_dir)] = (index, item, False)
+            else:
+                if not isinstance(data, bytes):
+                    # ডিস্কে রাখা (mmap) কন্টেন্ট pickle করা যায় না, তাই ওয়ার্কারে পাঠানোর আগে bytes এ রূপান্তর
+                    item['data'] = bytes(data)
+                process_jobs.append((index, item))
+
+        if len(process_jobs) == 1:
+            index, item = process_jobs[0]
+            yield index, _search_and_index(item, query, temp_uploads_dir)
+        elif process_jobs:
+            try:
+                pool = _get_process_pool()
+                for index, item in process_jobs:
+                    # হুকটি এই প্রসেসেই চলে (ইনডেক্স এখানে থাকে), ওয়ার্কারে pickle করে পাঠানো হয় না
+                    job_item = {key: value for key, value in item.items() if key != 'on_extracted'}
+                    futures[pool.submit(_extract_and_search, job_item, query, temp_uploads_dir)] = (index, item, True)
+            except BrokenProcessPool:
+                # আগের কোনো ক্র্যাশে পুল ভেঙে থাকলে নতুন পুল পরের রিকোয়েস্টে তৈরি হবে
+                logger.exception("Search process pool is broken; searching these files inline.")
+                _reset_process_pool()
+                for future, (index, item, from_process_pool) in list(futures.items()):
+                    if from_process_pool:
+                        del futures[future]
+                for index, item in process_jobs:
+                    yield index, _search_and_index(item, query, temp_uploads_dir)
+
+        done_indexes = set()
+        try:
+            for future in as_completed(futures):
+                index, item, from_process_pool = futures[future]
+                try:
+                    if from_process_pool:
+                        content, outcome = future.result()
+                        if content:
+                            EXTRACTION_CACHE.put(extraction_key(item['file_name'], item['hash']), content)
+                        _index_extracted(item)
+                    else:
+                        outcome = future.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    logger.exception(f"Search task failed for {item['file_name']}")
+                    outcome = ({"status": "error", "message": str(e)}, 500)
+                done_indexes.add(index)
+                yield index, outcome
+        except BrokenProcessPool:
+            # কোনো ওয়ার্কার ক্র্যাশ করলে পুল রিসেট করে বাকি ফাইলগুলো এই প্রসেসেই সার্চ করা হলো
+            logger.exception("Search process pool broke; finishing the remaining files inline.")
+            _reset_process_pool()
+            for index, item, _ in futures.values():
+                if index not in done_indexes:
+                    yield index, _search_and_index(item, query, temp_uploads_dir)
+    finally:
+        # কলার আগেই থামলে (যেমন রেজাল্টের সীমা পূর্ণ হলে) এখনো শুরু না হওয়া কাজগুলো বাতিল করা হয়
+        for future in futures:
+            future.cancel()
+
+
+def _extract_only(file_item, temp_uploads_dir):
+    """Runs inside a worker process: extraction only (ingestion jobs search later)."""
+    return extract_content(file_item['data'], file_item['file_name'], temp_uploads_dir)
+
+
+def iter_extract(items, temp_uploads_dir):
+    """
+    Extracts `items` ({'data', 'file_name', 'hash'}) into EXTRACTION_CACHE ahead of any search,
+    on the same pools as iter_search, and yields (index, content) as each file is done.
+    Content is None for unsupported or unreadable files, and True for streamed files
+    (big CSV/text files are never extracted, see is_streamed).
+    """
+    futures = {}  # future -> (index, item, from_process_pool)
+    parallel = SEARCH_EXECUTOR != "serial" and worker_count() > 1 and len(items) > 1
+    try:
+        for index, item in enumerate(items):
+            file_name, data = item['file_name'], item['data']
+            if not is_searchable(file_name):
+                yield index, None
+                continue
+            if is_streamed(file_name, len(data)):
+                yield index, True
+                continue
+            key = extraction_key(file_name, item['hash'])
+            cached = EXTRACTION_CACHE.get(key)
+            if cached is not None:
+                yield index, cached
+            elif not parallel or SEARCH_EXECUTOR == "thread":
+                if parallel:
+                    futures[_get_thread_pool().submit(
+                        get_extracted_content, data, file_name, temp_uploads_dir, item['hash']
+                    )] = (index, item, False)
+                else:
+                    yield index, get_extracted_content(data, file_name, temp_uploads_dir, item['hash'])
+            elif os.path.splitext(file_name)[1].lower() == '.doc' and not can_extract_word97(data):
+                futures[_get_doc_pool().submit(
+                    get_extracted_content, data, file_name, temp_uploads_dir, item['hash']
+                )] = (index, item, False)
+            else:
+                job = dict(item, data=data if isinstance(data, bytes) else bytes(data))
+                try:
+                    futures[_get_process_pool().submit(_extract_only, job, temp_uploads_dir)] = (index, item, True)
+                except BrokenProcessPool:
+                    logger.exception("Search process pool is broken; extracting inline.")
+                    _reset_process_pool()
+                    yield index, get_extracted_content(data, file_name, temp_uploads_dir, item['hash'])
+
+        for future in as_completed(futures):
+            index, item, from_process_pool = futures[future]
+            try:
+                content = future.result()
+            except BrokenProcessPool:
+                logger.exception(f"Search process pool broke; extracting {item['file_name']} inline.")
+                _reset_process_pool()
+                content = get_extracted_content(item['data'], item['file_name'], temp_uploads_dir, item['hash'])
+            except Exception:
+                logger.exception(f"Extraction failed for {item['file_name']}")
+                content = None
+            if from_process_pool and content:
+                EXTRACTION_CACHE.put(extraction_key(item['file_name'], item['hash']), content)
+            yield index, content
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def run_search(items, query, temp_uploads_dir):
+    """
+    Like iter_search, but returns a list of (result, status_code) tuples in the same order as `items`.
+    """
+    results = [None] * len(items)
+    for index, outcome in iter_search(items, query, temp_uploads_dir):
+        results[index] = outcome
+    return results
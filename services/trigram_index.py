@@ -0,0 +1,186 @@
+# services/trigram_index.py
+
+import logging
+import threading
+
+logger = logging.getLogger("trigram_index")
+
+NGRAM_SIZE = 3
+
+
+def _trigrams(text):
+    """
+    Returns the set of lowercase trigrams in `text`.
+    Lowercasing mirrors the case-insensitive (re.IGNORECASE) matching used by the readers.
+    """
+    text = text.lower()
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+def query_trigrams(query):
+    """
+    Trigrams every match of `query` must contain.
+
+    The readers allow any whitespace between the words of a query (PDF) or match it
+    literally (text), so only trigrams inside each whitespace-separated word are required.
+    Returns None when no word is long enough to narrow the search.
+    """
+    grams = set()
+    for part in query.split():
+        grams |= _trigrams(part)
+    return grams or None
+
+
+class TrigramIndex:
+    """
+    In-memory inverted index from trigrams to document units.
+
+    A document is identified by any hashable id (here (content_hash, extension)) and is
+    split into units: pages for PDFs, a single unit for everything else. A query is
+    narrowed to candidate units by intersecting posting lists; candidates still have to
+    be verified by the regular reader search.
+
+    Several owners (the content store, ingestion jobs) can share one document; it is only
+    removed when the last of them releases it.
+    """
+
+    def __init__(self):
+        self._postings = {}      # trigram -> set(unit_key)
+        self._unit_keys = {}     # unit_key -> (doc_id, unit_number)
+        self._documents = {}     # doc_id -> [(unit_key, trigrams), ...]
+        self._owners = {}        # doc_id -> set(owner)
+        self._next_key = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, doc_id):
+        with self._lock:
+            return doc_id in self._documents
+
+    def __len__(self):
+        with self._lock:
+            return len(self._documents)
+
+    def add_owner(self, doc_id, owner):
+        """Adds `owner` to an indexed document. Returns False (and does nothing) if it isn't indexed."""
+        with self._lock:
+            if doc_id not in self._documents:
+                return False
+            self._owners[doc_id].add(owner)
+            return True
+
+    def add_document(self, doc_id, units, owner):
+        """
+        Indexes `units` (a list of strings) under `doc_id` for `owner`, replacing any previous
+        version (its owners are kept).
+        """
+        # ট্রাইগ্রাম বের করা লকের বাইরে করা হলো, যাতে অন্য সার্চ আটকে না থাকে
+        unit_grams = [_trigrams(text or "") for text in units]
+
+        with self._lock:
+            if doc_id in self._documents:
+                self._remove_locked(doc_id)
+
+            entries = []
+            for unit_number, grams in enumerate(unit_grams):
+                unit_key = self._next_key
+                self._next_key += 1
+                self._unit_keys[unit_key] = (doc_id, unit_number)
+                for gram in grams:
+                    self._postings.setdefault(gram, set()).add(unit_key)
+                entries.append((unit_key, grams))
+            self._documents[doc_id] = entries
+            self._owners.setdefault(doc_id, set()).add(owner)
+
+    def release(self, owner, doc_ids=None):
+        """
+        Drops `owner` from `doc_ids` (default: every document it owns) and removes the
+        documents no one owns any more.
+        """
+        with self._lock:
+            if doc_ids is None:
+                doc_ids = [doc_id for doc_id, owners in self._owners.items() if owner in owners]
+            for doc_id in doc_ids:
+                self._release_locked(doc_id, owner)
+
+    def release_hash(self, file_hash, owner):
+        """Like release(), for every document indexed for a content hash (all extensions)."""
+        with self._lock:
+            for doc_id in [d for d in self._documents if d[0] == file_hash]:
+                self._release_locked(doc_id, owner)
+
+    def candidates(self, query):
+        """
+        Returns {doc_id: set(unit_numbers)} of units that may match `query`, or None
+        if the query is too short to narrow anything (every unit is a candidate).
+        Documents that are not indexed are never in the result; callers must search them fully.
+        """
+        grams = query_trigrams(query)
+        if grams is None:
+            return None
+
+        with self._lock:
+            postings = []
+            for gram in grams:
+                posting = self._postings.get(gram)
+                if not posting:
+                    return {}
+                postings.append(posting)
+
+            # সবচেয়ে ছোট posting list দিয়ে শুরু করলে intersection দ্রুত হয়
+            postings.sort(key=len)
+            result = set(postings[0])
+            for posting in postings[1:]:
+                result &= posting
+                if not result:
+                    return {}
+
+            narrowed = {}
+            for unit_key in result:
+                doc_id, unit_number = self._unit_keys[unit_key]
+                narrowed.setdefault(doc_id, set()).add(unit_number)
+            return narrowed
+
+    def candidates_any(self, terms):
+        """
+        Like candidates(), but for units that may contain at least one of `terms`
+        (the union of each term's candidates). Returns None if any term is too short to narrow.
+        """
+        narrowed = {}
+        for term in terms:
+            term_candidates = self.candidates(term)
+            if term_candidates is None:
+                return None
+            for doc_id, units in term_candidates.items():
+                narrowed.setdefault(doc_id, set()).update(units)
+        return narrowed
+
+    def stats(self):
+        with self._lock:
+            return {
+                "documents": len(self._documents),
+                "units": len(self._unit_keys),
+                "trigrams": len(self._postings),
+            }
+
+    def _release_locked(self, doc_id, owner):
+        owners = self._owners.get(doc_id)
+        if owners is None:
+            return
+        owners.discard(owner)
+        if not owners:
+            del self._owners[doc_id]
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id):
+        for unit_key, grams in self._documents.pop(doc_id):
+            del self._unit_keys[unit_key]
+            for gram in grams:
+                posting = self._postings.get(gram)
+                if posting is not None:
+                    posting.discard(unit_key)
+                    if not posting:
+                        del self._postings[gram]
+
+
+# 🌟 হ্যাশ-ম্যানিফেস্ট সার্চের সার্ভার-সাইড কর্পাসের জন্য শেয়ার্ড ইনডেক্স
+CORPUS_INDEX = TrigramIndex()
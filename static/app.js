@@ -26,8 +26,12 @@ document.addEventListener('DOMContentLoaded', () => {
     const fallbackInput = $('#fallbackInput');
     const folderListContainer = $('#folderListContainer');
     const queryInput = $('#query');
+    const fileScopeInput = $('#fileScope');
+    const fuzzyInput = $('#fuzzy');
+    const booleanSyntaxInput = $('#booleanSyntax');
     const searchBtn = $('#searchBtn');
     const tbody = $('#tbody');
+    const loadMoreBtn = $('#loadMoreBtn');
     const statusEl = $('#status');
     // একক basePathInputGroup লুকানোর জন্য এটি অ্যাক্সেস করা হলো
     const singleBasePathInputGroup = $('#basePathInputGroup');
@@ -37,6 +41,8 @@ document.addEventListener('DOMContentLoaded', () => {
     let pickedFiles = new Map();
     let pickedFilePaths = new Map(); // file.name -> root_folder/subfolder/file_name (relative path)
     let currentQuery = '';
+    let nextCursor = null; // সার্ভার রেজাল্ট সীমিত করলে পরের পেজের cursor
+    let shownCount = 0;
 
     // 🚀 মূল ডেটা স্ট্রাকচার: প্রতিটি ফোল্ডারের জন্য Absolute Path সংরক্ষণ করার জন্য Map
     let folderBasePaths = new Map(); // folder_name (root_dir) -> absolute_path
@@ -55,7 +61,9 @@ document.addEventListener('DOMContentLoaded', () => {
         '.pro', '.pl', '.vhd', '.vhdl', '.d', '.abap', '.txt', '.md', '.log',
         '.json', '.xml', '.yml', '.yaml', '.toml',
         // 🌟 নতুন যোগ: Excel ও CSV
-        '.xlsx', '.xls', '.csv'
+        '.xlsx', '.xls', '.csv',
+        // আর্কাইভের ভেতরের ফাইলগুলো সার্ভার সার্চ করে
+        '.zip'
     ]);
 
     // 🌟 নতুন কনস্ট্যান্ট: যে ফাইলগুলো টেক্সট ভিউয়ার দিয়ে দেখা হবে
@@ -321,33 +329,398 @@ document.addEventListener('DOMContentLoaded', () => {
             statusEl.textContent = 'Uploading and searching...';
             tbody.innerHTML = '';
             currentQuery = query;
+            shownCount = 0;
 
-            const formData = new FormData();
-            formData.append('q', query);
-            formData.append('paths', JSON.stringify(Object.fromEntries(pickedFilePaths)));
+            await runSearchPage(null);
+        });
+    }
+
+    if (loadMoreBtn) {
+        loadMoreBtn.addEventListener('click', async () => {
+            if (!nextCursor) return;
+            statusEl.textContent = 'Loading more results...';
+            await runSearchPage(nextCursor);
+        });
+    }
+
+    async function runSearchPage(cursor) {
+        nextCursor = null;
+        if (loadMoreBtn) loadMoreBtn.style.display = 'none';
+
+        try {
+            // 🚀 প্রতিটি ফাইল শেষ হওয়ার সাথে সাথে ফলাফল টেবিলে যোগ করা হচ্ছে
+            const data = await searchFiles(currentQuery, (event) => {
+                appendResults(event.matches);
+                statusEl.textContent = `Searching... ${event.processed}/${event.total} file(s) done, ${shownCount + event.total_count} match(es) so far.`;
+            }, cursor);
 
-            for (const [name, file] of pickedFiles) {
-                formData.append('files', file, name);
+            if (data.status === 'ok') {
+                shownCount += data.count;
+                statusEl.textContent = `Found ${shownCount} match(es) in ${selectedFolderHandles.length} folder(s).`;
+                if (data.truncated) {
+                    statusEl.textContent += ' Results were limited.';
+                }
+                if (data.next_cursor && loadMoreBtn) {
+                    nextCursor = data.next_cursor;
+                    loadMoreBtn.style.display = '';
+                }
+            } else {
+                statusEl.textContent = `Error: ${data.message}`;
             }
+        } catch (error) {
+            console.error('Search failed:', error);
+            statusEl.textContent = `Search failed: ${error.message}. Try searching a smaller number of files.`;
+        }
+    }
 
-            try {
-                const response = await fetch('/search_upload', {
-                    method: 'POST',
-                    body: formData
-                });
-                const data = await response.json();
-
-                if (data.status === 'ok') {
-                    statusEl.textContent = `Found ${data.count} match(es) in ${selectedFolderHandles.length} folder(s).`;
-                    displayResults(data.matches);
-                } else {
-                    statusEl.textContent = `Error: ${data.message}`;
+    // ------------------- Hash-Manifest Search -------------------
+
+    // 🚀 সার্ভারে আগে থেকে থাকা ফাইল আবার আপলোড না করার জন্য SHA-256 হ্যাশ ব্যবহার করা হচ্ছে
+    const UPLOAD_BATCH_BYTES = 32 * 1024 * 1024;
+    const fileHashCache = new WeakMap(); // File -> hex SHA-256
+
+    // crypto.subtle.digest পুরো ফাইল একবারে মেমরিতে চায়; এর চেয়ে বড় ফাইল টুকরো টুকরো পড়ে Sha256 দিয়ে হ্যাশ হয়
+    const NATIVE_HASH_MAX_BYTES = 64 * 1024 * 1024;
+    const HASH_SLICE_BYTES = 8 * 1024 * 1024;
+
+    const SHA256_K = new Int32Array([
+        0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+        0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+        0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+        0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+        0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+        0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+        0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+        0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2
+    ]);
+
+    // Incremental SHA-256 (FIPS 180-4): update() can be called slice by slice, digest() returns hex
+    class Sha256 {
+        constructor() {
+            this.state = new Int32Array([
+                0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19
+            ]);
+            this.buffer = new Uint8Array(64);
+            this.buffered = 0;
+            this.length = 0;
+            this.words = new Int32Array(64);
+        }
+
+        update(bytes) {
+            this.length += bytes.length;
+            let offset = 0;
+            if (this.buffered) {
+                offset = Math.min(64 - this.buffered, bytes.length);
+                this.buffer.set(bytes.subarray(0, offset), this.buffered);
+                this.buffered += offset;
+                if (this.buffered < 64) {
+                    return;
                 }
-            } catch (error) {
-                console.error('Search failed:', error);
-                statusEl.textContent = `Search failed: ${error.message}. Try searching a smaller number of files.`;
+                this.block(this.buffer, 0);
+                this.buffered = 0;
+            }
+            for (; offset + 64 <= bytes.length; offset += 64) {
+                this.block(bytes, offset);
+            }
+            this.buffer.set(bytes.subarray(offset));
+            this.buffered = bytes.length - offset;
+        }
+
+        digest() {
+            const tail = new Uint8Array(this.buffered < 56 ? 64 : 128);
+            tail.set(this.buffer.subarray(0, this.buffered));
+            tail[this.buffered] = 0x80;
+            const view = new DataView(tail.buffer);
+            view.setUint32(tail.length - 8, Math.floor(this.length / 0x20000000));
+            view.setUint32(tail.length - 4, (this.length * 8) >>> 0);
+            for (let offset = 0; offset < tail.length; offset += 64) {
+                this.block(tail, offset);
+            }
+            return Array.from(this.state, word => (word >>> 0).toString(16).padStart(8, '0')).join('');
+        }
+
+        block(bytes, offset) {
+            const w = this.words;
+            for (let i = 0; i < 16; i++) {
+                const j = offset + i * 4;
+                w[i] = (bytes[j] << 24) | (bytes[j + 1] << 16) | (bytes[j + 2] << 8) | bytes[j + 3];
+            }
+            for (let i = 16; i < 64; i++) {
+                const x = w[i - 15], y = w[i - 2];
+                const s0 = ((x >>> 7) | (x << 25)) ^ ((x >>> 18) | (x << 14)) ^ (x >>> 3);
+                const s1 = ((y >>> 17) | (y << 15)) ^ ((y >>> 19) | (y << 13)) ^ (y >>> 10);
+                w[i] = (w[i - 16] + s0 + w[i - 7] + s1) | 0;
+            }
+            const state = this.state;
+            let a = state[0], b = state[1], c = state[2], d = state[3];
+            let e = state[4], f = state[5], g = state[6], h = state[7];
+            for (let i = 0; i < 64; i++) {
+                const S1 = ((e >>> 6) | (e << 26)) ^ ((e >>> 11) | (e << 21)) ^ ((e >>> 25) | (e << 7));
+                const t1 = (h + S1 + ((e & f) ^ (~e & g)) + SHA256_K[i] + w[i]) | 0;
+                const S0 = ((a >>> 2) | (a << 30)) ^ ((a >>> 13) | (a << 19)) ^ ((a >>> 22) | (a << 10));
+                const t2 = (S0 + ((a & b) ^ (a & c) ^ (b & c))) | 0;
+                h = g; g = f; f = e; e = (d + t1) | 0;
+                d = c; c = b; b = a; a = (t1 + t2) | 0;
+            }
+            state[0] += a; state[1] += b; state[2] += c; state[3] += d;
+            state[4] += e; state[5] += f; state[6] += g; state[7] += h;
+        }
+    }
+
+    async function hashFile(file) {
+        if (fileHashCache.has(file)) {
+            return fileHashCache.get(file);
+        }
+        let hex;
+        if (file.size <= NATIVE_HASH_MAX_BYTES) {
+            const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+            hex = Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+        } else {
+            const hash = new Sha256();
+            for (let start = 0; start < file.size; start += HASH_SLICE_BYTES) {
+                hash.update(new Uint8Array(await file.slice(start, start + HASH_SLICE_BYTES).arrayBuffer()));
             }
+            hex = hash.digest();
+        }
+        fileHashCache.set(file, hex);
+        return hex;
+    }
+
+    async function buildManifest() {
+        const manifest = [];
+        for (const [name, file] of pickedFiles) {
+            manifest.push({
+                name: name,
+                path: pickedFilePaths.get(name) || name,
+                size: file.size,
+                hash: await hashFile(file)
+            });
+        }
+        return manifest;
+    }
+
+    async function postJson(url, body) {
+        const response = await fetch(url, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(body)
         });
+        return response.json();
+    }
+
+    async function uploadMissingContent(manifest, missingHashes) {
+        const missing = new Set(missingHashes);
+        const byHash = new Map();
+        for (const entry of manifest) {
+            if (missing.has(entry.hash) && !byHash.has(entry.hash)) {
+                byHash.set(entry.hash, pickedFiles.get(entry.name));
+            }
+        }
+
+        // বড় রিকোয়েস্ট এড়াতে ব্যাচে আপলোড করা হচ্ছে
+        let formData = new FormData();
+        let batchBytes = 0;
+        let uploaded = 0;
+        for (const [hash, file] of byHash) {
+            // "<hash>.<ext>" নাম দিলে সার্ভার আপলোডের সময়েই কন্টেন্ট ইনডেক্স করতে পারে
+            const dot = file.name.lastIndexOf('.');
+            const extension = dot >= 0 ? file.name.substring(dot).toLowerCase() : '';
+            formData.append('files', file, hash + extension);
+            batchBytes += file.size;
+            uploaded++;
+            if (batchBytes >= UPLOAD_BATCH_BYTES) {
+                statusEl.textContent = `Uploading new/changed files (${uploaded}/${byHash.size})...`;
+                await fetch('/upload_content', { method: 'POST', body: formData });
+                formData = new FormData();
+                batchBytes = 0;
+            }
+        }
+        if (formData.has('files')) {
+            await fetch('/upload_content', { method: 'POST', body: formData });
+        }
+    }
+
+    // NDJSON স্ট্রিম থেকে প্রতিটি "file" ইভেন্ট পড়ে onFile কল করা হয়, শেষে "done" ইভেন্ট ফেরত দেওয়া হয়
+    async function readSearchStream(response, onFile) {
+        const contentType = response.headers.get('Content-Type') || '';
+        if (!contentType.includes('application/x-ndjson') || !response.body) {
+            // স্ট্রিমিং ছাড়া সাধারণ JSON রেসপন্স (যেমন এরর)
+            const data = await response.json();
+            if (data.status === 'ok' && data.matches) {
+                onFile({ matches: data.matches, count: data.count, processed: 1, total: 1, total_count: data.count });
+            }
+            return data;
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let doneEvent = null;
+
+        const handleLine = (line) => {
+            if (!line.trim()) return;
+            const event = JSON.parse(line);
+            if (event.type === 'file') {
+                onFile(event);
+            } else if (event.type === 'done') {
+                doneEvent = event;
+            } else if (event.type === 'error') {
+                doneEvent = { status: 'error', message: event.message };
+            }
+        };
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            let newline;
+            while ((newline = buffer.indexOf('\n')) >= 0) {
+                handleLine(buffer.substring(0, newline));
+                buffer = buffer.substring(newline + 1);
+            }
+        }
+        handleLine(buffer + decoder.decode());
+
+        return doneEvent || { status: 'error', message: 'Search stream ended unexpectedly.' };
+    }
+
+    // AND/OR/NOT লাইন ধরে নাকি পুরো ফাইল ধরে মূল্যায়ন হবে
+    function searchScope() {
+        return fileScopeInput && fileScopeInput.checked ? 'file' : 'line';
+    }
+
+    // প্রতিটি টার্মে কতগুলো টাইপো (এডিট) মানা হবে; 0 = হুবহু মিল
+    function searchFuzzy() {
+        return fuzzyInput ? Number(fuzzyInput.value) || 0 : 0;
+    }
+
+    // কোট ও AND/OR/NOT শুধু টিক দিলে মানা হয়; না হলে পুরো কুয়েরি হুবহু খোঁজা হয়
+    function searchSyntax() {
+        return booleanSyntaxInput && booleanSyntaxInput.checked ? 'boolean' : 'literal';
+    }
+
+    async function streamHashSearch(query, entries, onFile, cursor) {
+        const response = await fetch('/search_hashes', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ q: query, scope: searchScope(), fuzzy: searchFuzzy(), syntax: searchSyntax(), files: entries, stream: 'ndjson', cursor: cursor || undefined })
+        });
+        return readSearchStream(response, onFile);
+    }
+
+    async function searchWithManifest(query, onFile, cursor) {
+        statusEl.textContent = 'Hashing files...';
+        const manifest = await buildManifest();
+
+        const manifestData = await postJson('/search_manifest', { files: manifest });
+        if (manifestData.status !== 'ok') {
+            return manifestData;
+        }
+
+        if (manifestData.missing.length > 0) {
+            await uploadMissingContent(manifest, manifestData.missing);
+        }
+
+        statusEl.textContent = 'Searching...';
+        let data = await streamHashSearch(query, manifest, onFile, cursor);
+
+        // সার্ভার এর মধ্যে কোনো কন্টেন্ট মুছে ফেললে শুধু সেই ফাইলগুলো আবার আপলোড করে সার্চ করা হলো
+        if (data.status === 'ok' && data.missing && data.missing.length > 0) {
+            await uploadMissingContent(manifest, data.missing);
+            const missing = new Set(data.missing);
+            const retry = await streamHashSearch(query, manifest.filter(entry => missing.has(entry.hash)), onFile);
+            // পরের পেজের cursor পুরো ম্যানিফেস্টের জন্য, তাই মূল রিকোয়েস্টেরটাই রাখা হলো
+            if (retry.status === 'ok') {
+                retry.next_cursor = data.next_cursor;
+                retry.truncated = retry.truncated || data.truncated;
+            }
+            data = retry;
+        }
+        return data;
+    }
+
+    async function searchWithUpload(query, onFile, cursor) {
+        const formData = new FormData();
+        formData.append('q', query);
+        if (cursor) formData.append('cursor', cursor);
+        formData.append('scope', searchScope());
+        formData.append('fuzzy', searchFuzzy());
+        formData.append('syntax', searchSyntax());
+        formData.append('stream', 'ndjson');
+        formData.append('paths', JSON.stringify(Object.fromEntries(pickedFilePaths)));
+
+        for (const [name, file] of pickedFiles) {
+            formData.append('files', file, name);
+        }
+
+        const response = await fetch('/search_upload', {
+            method: 'POST',
+            body: formData
+        });
+        return readSearchStream(response, onFile);
+    }
+
+    // ------------------- Server-Side Scan -------------------
+
+    // 🚀 সার্ভার যে ফোল্ডারগুলো নিজেই পড়তে পারে (SCAN_ROOTS); সেখানে কোনো ফাইল আপলোড হয় না
+    let serverScanRoots = [];
+    fetch('/scan_roots')
+        .then(response => response.json())
+        .then(data => { serverScanRoots = (data.roots || []).map(root => root.replace(/\\/g, '/').replace(/\/+$/, '')); })
+        .catch(() => { serverScanRoots = []; });
+
+    // প্রতিটি নির্বাচিত ফোল্ডারের অ্যাবসোলিউট পাথ কোনো SCAN_ROOTS এর ভেতরে থাকলে সেগুলো ফেরত দেয়, নাহলে null
+    function serverScanFolders() {
+        if (serverScanRoots.length === 0 || selectedFolderHandles.length === 0) return null;
+        const folders = [];
+        for (const handle of selectedFolderHandles) {
+            const basePath = folderBasePaths.get(handle.name);
+            if (!basePath || !serverScanRoots.some(root => basePath === root || basePath.startsWith(root + '/'))) {
+                return null;
+            }
+            folders.push({ path: basePath, name: handle.name });
+        }
+        return folders;
+    }
+
+    async function searchWithServerScan(query, folders, onFile, cursor) {
+        statusEl.textContent = 'Scanning folders on the server...';
+        const response = await fetch('/search_scan', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ q: query, scope: searchScope(), fuzzy: searchFuzzy(), syntax: searchSyntax(), folders: folders, stream: 'ndjson', cursor: cursor || undefined })
+        });
+        if (response.status === 400 || response.status === 404) {
+            // সার্ভার ফোল্ডারটি পড়তে না পারলে (যেমন ভিন্ন মেশিনের পাথ) আগের মতো আপলোড করে সার্চ
+            const data = await response.json();
+            console.warn(`Server-side scan unavailable: ${data.message}`);
+            return null;
+        }
+        return readSearchStream(response, onFile);
+    }
+
+    async function searchFiles(query, onFile, cursor) {
+        // মোট ম্যাচ সংখ্যা ক্লায়েন্টেই গণনা করা হয় (পুনরায় চেষ্টা করা ফাইলসহ)
+        let count = 0;
+        const countingOnFile = (event) => {
+            count += event.count || 0;
+            onFile(event);
+        };
+
+        const folders = serverScanFolders();
+        let data = folders ? await searchWithServerScan(query, folders, countingOnFile, cursor) : null;
+
+        // crypto.subtle শুধুমাত্র secure context (HTTPS/localhost) এ পাওয়া যায়
+        if (!data) {
+            data = (window.crypto && crypto.subtle)
+                ? await searchWithManifest(query, countingOnFile, cursor)
+                : await searchWithUpload(query, countingOnFile, cursor);
+        }
+
+        if (data.status === 'ok') {
+            data.count = count;
+        }
+        return data;
     }
 
     // ------------------- Helper Functions (File Collection) -------------------
@@ -451,8 +824,10 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
 
-    function displayResults(matches) {
-        tbody.innerHTML = '';
+    // নতুন ম্যাচগুলো টেবিলের শেষে যোগ করে (স্ট্রিমিং সার্চে প্রতিটি ফাইলের পর কল হয়)
+    function appendResults(matches) {
+        if (!matches || matches.length === 0) return;
+        const fragment = document.createDocumentFragment();
         matches.forEach(match => {
             const tr = document.createElement('tr');
 
@@ -463,15 +838,33 @@ document.addEventListener('DOMContentLoaded', () => {
 
             const pageLineTd = document.createElement('td');
             let content = `Page: ${match.page}`;
-            if (match.line) {
+            if (match.cell) {
+                // Excel/CSV: শিট ও সেল (যেমন Sheet1!B7)
+                content = match.sheet ? `${match.sheet}!${match.cell}` : `Cell: ${match.cell}`;
+            } else if (match.line) {
                 content = `Line: ${match.line}`;
+                if (match.part && match.part !== 'document') {
+                    // DOCX: বডির বাইরের ম্যাচ (হেডার, ফুটার, ফুটনোট...)
+                    content += ` (${match.part})`;
+                }
             }
-            pageLineTd.innerHTML = content;
+            // শিটের নামে HTML থাকতে পারে, তাই textContent
+            pageLineTd.textContent = content;
             pageLineTd.setAttribute('data-label', 'Page/Line'); 
             tr.appendChild(pageLineTd);
 
             const previewTd = document.createElement('td');
             previewTd.innerHTML = match.preview;
+            if (match.terms && match.terms.length > 0) {
+                // কোন কোন টার্ম এই লাইনে/পেজে পাওয়া গেছে
+                const termsEl = document.createElement('div');
+                termsEl.className = 'hint';
+                termsEl.textContent = `Terms: ${match.terms.join(', ')}`;
+                if (match.distance !== undefined) {
+                    termsEl.textContent += ` (distance ${match.distance})`;
+                }
+                previewTd.appendChild(termsEl);
+            }
             previewTd.setAttribute('data-label', 'Preview (highlighted)'); 
             tr.appendChild(previewTd);
 
@@ -484,6 +877,8 @@ document.addEventListener('DOMContentLoaded', () => {
             // 1. Open File Button (Updated logic for all text-based files)
             const openFileBtn = document.createElement('button');
             openFileBtn.textContent = 'Open File';
+            // আর্কাইভের ভেতরের ফাইল (archive.zip!/inner) আলাদাভাবে দেখানো যায় না, শুধু ফোল্ডার খোলা যায়
+            openFileBtn.disabled = Boolean(match.member);
             openFileBtn.onclick = async () => {
                 const fileToOpen = pickedFiles.get(match.file);
                 const originalPath = pickedFilePaths.get(match.file);
@@ -566,8 +961,9 @@ document.addEventListener('DOMContentLoaded', () => {
             openTd.appendChild(openFolderBtn);
 
             tr.appendChild(openTd);
-            tbody.appendChild(tr);
+            fragment.appendChild(tr);
         });
+        tbody.appendChild(fragment);
     }
 
     // Initial status update